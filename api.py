@@ -1,22 +1,539 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import base64
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from exporters import NdjsonWriter, iter_rows
+from instrumentation import Metrics, Profiler, profiling
+from logging_setup import setup_logging
+from result_cache import ResultCache, items_size, text_key
+from text_analysis import (
+    DecodingNgramCounter,
+    DecodingWordCounter,
+    analyze_text,
+    format_top_words,
+    item_rows,
+    text_stats,
+)
+
+# Textos até este tamanho (em caracteres) são analisados no próprio processo:
+# para textos pequenos o custo de enviar o texto para outro processo é maior que a análise.
+# É também o máximo analisado no próprio processo por pedido: num lote, os textos pequenos que já
+# não cabem vão para o pool em grupos deste tamanho (para não bloquear o event loop).
+INLINE_MAX_CHARS = int(os.environ.get("ANALYZE_INLINE_MAX_CHARS", str(64 * 1024)))
+
+# Número de processos para analisar textos grandes.
+POOL_WORKERS = int(os.environ.get("ANALYZE_POOL_WORKERS", str(os.cpu_count() or 1)))
+
+# Máximo de análises em curso no pool (as seguintes de um mesmo pedido esperam por um lugar);
+# um pedido que chega com o pool já cheio leva 503.
+MAX_PENDING = int(os.environ.get("ANALYZE_MAX_PENDING", str(POOL_WORKERS * 4)))
+
+# Tempo máximo (segundos) de um pedido que usa o pool, incluindo a espera por lugares; acima disto
+# o pedido leva 504 e as suas análises que ainda não terminaram são canceladas.
+DEADLINE_SECONDS = float(os.environ.get("ANALYZE_DEADLINE_SECONDS", "30"))
+
+# Maior n-grama aceite nos pedidos (campo "ngram": 2 = bigramas, 3 = trigramas, ...).
+MAX_NGRAM = int(os.environ.get("ANALYZE_MAX_NGRAM", "5"))
+
+# Cache dos resultados completos (vocabulário ordenado e estatísticas, se já pedidas) por conteúdo do texto.
+# Limites configuráveis por variáveis de ambiente.
+CACHE = ResultCache(
+    max_entries=int(os.environ.get("ANALYZE_CACHE_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("ANALYZE_CACHE_BYTES", str(64 * 1024 * 1024))),
+)
+
+# Documentos com o vocabulário completo ordenado, lido por páginas (POST /documents e
+# GET /documents/{handle}/words). Separado da CACHE para as análises normais não fazerem expirar um
+# documento a meio da paginação; os handles usados há mais tempo expiram quando o limite de bytes é ultrapassado.
+DOCUMENTS = ResultCache(
+    max_entries=int(os.environ.get("ANALYZE_DOCUMENTS_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("ANALYZE_DOCUMENTS_BYTES", str(256 * 1024 * 1024))),
+)
+
+# Nº de palavras de cada página do vocabulário (default e máximo do parâmetro "limit").
+PAGE_SIZE = 1000
+MAX_PAGE_SIZE = int(os.environ.get("ANALYZE_MAX_PAGE_SIZE", "100000"))
+
+# Métricas de etapas e pedidos (endpoint /metrics, formato Prometheus).
+METRICS = Metrics()
+
+# Pool de processos (criado só quando chega o primeiro texto grande).
+_pool: ProcessPoolExecutor | None = None
+
+# Nº de análises entregues ao pool e ainda não terminadas, mesmo as de pedidos que já levaram 504
+# (só é alterado no event loop).
+_pending = 0
+
+# Análises à espera de um lugar no pool (futures resolvidos quando um lugar fica livre).
+_waiters: deque[asyncio.Future] = deque()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logs partilhados com a CLI (escritos numa thread à parte; nível pela variável LOG_LEVEL).
+    setup_logging()
+    yield
+    # Ao desligar a API, termina os processos do pool.
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
 
-from text_analysis import top_words, top_words_format
 
-app = FastAPI(title="Text Analyzer API", version="1.0.0")
+app = FastAPI(title="Text Analyzer API", version="1.0.0", lifespan=lifespan)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede a latência e o tamanho do corpo de cada pedido e ativa METRICS
+    durante o pedido, para as etapas da análise ficarem registadas (ver instrumentation.stage)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        size = 0
+        status = 500
+
+        async def counting_receive():
+            # Conta os bytes do corpo à medida que a aplicação os lê (também em uploads em streaming).
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                size += len(message.get("body", b""))
+            return message
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            with profiling(METRICS):
+                await self.app(scope, counting_receive, status_send)
+        finally:
+            # Caminho do endpoint (ex.: "/analyze"), não o URL do pedido, para não criar uma série por URL.
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            METRICS.observe_request(scope["method"], path, status, time.perf_counter() - start, size)
+
+
+app.add_middleware(MetricsMiddleware)
 
 
 class AnalyzeRequest(BaseModel):
     text: str = Field(..., min_length=1)
     n: int = Field(10, ge=1, le=100)
+    stats: bool = False
+    ngram: int = Field(1, ge=1, le=MAX_NGRAM)
 
 
 class AnalyzeResponse(BaseModel):
     n: int
     report: str
     items: list[dict]
+    stats: dict | None = None
+
+
+class DocumentRequest(BaseModel):
+    text: str = Field(..., min_length=1)
+    ngram: int = Field(1, ge=1, le=MAX_NGRAM)
+
+
+class DocumentResponse(BaseModel):
+    handle: str
+    words: int
+
+
+class WordsPage(BaseModel):
+    handle: str
+    total: int
+    items: list[dict]
+    next_cursor: str | None = None
+
+
+class BatchRequest(BaseModel):
+    items: list[AnalyzeRequest] = Field(..., min_length=1, max_length=1000)
+
+
+class BatchResponse(BaseModel):
+    results: list[AnalyzeResponse]
+
+
+def profiled(func, *args):
+    # Corre func(*args) com um Profiler próprio (dentro de um processo do pool) e devolve
+    # (resultado, etapas) para as etapas serem juntadas às métricas do processo da API.
+    profiler = Profiler()
+    with profiling(profiler):
+        value = func(*args)
+    return value, profiler.stages
+
+
+def analyze_sorted(
+    text: str, with_stats: bool = False, ngram: int = 1
+) -> tuple[list[tuple[str, int]], dict | None]:
+    # Vocabulário completo ordenado de um texto (palavras ou n-gramas) e, se pedidas, as estatísticas
+    # calculadas na mesma passagem (função de topo para poder correr no pool).
+    result = analyze_text(text, stats=with_stats, ngram=ngram)
+    return result.sorted_items(), result.stats
+
+
+def analyze_sorted_many(
+    jobs: list[tuple[str, bool, int]]
+) -> list[tuple[list[tuple[str, int]], dict | None]]:
+    # analyze_sorted para um grupo de textos pequenos (text, with_stats, ngram) numa só tarefa do pool.
+    return [analyze_sorted(text, with_stats, ngram) for text, with_stats, ngram in jobs]
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+    return _pool
+
+
+def discard_pool(pool: ProcessPoolExecutor) -> None:
+    # Descarta um pool partido (um processo terminou inesperadamente e o pool já não aceita tarefas):
+    # o próximo pedido cria outro. As análises que estavam nele falham e libertam os seus lugares.
+    global _pool
+    if _pool is pool:
+        _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def check_capacity() -> None:
+    # Responde 503 se o pool já estiver cheio com análises em curso (de outros pedidos ou que
+    # excederam o prazo e ainda correm): melhor recusar logo do que deixar a fila crescer e todos
+    # os pedidos ficarem lentos. O tamanho do próprio pedido não conta (um lote grande espera por lugares).
+    if _pending >= MAX_PENDING:
+        raise HTTPException(status_code=503, detail="servidor ocupado, tente mais tarde")
+
+
+async def acquire_slot() -> None:
+    # Espera por um lugar no pool (no máximo MAX_PENDING análises em curso).
+    # (não é um asyncio.Semaphore: MAX_PENDING pode mudar e o semáforo ficaria preso a um event loop)
+    global _pending
+    while _pending >= MAX_PENDING:
+        waiter = asyncio.get_running_loop().create_future()
+        _waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Acordada mas cancelada (prazo do pedido) antes de ocupar o lugar: passa a vez à seguinte.
+            if waiter.done() and not waiter.cancelled():
+                wake_next()
+            raise
+        finally:
+            if waiter in _waiters:
+                _waiters.remove(waiter)
+    _pending += 1
+
+
+def wake_next() -> None:
+    # Acorda a próxima análise à espera de um lugar no pool (se houver).
+    while _waiters:
+        waiter = _waiters.popleft()
+        if not waiter.done():
+            waiter.set_result(None)
+            break
+
+
+def release_slot(future: asyncio.Future | None = None) -> None:
+    # Liberta o lugar de uma análise que terminou de facto (done-callback do future do pool) e acorda
+    # a próxima à espera. Marca a exceção como lida: o pedido pode já ter levado 504.
+    global _pending
+    _pending -= 1
+    if future is not None and not future.cancelled():
+        future.exception()
+    wake_next()
+
+
+@asynccontextmanager
+async def request_deadline():
+    # Prazo de um pedido (DEADLINE_SECONDS): cobre a espera por lugares no pool e as análises. Ao expirar
+    # o que ainda está em curso é cancelado (ver run_in_pool) e o pedido leva 504.
+    try:
+        async with asyncio.timeout(DEADLINE_SECONDS):
+            yield
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="análise excedeu o tempo limite") from None
+
+
+async def run_in_pool(func, *args):
+    # Corre func(*args) no pool sem bloquear o event loop (o prazo é o do pedido, ver request_deadline).
+    # O lugar no pool só é libertado quando a análise termina (ou é cancelada antes de começar), não
+    # quando o pedido é cancelado: uma análise que levou 504 continua a contar para o limite enquanto corre.
+    await acquire_slot()
+    pool = get_pool()
+    try:
+        job = pool.submit(profiled, func, *args)
+    except BaseException as e:
+        release_slot()
+        if isinstance(e, BrokenProcessPool):
+            discard_pool(pool)
+            raise HTTPException(status_code=503, detail="processo de análise terminou, tente mais tarde") from None
+        raise
+    future = asyncio.wrap_future(job)
+    future.add_done_callback(release_slot)
+    try:
+        # (shield: cancelar o pedido não cancela o future, senão o lugar era libertado com a análise ainda a correr)
+        value, stages = await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # Ainda na fila do pool: já não começa (o done-callback liberta o lugar).
+        job.cancel()
+        raise
+    except BrokenProcessPool:
+        discard_pool(pool)
+        raise HTTPException(status_code=503, detail="processo de análise terminou, tente mais tarde") from None
+    METRICS.merge(stages)
+    return value
+
+
+def cache_key(text: str, ngram: int = 1) -> str:
+    # Chave da CACHE: o conteúdo do texto e, para n-gramas, o tamanho.
+    return text_key(text) if ngram == 1 else f"{text_key(text)}:{ngram}"
+
+
+async def sorted_items_for(
+    text: str, in_pool: bool, with_stats: bool = False, ngram: int = 1
+) -> tuple[list[tuple[str, int]], dict | None]:
+    # Vocabulário completo ordenado do texto (e estatísticas se with_stats): vem da cache se o
+    # mesmo texto já foi analisado (sem tokenizar de novo); senão conta (no pool se in_pool),
+    # ordena e guarda na cache. Se a entrada da cache ainda não tem estatísticas, só estas são calculadas.
+    # Os n-gramas de cada tamanho têm a sua própria entrada na cache.
+    key = cache_key(text, ngram)
+    entry = CACHE.get(key)
+    if entry is None:
+        if in_pool:
+            entry = await run_in_pool(analyze_sorted, text, with_stats, ngram)
+        else:
+            entry = analyze_sorted(text, with_stats, ngram)
+        CACHE.put(key, entry, items_size(entry[0]))
+    elif with_stats and entry[1] is None:
+        stats = await run_in_pool(text_stats, text) if in_pool else text_stats(text)
+        entry = (entry[0], stats)
+        CACHE.put(key, entry, items_size(entry[0]))
+    return entry
+
+
+def build_response(items: list[tuple[str, int]], n: int, stats: dict | None = None) -> dict:
+    top = items[:n]
+    return {"n": n, "report": format_top_words(top, n), "items": item_rows(top), "stats": stats}
+
+
+async def sorted_items_group(
+    texts: list[str], reqs: list[AnalyzeRequest]
+) -> list[tuple[list[tuple[str, int]], dict | None]]:
+    # Como sorted_items_for para um grupo de textos pequenos: os que não estão na cache (ou sem as
+    # estatísticas pedidas) são analisados numa só tarefa do pool e guardados na cache.
+    keys = [cache_key(text, req.ngram) for text, req in zip(texts, reqs)]
+    entries = [CACHE.get(key) for key in keys]
+    missing = [i for i, entry in enumerate(entries) if entry is None or (reqs[i].stats and entry[1] is None)]
+    if missing:
+        jobs = [(texts[i], reqs[i].stats, reqs[i].ngram) for i in missing]
+        for i, entry in zip(missing, await run_in_pool(analyze_sorted_many, jobs)):
+            entries[i] = entry
+            CACHE.put(keys[i], entry, items_size(entry[0]))
+    return entries
+
+
+async def analyze_many(reqs: list[AnalyzeRequest]) -> list[dict]:
+    # Analisa vários pedidos em paralelo: os grandes no pool, cada um numa tarefa; os pequenos no
+    # próprio processo até INLINE_MAX_CHARS no total e os restantes no pool, em grupos de até
+    # INLINE_MAX_CHARS (um lote de 1000 textos pequenos não bloqueia o event loop).
+    texts = [req.text.strip() for req in reqs]
+    for i, text in enumerate(texts):
+        if not text:
+            detail = "text vazio" if len(texts) == 1 else f"text vazio (item {i})"
+            raise HTTPException(status_code=400, detail=detail)
+
+    # Plano: ("pool", [i]) para cada texto grande, ("inline", [i]) para os pequenos analisados no
+    # próprio processo e ("group", [i, j, ...]) para cada grupo de textos pequenos enviado ao pool.
+    plan: list[tuple[str, list[int]]] = []
+    inline_budget = INLINE_MAX_CHARS
+    group: list[int] = []
+    group_chars = 0
+    for i, text in enumerate(texts):
+        if len(text) > INLINE_MAX_CHARS:
+            plan.append(("pool", [i]))
+        elif len(text) <= inline_budget:
+            inline_budget -= len(text)
+            plan.append(("inline", [i]))
+        else:
+            if group and group_chars + len(text) > INLINE_MAX_CHARS:
+                plan.append(("group", group))
+                group, group_chars = [], 0
+            group.append(i)
+            group_chars += len(text)
+    if group:
+        plan.append(("group", group))
+
+    if any(kind != "inline" for kind, _ in plan):
+        check_capacity()
+
+    async def run(kind: str, indices: list[int]):
+        if kind == "group":
+            return await sorted_items_group([texts[i] for i in indices], [reqs[i] for i in indices])
+        req = reqs[indices[0]]
+        return [await sorted_items_for(texts[indices[0]], kind == "pool", req.stats, req.ngram)]
+
+    tasks = [asyncio.ensure_future(run(kind, indices)) for kind, indices in plan]
+    try:
+        async with request_deadline():
+            done = await asyncio.gather(*tasks)
+    except BaseException:
+        # Um item falhou ou o prazo expirou: os restantes já não servem para nada (libertam os lugares).
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    results = [None] * len(reqs)
+    for (_, indices), entries in zip(plan, done):
+        for i, entry in zip(indices, entries):
+            results[i] = entry
+
+    return [
+        build_response(items, req.n, stats if req.stats else None)
+        for (items, stats), req in zip(results, reqs)
+    ]
+
+
+def upload_counter(content_type: str, stats: bool = False, ngram: int = 1) -> DecodingWordCounter:
+    # Contador para o corpo de um upload, com o encoding do parâmetro "charset" (default utf-8).
+    _, params = parse_options_header(content_type)
+    charset = params.get(b"charset", b"utf-8").decode("latin-1")
+    try:
+        if ngram > 1:
+            return DecodingNgramCounter(ngram, charset, stats=stats)
+        return DecodingWordCounter(charset, stats=stats)
+    except (LookupError, ValueError):
+        # (ValueError: nomes com caracteres nulos, ex.: charset=\x00)
+        raise HTTPException(status_code=400, detail=f"charset desconhecido: {charset}") from None
+
+
+class MultipartFileCounter:
+    """Conta as palavras da parte "file" de um corpo multipart/form-data à medida que os bytes chegam.
+
+    Usa o parser incremental do python-multipart: os dados da parte são passados ao contador
+    bloco a bloco, sem guardar o ficheiro em memória nem em disco."""
+
+    def __init__(self, boundary: bytes, stats: bool = False, ngram: int = 1) -> None:
+        self.stats = stats  # calcular também as estatísticas do texto
+        self.ngram = ngram  # contar n-gramas em vez de palavras (se > 1)
+        self.counter: DecodingWordCounter | None = None  # contador da parte "file" em curso
+        self.result: DecodingWordCounter | None = None  # contador da parte "file" já terminada
+        self._headers: dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def write(self, data: bytes) -> None:
+        self._parser.write(data)
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self.counter = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def _on_headers_finished(self) -> None:
+        # Só a parte com name="file" é contada (as outras partes são ignoradas).
+        _, disposition = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if disposition.get(b"name") == b"file" and self.result is None:
+            content_type = self._headers.get(b"content-type", b"text/plain").decode("latin-1")
+            self.counter = upload_counter(content_type, self.stats, self.ngram)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self.counter is not None:
+            self.counter.feed_bytes(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self.counter is not None:
+            self.counter.close()
+            self.result = self.counter
+            self.counter = None
+
+
+def upload_response(counter: DecodingWordCounter, n: int) -> dict:
+    # Resposta de um upload já contado (a seleção do top n percorre o vocabulário inteiro).
+    result = counter.result()
+    return {"n": n, "report": result.report(n), "items": result.rows(n), "stats": result.stats}
+
+
+def new_handle() -> str:
+    # Handle de um documento: aleatório e diferente em cada POST /documents (não deriva do texto), para
+    # não se poder adivinhar nem ler/apagar o documento de outro cliente que enviou o mesmo texto.
+    # A deduplicação por conteúdo fica interna: o vocabulário vem da CACHE (chave de conteúdo) e é
+    # partilhado pelos documentos com o mesmo texto.
+    return os.urandom(16).hex()
+
+
+def encode_cursor(handle: str, offset: int) -> str:
+    # Cursor opaco com a posição da próxima página, ligado ao handle (base64 url-safe, sem "=").
+    data = f"{handle[:16]}:{offset}".encode("ascii")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(handle: str, cursor: str) -> int:
+    # Posição guardada num cursor; 400 se o cursor for inválido ou de outro documento.
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        prefix, offset = data.rsplit(":", 1)
+        offset = int(offset)
+    except ValueError:
+        # (binascii.Error e UnicodeDecodeError são ValueError)
+        offset = -1
+        prefix = None
+    if prefix != handle[:16] or offset < 0:
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    return offset
+
+
+def ndjson_rows(items: list[tuple[str, int]], start: int):
+    # Linhas NDJSON {"rank", "word", "count"} de uma página, geradas em blocos (exporters.NdjsonWriter).
+    for rows in iter_rows(items, start):
+        buffer = io.StringIO()
+        NdjsonWriter(buffer, len(items)).write_rows(rows)
+        yield buffer.getvalue()
 
 
 @app.get("/health")
@@ -24,14 +541,129 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    return CACHE.stats()
+
+
+@app.get("/metrics")
+def metrics():
+    # Métricas em formato de texto do Prometheus.
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
-def analyze(req: AnalyzeRequest):
+async def analyze(req: AnalyzeRequest):
+    return (await analyze_many([req]))[0]
+
+
+@app.post("/analyze/batch", response_model=BatchResponse)
+async def analyze_batch(req: BatchRequest):
+    return {"results": await analyze_many(req.items)}
+
+
+@app.post("/analyze/upload", response_model=AnalyzeResponse)
+async def analyze_upload(
+    request: Request,
+    n: int = Query(10, ge=1, le=100),
+    stats: bool = False,
+    ngram: int = Query(1, ge=1, le=MAX_NGRAM),
+):
+    # Conta as palavras de um upload (corpo em texto simples ou multipart/form-data com a
+    # parte "file") à medida que os bytes chegam: a memória usada depende do vocabulário e
+    # não do tamanho do upload. Cada bloco é contado numa thread (asyncio.to_thread), para o event
+    # loop continuar a servir outros pedidos; não vai para o pool de processos porque o contador
+    # acumula as contagens de todos os blocos neste processo.
+    content_type = request.headers.get("content-type", "text/plain")
+    mime, params = parse_options_header(content_type)
+
+    try:
+        if mime == b"multipart/form-data":
+            boundary = params.get(b"boundary")
+            if not boundary:
+                raise HTTPException(status_code=400, detail="multipart sem boundary")
+
+            parser = MultipartFileCounter(boundary, stats, ngram)
+            async for chunk in request.stream():
+                await asyncio.to_thread(parser.write, chunk)
+
+            if parser.result is None:
+                raise HTTPException(status_code=400, detail='falta a parte "file" no multipart')
+            counter = parser.result
+        else:
+            counter = upload_counter(content_type, stats, ngram)
+            async for chunk in request.stream():
+                await asyncio.to_thread(counter.feed_bytes, chunk)
+            counter.close()
+
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="texto com encoding inválido") from None
+    except MultipartParseError as e:
+        # Corpo multipart mal formado (ex.: cabeçalho sem ":" ou com bytes inválidos).
+        raise HTTPException(status_code=400, detail=f"multipart inválido: {e}") from None
+
+    if not counter.has_text:
+        raise HTTPException(status_code=400, detail="text vazio")
+
+    return await asyncio.to_thread(upload_response, counter, n)
+
+
+@app.post("/documents", response_model=DocumentResponse, status_code=201)
+async def create_document(req: DocumentRequest):
+    # Analisa um texto e guarda o vocabulário completo ordenado: o handle devolvido serve para o ler
+    # por páginas (GET /documents/{handle}/words) sem voltar a enviar nem a contar o texto.
     text = req.text.strip()
     if not text:
         raise HTTPException(status_code=400, detail="text vazio")
 
-    report = top_words_format(text, req.n)
-    pairs = top_words(text, req.n)
+    in_pool = len(text) > INLINE_MAX_CHARS
+    if in_pool:
+        check_capacity()
+    async with request_deadline():
+        items, _ = await sorted_items_for(text, in_pool, ngram=req.ngram)
+
+    size = items_size(items)
+    if size > DOCUMENTS.max_bytes:
+        raise HTTPException(status_code=413, detail="vocabulário maior que o limite de memória dos documentos")
+
+    handle = new_handle()
+    DOCUMENTS.put(handle, items, size)
+    return {"handle": handle, "words": len(items)}
+
+
+@app.get("/documents/{handle}/words", response_model=WordsPage)
+def document_words(
+    handle: str,
+    cursor: str | None = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    # Uma página do vocabulário ordenado (rank, word, count), cortada da lista guardada em DOCUMENTS.
+    # next_cursor (ou o cabeçalho X-Next-Cursor em NDJSON) dá a página seguinte; None na última.
+    items = DOCUMENTS.get(handle)
+    if items is None:
+        raise HTTPException(status_code=404, detail="documento desconhecido ou expirado")
+
+    offset = decode_cursor(handle, cursor) if cursor else 0
+    if offset > len(items):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    end = min(offset + limit, len(items))
+    page = items[offset:end]
+    next_cursor = encode_cursor(handle, end) if end < len(items) else None
+
+    if format == "ndjson":
+        # Páginas grandes: as linhas são enviadas em blocos, sem construir a resposta inteira em memória.
+        headers = {"X-Total-Count": str(len(items))}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = next_cursor
+        return StreamingResponse(ndjson_rows(page, offset + 1), media_type="application/x-ndjson", headers=headers)
+
+    return {"handle": handle, "total": len(items), "items": item_rows(page, offset + 1), "next_cursor": next_cursor}
+
 
-    items = [{"rank": i, "word": w, "count": c} for i, (w, c) in enumerate(pairs, 1)]
-    return {"n": req.n, "report": report, "items": items}
\ No newline at end of file
+@app.delete("/documents/{handle}", status_code=204)
+def delete_document(handle: str):
+    # Liberta o vocabulário de um documento antes de expirar.
+    if not DOCUMENTS.discard(handle):
+        raise HTTPException(status_code=404, detail="documento desconhecido ou expirado")
+    return Response(status_code=204)
@@ -2,87 +2,86 @@
 # e adia a avaliação de tipos (útil para evitar import cycles).
 from __future__ import annotations
 
+# Cliente do daemon: com um daemon a correr (python app.py --serve), "python app.py ..." pede a análise
+# ao daemon, que já tem tudo carregado, antes de importar os módulos abaixo (ver daemon.py).
+# Sem daemon, client_main() não faz nada e o script continua normalmente.
+if __name__ == "__main__":
+    from daemon import client_main
+
+    client_main()
+
 # Biblioteca para criar programas com argumentos no terminal (CLI).
 import argparse
 
-# Biblioteca para escrever ficheiros CSV.
-import csv
-
 # Biblioteca para logs (registar info/warnings/erros).
 import logging
 
-# Biblioteca para escrever ficheiros JSON.
-import json
-
-# Path é uma forma moderna e segura de lidar com caminhos de ficheiros/pastas.
-from pathlib import Path
-
-# Importa as funções de análise de texto do teu módulo.
-from text_analysis import top_words, top_words_format
-
-# Define o caminho do ficheiro de logs.
-LOG_PATH = Path("logs") / "app.log"
-
-
-def setup_logging() -> None:
-    # Garante que a pasta "logs/" existe (cria se não existir).
-    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+# Ficheiros mapeados em memória (para ler ficheiros grandes sem os copiar de uma vez).
+import mmap
 
-    # Obtém o logger "raiz" (o logger principal do Python).
-    logger = logging.getLogger()
+# Funções do sistema operativo (tamanho de ficheiros).
+import os
 
-    # Define o nível mínimo de logs que serão registados (INFO e acima).
-    logger.setLevel(logging.INFO)
+# Saída standard (o relatório é escrito no terminal ao mesmo tempo que os ficheiros).
+import sys
 
-    # Impede que os logs sejam duplicados por propagação para loggers "pais"
-    # (ajuda em alguns ambientes onde logs aparecem repetidos).
-    logger.propagate = False
+# Contador de palavras (dicionário palavra -> contagem).
+from collections import Counter
 
-    # Se quisesses evitar duplicar handlers ao correr várias vezes,
-    # podias limpar handlers antigos (por exemplo, no VSCode).
-    # logger.handlers.clear()
+# Path é uma forma moderna e segura de lidar com caminhos de ficheiros/pastas.
+from pathlib import Path
 
-    # Define o formato (data/hora + nível + mensagem).
-    fmt = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+# Configuração de logging partilhada (assíncrona, idempotente, com rotação).
+from logging_setup import setup_logging as configure_logging
 
-    # Cria um handler para escrever logs em ficheiro.
-    file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
+# Instrumentação por etapa (--profile): tempo, bytes, tokens e pico de memória.
+from instrumentation import Profiler, profiling, stage
 
-    # Define que este handler guarda INFO e acima.
-    file_handler.setLevel(logging.INFO)
+# Writers em streaming e atómicos (txt, CSV, JSON, NDJSON, opcionalmente gzip).
+from exporters import atomic_open, write_outputs
 
-    # Aplica o formato definido às linhas do log do ficheiro.
-    file_handler.setFormatter(fmt)
+# Importa as funções de análise de texto do teu módulo.
+from text_analysis import (
+    AnalysisResult,
+    DecodingNgramCounter,
+    DecodingWordCounter,
+    WordCounter,
+    analyze_text,
+    count_bytes,
+    format_stats,
+    merge_raw,
+    split_ranges,
+)
 
-    # Cria um handler para mostrar logs na consola/terminal.
-    console_handler = logging.StreamHandler()
+# Define o caminho do ficheiro de logs.
+LOG_PATH = Path("logs") / "app.log"
 
-    # Define que este handler só mostra WARNING e acima (menos "spam").
-    console_handler.setLevel(logging.WARNING)
+# Tamanho (em bytes) de cada bloco lido no modo streaming (--stream).
+CHUNK_SIZE = 1024 * 1024
 
-    # Aplica o formato também ao handler da consola.
-    console_handler.setFormatter(fmt)
+# Tamanho (em bytes) de cada janela processada por count_file_words.
+WINDOW_SIZE = 16 * 1024 * 1024
 
-    # Adiciona o handler do ficheiro ao logger.
-    logger.addHandler(file_handler)
 
-    # Adiciona o handler da consola ao logger.
-    logger.addHandler(console_handler)
+def setup_logging(level: int | str | None = None) -> None:
+    # Configura os logs com a configuração partilhada (logging_setup): escrita numa thread
+    # à parte (fila), ficheiro com rotação e consola só com WARNING e acima.
+    # Pode ser chamada várias vezes (ex.: main() nos testes) sem duplicar handlers.
+    configure_logging(level, LOG_PATH)
 
 
 def read_text_file(file_path: str) -> str:
     # Esta função tenta ler um ficheiro com fallback de encoding:
     # tenta utf-8 e se falhar tenta latin-1.
+    # O ficheiro é lido do disco uma só vez; o fallback volta a descodificar os mesmos bytes.
     try:
         # Regista nos logs que vai tentar ler como UTF-8.
         logging.info("A ler ficheiro (utf-8): %s", file_path)
 
-        # Lê o conteúdo do ficheiro usando Path (mais simples que open()).
-        return Path(file_path).read_text(encoding="utf-8")
-
-        # Alternativa equivalente (comentada):
-        # with open(file_path, "r", encoding="utf-8") as file:
-        #     return file.read()
+        # Lê os bytes do ficheiro usando Path (mais simples que open()).
+        with stage("read") as s:
+            data = Path(file_path).read_bytes()
+            s.add(bytes=len(data))
 
     except FileNotFoundError:
         # Se o ficheiro não existir, regista o erro.
@@ -91,82 +90,255 @@ def read_text_file(file_path: str) -> str:
         # Retorna string vazia para indicar falha.
         return ""
 
-    except UnicodeDecodeError:
-        # Se falhar UTF-8, avisa nos logs e tenta latin-1.
-        logging.warning("Falhou utf-8, a tentar latin-1: %s", file_path)
+    except OSError as e:
+        # Captura outros erros de sistema ao abrir/ler (ex.: sem permissões).
+        logging.error("Erro ao abrir/ler ficheiro: %s (%s)", file_path, e)
 
-        # Alternativa equivalente (comentada):
-        # with open(file_path, "r", encoding="latin-1") as file:
-        #     return file.read()
+        # Retorna vazio para indicar falha.
+        return ""
 
+    with stage("decode") as s:
+        s.add(bytes=len(data))
         try:
-            # Tenta ler o ficheiro com encoding latin-1.
-            return Path(file_path).read_text(encoding="latin-1")
+            # Descodifica como UTF-8.
+            return data.decode("utf-8")
+
+        except UnicodeDecodeError:
+            # Se falhar UTF-8, avisa nos logs e descodifica os mesmos bytes como latin-1
+            # (latin-1 aceita qualquer byte, nunca falha).
+            logging.warning("Falhou utf-8, a tentar latin-1: %s", file_path)
+            return data.decode("latin-1")
+
+
+def count_file_words(file_path: str, window: int = WINDOW_SIZE, digest=None) -> tuple[AnalysisResult, bool] | None:
+    # Lê e conta um ficheiro sem o descodificar para str quando possível:
+    # - o ficheiro é lido uma só vez (com mmap se for maior que uma janela);
+    # - é processado em janelas de ~window bytes cortadas em espaços (memória limitada);
+    # - janelas ASCII e ficheiros latin-1 são contados diretamente em bytes, e só o
+    #   vocabulário é descodificado no fim; só janelas UTF-8 não-ASCII são descodificadas.
+    # Mesmo fallback que read_text_file (utf-8, depois latin-1). Retorna (resultado, tem_texto)
+    # ou None em caso de erro.
+    # Com digest (ex.: hashlib.sha256()), cada janela é também passada ao hash na mesma leitura
+    # (usado pelo --index, para não ler o ficheiro outra vez só para o hash).
+    logging.info("A ler ficheiro (bytes): %s", file_path)
 
-        except OSError as e:
-            # Se houver erro do sistema (permissões, path inválida, etc.)
-            logging.error("Erro ao ler ficheiro: %s (%s)", file_path, e)
+    try:
+        with open(file_path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+
+            # Ficheiros pequenos: uma leitura normal; grandes: mmap (sem copiar o ficheiro inteiro).
+            with stage("read") as s:
+                s.add(bytes=size)
+                data = file.read() if size <= window else mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            try:
+                ranges = split_ranges(data, -(-size // window))
+                hashed = 0  # bytes já passados ao digest (as janelas são contíguas)
+
+                for encoding in ("utf-8", "latin-1"):
+                    raw: Counter[bytes] = Counter()
+                    has_text = False
+
+                    for start, end in ranges:
+                        chunk = data[start:end]
+                        # Cada janela entra no hash uma só vez (na 1ª passagem em que é lida).
+                        if digest is not None and end > hashed:
+                            digest.update(chunk)
+                            hashed = end
+                        counted = count_bytes(chunk, encoding)
+
+                        # Janela não é UTF-8 válido: o ficheiro inteiro passa a latin-1.
+                        if counted is None:
+                            logging.warning("Falhou utf-8, a tentar latin-1: %s", file_path)
+                            break
+
+                        raw.update(counted[0])
+                        has_text = has_text or counted[1]
+                    else:
+                        # Todas as janelas contadas: normaliza o vocabulário (uma vez por palavra distinta).
+                        return AnalysisResult(merge_raw(raw, encoding)), has_text
+
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+    except FileNotFoundError:
+        # Se o ficheiro não existir, regista o erro.
+        logging.error("Ficheiro não encontrado: %s", file_path)
+        return None
 
-            # Retorna vazio para indicar falha.
-            return ""
-    
     except OSError as e:
         # Captura outros erros de sistema ao abrir/ler (ex.: sem permissões).
         logging.error("Erro ao abrir/ler ficheiro: %s (%s)", file_path, e)
+        return None
+
+    return None
+
+
+def make_counter(
+    encoding: str = "utf-8", stats: bool = False, ngram: int = 1, capacity: int | None = None, fallback: str | None = None
+) -> DecodingWordCounter:
+    # Contador que recebe bytes e os descodifica de forma incremental (não parte caracteres UTF-8 entre blocos):
+    # aproximado com capacity, de n-gramas com ngram > 1, senão de palavras.
+    # Com fallback, passa a esse encoding no primeiro byte inválido em vez de dar UnicodeDecodeError.
+    if capacity is not None:
+        # (import aqui para não carregar o módulo nas execuções que não o usam)
+        from sketch import DecodingApproxCounter
+
+        return DecodingApproxCounter(capacity, encoding, stats=stats, fallback=fallback)
+    if ngram > 1:
+        return DecodingNgramCounter(ngram, encoding, stats=stats, fallback=fallback)
+    return DecodingWordCounter(encoding, stats=stats, fallback=fallback)
+
+
+def count_text_file(
+    file_path: str, chunk_size: int = CHUNK_SIZE, stats: bool = False, ngram: int = 1, capacity: int | None = None
+) -> WordCounter | None:
+    # Versão streaming de read_text_file: lê o ficheiro em blocos de chunk_size bytes
+    # e conta as palavras à medida que lê, sem nunca ter o texto inteiro em memória.
+    # Com stats=True calcula também as estatísticas do texto nos mesmos blocos.
+    # Com ngram > 1 conta sequências de ngram palavras (ex.: 2 = bigramas) em vez de palavras.
+    # Com capacity conta de forma aproximada, guardando no máximo capacity palavras (ver sketch.py).
+    # Mantém o mesmo fallback de encoding: tenta utf-8 e, se falhar, recomeça em latin-1.
+    # Retorna None em caso de erro (equivalente ao "" de read_text_file).
+    for encoding in ("utf-8", "latin-1"):
+        # Regista nos logs qual o encoding a usar.
+        logging.info("A ler ficheiro em streaming (%s): %s", encoding, file_path)
+
+        # Contador novo a cada tentativa (se o utf-8 falhar a meio, descarta o que já contou).
+        counter = make_counter(encoding, stats, ngram, capacity)
 
-        # Retorna vazio para indicar falha.
-        return ""
+        try:
+            with open(file_path, "rb") as file:
+                # Lê bloco a bloco até ao fim do ficheiro.
+                while True:
+                    with stage("read") as s:
+                        chunk = file.read(chunk_size)
+                        s.add(bytes=len(chunk))
+                    if not chunk:
+                        break
+                    counter.feed_bytes(chunk)
+
+            # Descodifica o que sobrou e conta a última palavra
+            # (dá erro se o ficheiro acabar a meio de um caractere).
+            counter.close()
+
+        except FileNotFoundError:
+            # Se o ficheiro não existir, regista o erro.
+            logging.error("Ficheiro não encontrado: %s", file_path)
+            return None
+
+        except UnicodeDecodeError:
+            # Se falhar UTF-8, avisa nos logs e tenta latin-1 (latin-1 nunca falha).
+            logging.warning("Falhou utf-8, a tentar latin-1: %s", file_path)
+            continue
+
+        except OSError as e:
+            # Captura outros erros de sistema ao abrir/ler (ex.: sem permissões).
+            logging.error("Erro ao abrir/ler ficheiro: %s (%s)", file_path, e)
+            return None
+
+        return counter
+
+    return None
+
+
+def count_stdin(
+    chunk_size: int = CHUNK_SIZE, stats: bool = False, ngram: int = 1, capacity: int | None = None
+) -> WordCounter:
+    # Como count_text_file, mas lê o stdin (--input -) em blocos até ao fim (ex.: num pipeline de shell).
+    # O stdin não pode ser relido: se o utf-8 falhar a meio, o resto é descodificado como latin-1.
+    logging.info("A ler stdin em streaming (utf-8)")
+    counter = make_counter("utf-8", stats, ngram, capacity, fallback="latin-1")
+    source = sys.stdin.buffer
+
+    # Lê bloco a bloco até ao fim da entrada.
+    while True:
+        with stage("read") as s:
+            chunk = source.read(chunk_size)
+            s.add(bytes=len(chunk))
+        if not chunk:
+            break
+        counter.feed_bytes(chunk)
+    counter.close()
+
+    if counter.encoding != "utf-8":
+        logging.warning("Falhou utf-8, o resto do stdin foi lido como latin-1")
+    return counter
+
+
+# Mensagem de log de cada formato guardado.
+SAVED_MESSAGES = {
+    "txt": "Relatório guardado em: %s",
+    "csv": "CSV guardado em: %s",
+    "json": "JSON guardado em: %s",
+    "jsonl": "NDJSON guardado em: %s",
+}
+
+
+def save_report(report: str, path: Path, compress: bool = False) -> None:
+    # Escreve o report num ficheiro temporário e só no fim o põe no lugar do destino
+    # (se falhar a meio, o destino não fica truncado). Cria a pasta destino se não existir.
+    with stage("write_txt") as s, atomic_open(path, compress) as f:
+        s.add(bytes=f.write(report))
 
+    # Regista onde o report foi guardado.
+    logging.info(SAVED_MESSAGES["txt"], path)
 
-def save_report(report: str, path: Path) -> None:
-    # Garante que a pasta destino existe.
-    path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Escreve o report no ficheiro (sobrescreve se já existir).
-    path.write_text(report, encoding="utf-8")
+def save_outputs(
+    items: list[tuple[str, int]],
+    paths: dict[str, Path],
+    n: int,
+    compress: bool = False,
+    extras: dict | None = None,
+    echo: bool = False,
+    errors: bool = False,
+) -> dict[str, Path]:
+    # Guarda os items em todos os formatos pedidos ("txt", "csv", "json", "jsonl" -> caminho)
+    # numa só passagem, cada ficheiro de forma atómica (ver exporters.py).
+    # Com echo=True o relatório de texto é também escrito no terminal na mesma passagem.
+    # Com errors=True os items são (palavra, contagem, erro) (modo --approx).
+    streams = {"txt": sys.stdout} if echo else None
+    written = write_outputs(items, paths, n, compress, extras, streams, errors)
 
-    # Regista onde o report foi guardado.
-    logging.info("Relatório guardado em: %s", path)
+    # Regista onde cada ficheiro foi guardado.
+    for fmt, path in written.items():
+        logging.info(SAVED_MESSAGES[fmt], path)
+
+    return written
 
 
 def save_csv(items: list[tuple[str, int]], path: Path) -> None:
-    # Garante que a pasta destino existe.
-    path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Abre o ficheiro CSV para escrita.
-    with path.open("w", newline="", encoding="utf-8") as f:
-        # Cria o writer CSV.
-        writer = csv.writer(f)
-
-        # Escreve a primeira linha (cabeçalho).
-        writer.writerow(["rank", "word", "count"])
-
-        # Enumera os items (rank começa em 1).
-        for i, (word, count) in enumerate(items, 1):
-            # Escreve cada linha do CSV.
-            writer.writerow([i, word, count])
-            
-    # Regista onde o CSV foi guardado.
-    logging.info("CSV guardado em: %s", path)
-    
+    # CSV com cabeçalho rank,word,count (escrito em streaming e de forma atómica).
+    save_outputs(items, {"csv": path}, len(items))
+
 
-def save_json(items: list[tuple[str, int]], path: Path) -> None:
-    # Garante que a pasta destino existe.
-    path.parent.mkdir(parents=True, exist_ok=True)
+def save_json(
+    items: list[tuple[str, int]], path: Path, stats: dict | None = None, profile: dict | None = None
+) -> None:
+    # JSON com a lista de {rank, word, count} (indentado, com acentos).
+    # Com estatísticas (--stats) ou perfil (--profile), o JSON passa a ser um objeto com as várias partes.
+    save_outputs(items, {"json": path}, len(items), extras=json_extras(stats, profile))
 
-    # Converte a lista de tuplas em lista de dicionários (mais "JSON-friendly").
-    data = [
-        {"rank": i, "word": word, "count": count}
-        for i, (word, count) in enumerate(items, 1)
-    ]
 
-    # Abre o ficheiro JSON para escrita.
-    with path.open("w", encoding="utf-8") as f:
-        # Escreve JSON, mantendo acentos e formatando com indentação.
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def save_jsonl(items: list[tuple[str, int]], path: Path) -> None:
+    # NDJSON: um objeto {rank, word, count} por linha.
+    save_outputs(items, {"jsonl": path}, len(items))
 
-    # Regista onde o JSON foi guardado.
-    logging.info("JSON guardado em: %s", path)
+
+def json_extras(stats: dict | None = None, profile: dict | None = None, approx: dict | None = None) -> dict | None:
+    # Secções extra do JSON (só as que existem; None se nenhuma).
+    sections = (("stats", stats), ("approx", approx), ("profile", profile))
+    extras = {key: value for key, value in sections if value is not None}
+    return extras or None
+
+
+def parse_top_n(value: str) -> int | None:
+    # Valor de --n: um número ou "all" (vocabulário completo, representado por None).
+    if value.strip().lower() == "all":
+        return None
+    return int(value)
 
 
 # Função para "parsear" argumentos. Recebe argv opcional para facilitar testes.
@@ -179,17 +351,140 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     # Cria um grupo onde só podes escolher UMA das opções (--input OU --text).
     group = parser.add_mutually_exclusive_group(required=True)
 
-    # Argumento para ler texto de um ficheiro.
-    group.add_argument("--input", help="Caminho para ficheiro de texto")
+    # Argumento para ler texto de um ficheiro ("-" = stdin, ex.: num pipeline de shell).
+    group.add_argument("--input", help='Caminho para ficheiro de texto ("-" para ler do stdin)')
 
     # Argumento para passar texto diretamente.
     group.add_argument("--text", help="Texto direto a analisar (entre aspas)")
 
-    # Argumento opcional para escolher top N palavras.
-    parser.add_argument("--n", type=int, default=10, help="Top N palavras (default: 10)")
+    # Modo batch: analisa todos os .txt de uma pasta (recursivo).
+    group.add_argument("--input-dir", help="Pasta com ficheiros .txt a analisar (modo batch)")
+
+    # Modo batch: analisa todos os ficheiros que correspondem a um padrão glob.
+    group.add_argument("--glob", help='Padrão glob de ficheiros a analisar, ex.: "dados/**/*.log" (modo batch)')
+
+    # Flag opcional para ler o --input em blocos (memória limitada ao vocabulário).
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Ler o --input em blocos, sem carregar o ficheiro inteiro em memória",
+    )
+
+    # Tamanho dos blocos do modo streaming.
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CHUNK_SIZE,
+        help=f"Tamanho de cada bloco em bytes no modo --stream (default: {CHUNK_SIZE})",
+    )
+
+    # Número de processos para contar um --input grande em paralelo.
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de processos para contar o --input em paralelo (default: 1)",
+    )
+
+    # Índice persistente para o modo batch (só reconta ficheiros novos/alterados).
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        const=str(Path("output") / "index.sqlite"),
+        help="Usar um índice persistente no modo batch (default se sem valor: output/index.sqlite)",
+    )
+
+    # Estatísticas do texto (caracteres, palavras, linhas, vogais), calculadas na mesma passagem.
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Mostrar também estatísticas do texto (caracteres, palavras, linhas e vogais)",
+    )
+
+    # N-gramas: contar sequências de K palavras seguidas (frases) em vez de palavras soltas.
+    parser.add_argument(
+        "--ngram",
+        type=int,
+        default=1,
+        help="Contar sequências de K palavras (2 = bigramas, 3 = trigramas) em vez de palavras (default: 1)",
+    )
+
+    # Modo aproximado: memória fixa (sketch Space-Saving), com o erro máximo de cada contagem.
+    parser.add_argument(
+        "--approx",
+        action="store_true",
+        help="Contar de forma aproximada com memória fixa (top N com o erro máximo de cada contagem)",
+    )
+
+    # Nº máximo de palavras guardadas no modo aproximado.
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=10000,
+        help="Nº máximo de palavras guardadas com --approx (default: 10000)",
+    )
+
+    # Modo follow: acompanha o --input à medida que cresce (como tail -F) e mostra o top N periodicamente.
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Acompanhar o --input à medida que cresce (segue rotações/truncagens); Ctrl+C para terminar",
+    )
+
+    # Intervalo entre atualizações do top N no modo follow.
+    parser.add_argument(
+        "--interval", default="5s", help="Intervalo entre atualizações com --follow, ex.: 10s, 1m (default: 5s)"
+    )
+
+    # Janela de tempo do modo follow (só contam as palavras recentes).
+    parser.add_argument(
+        "--window", help="Com --follow, contar só as palavras dos últimos X, ex.: 5m, 1h (default: tudo)"
+    )
+
+    # No modo follow, contar também o conteúdo que o ficheiro já tem.
+    parser.add_argument(
+        "--from-start",
+        action="store_true",
+        help="Com --follow, contar também o conteúdo já existente (default: só o que for acrescentado)",
+    )
+
+    # Modo NDJSON: cada linha do --input é um documento {"id", "text"}, com um top N por documento.
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help='Cada linha do --input é um documento JSON {"id", "text"}: escreve o top N de cada um no stdout (NDJSON)',
+    )
+
+    # Nº de documentos de cada lote do modo NDJSON (cada lote vai para um worker).
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Nº de documentos de cada lote com --ndjson (default: 1000)",
+    )
+
+    # Instrumentação: tempo, bytes e tokens de cada etapa (ler, descodificar, normalizar, ...).
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mostrar o tempo, bytes e tokens de cada etapa (também nos logs e no JSON)",
+    )
+
+    # Instrumentação com pico de memória por etapa (tracemalloc; torna a execução mais lenta).
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Como --profile, mas mede também o pico de memória de cada etapa (mais lento)",
+    )
+
+    # Nível mínimo dos logs no ficheiro (default: variável LOG_LEVEL ou INFO).
+    parser.add_argument("--log-level", help="Nível dos logs: DEBUG, INFO, WARNING, ERROR (default: LOG_LEVEL ou INFO)")
+
+    # Argumento opcional para escolher top N palavras ("all" = vocabulário completo).
+    parser.add_argument("--n", type=parse_top_n, default=10, help='Top N palavras, ou "all" para todas (default: 10)')
 
     # Argumento opcional para indicar onde guardar o report .txt.
-    parser.add_argument("--out", help="Caminho do report .txt a guardar")
+    parser.add_argument("--out", help="Caminho do report .txt a guardar (no modo batch: pasta dos outputs)")
 
     # Flag opcional para também guardar CSV.
     parser.add_argument("--csv", action="store_true", help="Guardar também CSV")
@@ -197,10 +492,46 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     # Flag opcional para também guardar JSON.
     parser.add_argument("--json", action="store_true", help="Guardar também JSON")
 
+    # Flag opcional para também guardar NDJSON (um objeto por linha).
+    parser.add_argument("--jsonl", action="store_true", help="Guardar também NDJSON (.jsonl, um objeto por linha)")
+
+    # Flag opcional para comprimir os ficheiros guardados.
+    parser.add_argument("--gzip", action="store_true", help="Comprimir os ficheiros guardados com gzip (.gz)")
+
+    # Ficheiro binário com o vocabulário completo e as contagens (para juntar depois com "merge").
+    parser.add_argument("--counts", help="Guardar também o vocabulário completo num ficheiro de contagens (.wcnt)")
+
     # Faz parsing com argv (se None usa sys.argv automaticamente).
     return parser.parse_args(argv)
 
 
+# Argumentos do subcomando "merge" (python app.py merge a.wcnt b.wcnt ... [opções]).
+def parse_merge_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="app.py merge",
+        description="Junta ficheiros de contagens (.wcnt) num top N combinado e/ou num novo ficheiro de contagens.",
+    )
+
+    # Ficheiros de contagens a juntar (gravados com --counts).
+    parser.add_argument("files", nargs="+", help="Ficheiros de contagens (.wcnt) a juntar")
+
+    # Top N palavras do resultado combinado ("all" = vocabulário completo).
+    parser.add_argument("--n", type=parse_top_n, default=10, help='Top N palavras, ou "all" para todas (default: 10)')
+
+    # Novo ficheiro de contagens com o vocabulário combinado.
+    parser.add_argument("--counts", help="Guardar o vocabulário combinado num novo ficheiro de contagens (.wcnt)")
+
+    # Os mesmos outputs do modo normal.
+    parser.add_argument("--out", help="Caminho do report .txt a guardar")
+    parser.add_argument("--csv", action="store_true", help="Guardar também CSV")
+    parser.add_argument("--json", action="store_true", help="Guardar também JSON")
+    parser.add_argument("--jsonl", action="store_true", help="Guardar também NDJSON (.jsonl, um objeto por linha)")
+    parser.add_argument("--gzip", action="store_true", help="Comprimir os ficheiros guardados com gzip (.gz)")
+    parser.add_argument("--log-level", help="Nível dos logs: DEBUG, INFO, WARNING, ERROR (default: LOG_LEVEL ou INFO)")
+
+    return parser.parse_args(argv)
+
+
 def ensure_txt_path(out_path: Path) -> Path:
     # Se não houver sufixo, pode ser diretório ou nome sem extensão.
     if out_path.suffix == "":
@@ -215,38 +546,64 @@ def ensure_txt_path(out_path: Path) -> Path:
     return out_path
 
 
-def main(argv: list[str] | None = None) -> int:
-    # Configura logging logo no início.
-    setup_logging()
-
-    # Lê argumentos.
-    args = parse_args(argv)
-    
-    # Validação simples: n tem de ser maior que 0.
-    if args.n <= 0:
-        print("--n deve ser maior que 0")
-        return 1
+def analyze_args(args: argparse.Namespace) -> AnalysisResult | None:
+    # Lê e conta o texto pedido nos argumentos, no modo indicado.
+    # Retorna None se não houver texto (vazio ou erro de leitura).
+    if args.input and args.workers > 1:
+        # modo paralelo: divide o ficheiro em intervalos e conta em vários processos
+        # (import aqui para não carregar multiprocessing quando não é preciso)
+        from parallel import count_file_parallel
+
+        counted = count_file_parallel(args.input, args.workers)
+        if counted is None or not counted[1]:
+            return None
+        return counted[0]
+
+    # capacidade do sketch no modo aproximado (None = contagem exata)
+    capacity = args.capacity if args.approx else None
+
+    if args.input == "-":
+        # stdin: lido sempre em streaming, bloco a bloco até ao fim
+        counter = count_stdin(args.chunk_size, args.stats, args.ngram, capacity)
+        if not counter.has_text:
+            return None
+        return counter.result()
+
+    if args.stream or (args.input and (args.stats or args.ngram > 1 or args.approx)):
+        # modo streaming: lê e conta o ficheiro bloco a bloco
+        # (também usado para --stats, --ngram e --approx, que precisam do texto descodificado e não só dos bytes)
+        counter = count_text_file(args.input, args.chunk_size, args.stats, args.ngram, capacity)
+        if counter is None or not counter.has_text:
+            return None
+        return counter.result()
 
-    # 1) obter texto: ou do ficheiro, ou do argumento --text
     if args.input:
-        text = read_text_file(args.input)
-    else:
-        text = args.text or ""
+        # ficheiro: lê uma vez e conta em bytes sempre que possível
+        counted = count_file_words(args.input)
+        if counted is None or not counted[1]:
+            return None
+        return counted[0]
+
+    # obter texto do argumento --text
+    text = args.text or ""
 
-    # Se o texto estiver vazio, não faz sentido continuar.
     if not text.strip():
-        print("Nenhum texto fornecido (ou ficheiro vazio/erro).")
-        return 1
+        return None
 
-    # 2) analisar: gera report em string e items em lista de tuplas
-    report = top_words_format(text, args.n)
-    items = top_words(text, args.n)
+    # modo aproximado: memória fixa, com o erro de cada contagem
+    if args.approx:
+        from sketch import analyze_approx
 
-    # 3) imprime sempre no terminal
-    print(report)
+        return analyze_approx(text, args.capacity, stats=args.stats)
 
-    # 4) guardar se pedido (txt sempre que pedes out/csv/json)
-    if args.out or args.csv or args.json:
+    # analisar: conta as palavras uma só vez (e as estatísticas, se pedidas)
+    return analyze_text(text, stats=args.stats, ngram=args.ngram)
+
+
+def output_paths(args: argparse.Namespace) -> dict[str, Path]:
+    # Ficheiros a guardar (txt sempre que pedes out/csv/json/jsonl): formato -> caminho.
+    paths = {}
+    if args.out or args.csv or args.json or args.jsonl:
         # caminho default se não for dado --out
         default_out = Path("output") / "report.txt"
 
@@ -256,18 +613,268 @@ def main(argv: list[str] | None = None) -> int:
         # normaliza para garantir que termina em .txt quando necessário
         out_path = ensure_txt_path(out_path)
 
-        # guarda o report txt
-        save_report(report, out_path)
-
-        # se pediste CSV, guarda CSV com o mesmo nome mas .csv
+        # report txt e, se pedidos, CSV/JSON/NDJSON com o mesmo nome
+        paths["txt"] = out_path
         if args.csv:
-            csv_path = out_path.with_suffix(".csv")
-            save_csv(items, csv_path)
-            
-        # se pediste JSON, guarda JSON com o mesmo nome mas .json
+            paths["csv"] = out_path.with_suffix(".csv")
         if args.json:
-            json_path = out_path.with_suffix(".json")
-            save_json(items, json_path)
+            paths["json"] = out_path.with_suffix(".json")
+        if args.jsonl:
+            paths["jsonl"] = out_path.with_suffix(".jsonl")
+    return paths
+
+
+def save_counts(counts: dict[str, int], path: Path) -> None:
+    # Grava o vocabulário completo num ficheiro de contagens (ver countfile.py).
+    # (import aqui para não carregar o módulo nas execuções que não o usam)
+    from countfile import write_counts
+
+    n = write_counts(counts, path)
+    logging.info("Contagens guardadas em: %s (%d palavras)", path, n)
+
+
+def merge_main(argv: list[str]) -> int:
+    # Subcomando "merge": junta ficheiros de contagens sem voltar a analisar os textos.
+    args = parse_merge_args(argv)
+
+    # Configura logging (o nível pode vir de --log-level).
+    try:
+        setup_logging(args.log_level)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    # Validação simples: n tem de ser maior que 0 (ou "all").
+    if args.n is not None and args.n <= 0:
+        print("--n deve ser maior que 0")
+        return 1
+
+    # (import aqui para não carregar o módulo nas execuções que não o usam)
+    from countfile import merge_files
+
+    # Merge k-way em streaming: as palavras chegam por ordem, já somadas, e passam numa só
+    # passagem pelo novo ficheiro de contagens (se pedido) e pela seleção do top N.
+    try:
+        items, total = merge_files(args.files, args.n, Path(args.counts) if args.counts else None)
+    except (OSError, ValueError) as e:
+        logging.error("Erro no merge: %s", e)
+        print(f"Erro: {e}")
+        return 1
+
+    if args.counts:
+        logging.info("Contagens guardadas em: %s (%d palavras)", args.counts, total)
+    logging.info("Merge de %d ficheiros: %d palavras distintas", len(args.files), total)
+
+    # imprime o top N combinado e guarda os ficheiros pedidos (como no modo normal)
+    title_n = args.n if args.n is not None else len(items)
+    save_outputs(items, output_paths(args), title_n, args.gzip, echo=True)
+    print()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    # Subcomando "merge" (python app.py merge ...): tem argumentos próprios.
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "merge":
+        return merge_main(argv[1:])
+
+    # Modo daemon (python app.py --serve [--socket PATH]): executa as análises pedidas por outros app.py.
+    if argv and argv[0] == "--serve":
+        from daemon import serve_main
+
+        return serve_main(argv[1:])
+
+    # Lê argumentos.
+    args = parse_args(argv)
+
+    # Configura logging logo a seguir (o nível pode vir de --log-level).
+    try:
+        setup_logging(args.log_level)
+    except ValueError as e:
+        print(e)
+        return 1
+    
+    # Validação simples: n tem de ser maior que 0 (ou "all").
+    if args.n is not None and args.n <= 0:
+        print("--n deve ser maior que 0")
+        return 1
+
+    # O modo streaming só faz sentido com ficheiros.
+    if args.stream and not args.input:
+        print("--stream só pode ser usado com --input")
+        return 1
+
+    # Os blocos têm de ter pelo menos 1 byte.
+    if args.chunk_size <= 0:
+        print("--chunk-size deve ser maior que 0")
+        return 1
+
+    # Os workers têm de ser pelo menos 1.
+    if args.workers <= 0:
+        print("--workers deve ser maior que 0")
+        return 1
+
+    # Os n-gramas têm pelo menos 1 palavra.
+    if args.ngram <= 0:
+        print("--ngram deve ser maior que 0")
+        return 1
+
+    # Os n-gramas precisam das palavras pela ordem do texto, lidas num só processo.
+    if args.ngram > 1 and (args.workers > 1 and not args.ndjson or args.input_dir or args.glob):
+        print("--ngram não pode ser usado com --workers, --input-dir ou --glob")
+        return 1
+
+    # O sketch tem de guardar pelo menos uma palavra.
+    if args.capacity <= 0:
+        print("--capacity deve ser maior que 0")
+        return 1
+
+    # O modo aproximado conta palavras num só processo, e o ficheiro de contagens tem de ser exato.
+    if args.approx and (args.ngram > 1 or args.workers > 1 or args.input_dir or args.glob or args.counts):
+        print("--approx não pode ser usado com --ngram, --workers, --input-dir, --glob ou --counts")
+        return 1
+
+    # O modo follow acompanha um só ficheiro, com a contagem normal de palavras.
+    if args.follow:
+        if not args.input or args.input_dir or args.glob:
+            print("--follow só pode ser usado com --input")
+            return 1
+        if args.workers > 1 or args.stats or args.ngram > 1 or args.approx or args.counts:
+            print("--follow não pode ser usado com --workers, --stats, --ngram, --approx ou --counts")
+            return 1
+
+    # --interval/--window são durações (ex.: 30s, 5m) maiores que 0.
+    if args.follow or args.window:
+        from follow import parse_duration
+
+        try:
+            durations = [parse_duration(args.interval)] + ([parse_duration(args.window)] if args.window else [])
+        except ValueError as e:
+            print(e)
+            return 1
+        if min(durations) <= 0:
+            print("--interval e --window devem ser maiores que 0")
+            return 1
+        if args.window and not args.follow:
+            print("--window só pode ser usado com --follow")
+            return 1
+
+    # O stdin só pode ser lido uma vez, do início ao fim, num só processo.
+    if args.input == "-" and (args.workers > 1 and not args.ndjson or args.follow):
+        print("--input - não pode ser usado com --workers ou --follow")
+        return 1
+
+    # O modo NDJSON escreve um resultado por documento no stdout (em vez do relatório e dos ficheiros).
+    if args.ndjson:
+        if not args.input or args.input_dir or args.glob:
+            print("--ndjson só pode ser usado com --input")
+            return 1
+        if (
+            args.out or args.csv or args.json or args.jsonl or args.gzip or args.counts
+            or args.approx or args.stream or args.follow or args.profile or args.profile_memory
+        ):
+            print(
+                "--ndjson não pode ser usado com --out, --csv, --json, --jsonl, --gzip, --counts, "
+                "--approx, --stream, --follow ou --profile"
+            )
+            return 1
+        if args.batch_size <= 0:
+            print("--batch-size deve ser maior que 0")
+            return 1
+
+    # As estatísticas são calculadas sobre o texto descodificado, num só processo.
+    if args.stats and args.workers > 1 and not args.ndjson:
+        print("--stats não pode ser usado com --workers")
+        return 1
+
+    # As estatísticas são de um só texto (não existem no modo batch).
+    if args.stats and (args.input_dir or args.glob):
+        print("--stats não pode ser usado com --input-dir ou --glob")
+        return 1
+
+    # O índice só existe no modo batch.
+    if args.index and not (args.input_dir or args.glob):
+        print("--index só pode ser usado com --input-dir ou --glob")
+        return 1
+
+    # Instrumentação por etapa, só se pedida (desligada, as etapas não medem nada).
+    profiler = Profiler(memory=args.profile_memory) if args.profile or args.profile_memory else None
+
+    with profiling(profiler):
+        code = run(args, profiler)
+
+    # perfil por etapa: no terminal e nos logs (um registo por etapa)
+    if profiler is not None:
+        print(profiler.report())
+        profiler.log()
+
+    return code
+
+
+def run(args: argparse.Namespace, profiler: Profiler | None = None) -> int:
+    # Executa a análise pedida (argumentos já validados por main).
+    # Modo batch: muitos ficheiros numa só execução
+    # (import aqui para não carregar o módulo batch nas execuções normais)
+    if args.input_dir or args.glob:
+        from batch import batch_main
+
+        return batch_main(args)
+
+    # Modo NDJSON: um top N por documento, escrito no stdout
+    if args.ndjson:
+        from pipeline import pipeline_main
+
+        return pipeline_main(args)
+
+    # Modo follow: acompanha o ficheiro até Ctrl+C
+    if args.follow:
+        from follow import follow_main
+
+        return follow_main(args)
+
+    # 1+2) obter e analisar o texto (o modo depende das opções)
+    result = analyze_args(args)
+
+    # Se o texto estiver vazio (ou deu erro), não faz sentido continuar.
+    if result is None:
+        print("Nenhum texto fornecido (ou ficheiro vazio/erro).")
+        return 1
+
+    # items em lista de tuplas (com --n all: o vocabulário completo, já ordenado)
+    # no modo aproximado cada item tem também o erro máximo da contagem
+    errors = result.errors is not None
+    items = result.top_with_errors(args.n) if errors else result.top(args.n)
+
+    # n do título do relatório (com --n all: o número de palavras)
+    title_n = args.n if args.n is not None else len(items)
+
+    # 3) ficheiros a guardar (txt sempre que pedes out/csv/json/jsonl)
+    paths = output_paths(args)
+
+    # 4) imprime sempre no terminal e guarda os ficheiros pedidos, tudo numa só passagem pelos items
+    # (o perfil guardado no JSON inclui as etapas até aqui, não a escrita dos próprios ficheiros)
+    extras = json_extras(result.stats, profiler.as_dict() if profiler is not None else None, result.approx)
+    save_outputs(items, paths, title_n, args.gzip, extras, echo=True, errors=errors)
+
+    # vocabulário completo no ficheiro de contagens, se pedido
+    if args.counts:
+        save_counts(result.counts, Path(args.counts))
+
+    # linha em branco depois do relatório (como o print() do relatório)
+    print()
+
+    # limites do modo aproximado (qualquer palavra fora do top apareceu no máximo max_error vezes)
+    if result.approx is not None:
+        approx = result.approx
+        print(
+            f"Contagens aproximadas (capacidade {approx['capacity']}, {approx['total']} palavras): "
+            f"erro máximo {approx['max_error']}\n"
+        )
+
+    # estatísticas do texto, se pedidas
+    if result.stats is not None:
+        print(format_stats(result.stats))
 
     # retorna 0 = sucesso
     return 0
@@ -0,0 +1,235 @@
+"""Modo batch do app.py: analisa muitos ficheiros numa só execução (--input-dir / --glob).
+
+Cada ficheiro é lido e contado uma vez (em vários processos se --workers > 1) e gera o seu
+próprio report/CSV/JSON/NDJSON (numa só passagem, com app.save_outputs). As contagens de todos os ficheiros
+são somadas num top N agregado do corpus inteiro. Com --index, só os ficheiros novos ou
+alterados desde a última execução são recontados (ver corpus_index.py).
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from pathlib import Path
+
+from app import count_file_words, save_counts, save_outputs
+from text_analysis import AnalysisResult
+
+# Nome base dos ficheiros com o resultado agregado (_aggregate.txt/.csv/.json). O "_" torna improvável
+# um ficheiro do corpus com os outputs no mesmo lugar; se acontecer, batch_main recusa (ver aggregate_clash).
+AGGREGATE_NAME = "_aggregate"
+
+
+def collect_files(input_dir: str | None = None, pattern: str | None = None) -> list[Path]:
+    # Lista os ficheiros a analisar: todos os .txt de uma pasta (recursivo) ou os que
+    # correspondem a um padrão glob (ex.: "dados/**/*.log"). Ordenados para resultados estáveis.
+    if input_dir is not None:
+        paths = Path(input_dir).rglob("*.txt")
+    else:
+        paths = (Path(p) for p in glob.glob(pattern or "", recursive=True))
+
+    return sorted(p for p in paths if p.is_file())
+
+
+def output_base(path: Path, root: Path, out_dir: Path) -> Path:
+    # Caminho (sem extensão) dos outputs de um ficheiro: replica a estrutura de pastas
+    # relativa à raiz comum, para ficheiros com o mesmo nome em pastas diferentes não colidirem.
+    return out_dir / path.relative_to(root).with_suffix("")
+
+
+def output_formats(write_csv: bool = False, write_json: bool = False, write_jsonl: bool = False) -> tuple[str, ...]:
+    # Formatos a guardar para cada ficheiro (o report .txt é sempre guardado).
+    flags = (("csv", write_csv), ("json", write_json), ("jsonl", write_jsonl))
+    return ("txt",) + tuple(fmt for fmt, wanted in flags if wanted)
+
+
+def analyze_file(
+    path: Path,
+    out_base: Path,
+    n: int | None,
+    formats: tuple[str, ...],
+    compress: bool = False,
+    hash_content: bool = False,
+) -> tuple[Path, Counter[str] | None, str | None]:
+    # Lê, conta e guarda os outputs de um ficheiro (corre dentro de um worker).
+    # Retorna as contagens para o agregado (None se o ficheiro estiver vazio/com erro) e, com
+    # hash_content, o SHA-256 do conteúdo calculado na mesma leitura (para o --index).
+    digest = hashlib.sha256() if hash_content else None
+    counted = count_file_words(str(path), digest=digest)
+    sha256 = digest.hexdigest() if digest is not None and counted is not None else None
+    if counted is None or not counted[1]:
+        logging.warning("Ficheiro vazio ou com erro, ignorado: %s", path)
+        return path, None, sha256
+
+    result = counted[0]
+    save_result(result, out_base, n, formats, compress)
+    return path, result.counts, sha256
+
+
+def save_result(
+    result: AnalysisResult, out_base: Path, n: int | None, formats: tuple[str, ...], compress: bool = False
+) -> None:
+    # Guarda o top n nos formatos pedidos, com o mesmo nome base, numa só passagem pelos items.
+    items = result.top(n)
+    paths = {fmt: out_base.with_suffix(f".{fmt}") for fmt in formats}
+    save_outputs(items, paths, n if n is not None else len(items), compress)
+
+
+def iter_file_counts(jobs: list[tuple], workers: int = 1):
+    # Corre analyze_file para cada job e devolve (caminho, contagens, sha256) pela ordem dos jobs.
+    if workers > 1 and len(jobs) > 1:
+        # Vários processos: cada um lê, conta e escreve os seus ficheiros; só as contagens voltam.
+        # (import aqui para não carregar multiprocessing quando não é preciso)
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(analyze_file, *job) for job in jobs]
+            for future in futures:
+                yield future.result()
+    else:
+        for job in jobs:
+            yield analyze_file(*job)
+
+
+def make_jobs(
+    files: list[Path], out_dir: Path, n: int | None, formats: tuple[str, ...], compress: bool = False
+) -> list[tuple]:
+    # Argumentos de analyze_file para cada ficheiro (outputs relativos à pasta comum dos ficheiros).
+    root = Path(os.path.commonpath([p.resolve().parent for p in files])) if files else Path(".")
+    return [(p, output_base(p.resolve(), root, out_dir), n, formats, compress) for p in files]
+
+
+def outputs_key(job: tuple) -> str:
+    # Parâmetros com que os outputs de um job são escritos (guardados no índice): se mudarem
+    # (--n, formatos, --gzip ou a pasta), os outputs de um ficheiro sem alterações são reescritos.
+    _, out_base, n, formats, compress = job[:5]
+    return json.dumps([str(out_base), n, list(formats), compress])
+
+
+def run_batch(
+    files: list[Path],
+    out_dir: Path,
+    n: int | None,
+    write_csv: bool = False,
+    write_json: bool = False,
+    workers: int = 1,
+    write_jsonl: bool = False,
+    compress: bool = False,
+) -> tuple[AnalysisResult, int]:
+    # Analisa todos os ficheiros e retorna (resultado agregado, nº de ficheiros com texto).
+    total: Counter[str] = Counter()
+    processed = 0
+    jobs = make_jobs(files, out_dir, n, output_formats(write_csv, write_json, write_jsonl), compress)
+
+    for _, counts, _ in iter_file_counts(jobs, workers):
+        if counts is not None:
+            total.update(counts)
+            processed += 1
+
+    return AnalysisResult(total), processed
+
+
+def run_indexed_batch(
+    files: list[Path],
+    out_dir: Path,
+    n: int | None,
+    index_path: Path,
+    write_csv: bool = False,
+    write_json: bool = False,
+    workers: int = 1,
+    write_jsonl: bool = False,
+    compress: bool = False,
+) -> tuple[AnalysisResult, int, int, int]:
+    # Como run_batch, mas com o índice persistente: só lê e conta os ficheiros novos ou alterados,
+    # retira os removidos e calcula o agregado a partir das contagens guardadas no índice.
+    # Retorna (resultado agregado, nº de ficheiros no corpus, nº recontados, nº removidos).
+    # (import aqui para não carregar sqlite3 quando não se usa --index)
+    from corpus_index import CorpusIndex
+
+    with CorpusIndex(index_path) as index:
+        changed, removed = index.scan(files)
+
+        # Outputs por ficheiro: os nomes são calculados a partir da lista completa,
+        # para não mudarem consoante os ficheiros que foram alterados.
+        formats = output_formats(write_csv, write_json, write_jsonl)
+        jobs_by_path = {job[0]: job for job in make_jobs(files, out_dir, n, formats, compress)}
+        outputs = {path: outputs_key(job) for path, job in jobs_by_path.items()}
+        # O hash de cada ficheiro recontado é calculado na mesma leitura que as contagens.
+        jobs = [(*jobs_by_path[p], True) for p in changed]
+
+        for path, counts, sha256 in iter_file_counts(jobs, workers):
+            # Ficheiros vazios/com erro ficam no índice com contagens vazias (não são relidos).
+            index.record(path, dict(counts) if counts is not None else {}, sha256, outputs[path])
+
+        # Ficheiros sem alterações cujos outputs foram escritos com outros parâmetros: reescritos a
+        # partir das contagens guardadas no índice (sem ler nem contar o ficheiro).
+        recounted = set(changed)
+        unchanged = {path: params for path, params in outputs.items() if path not in recounted}
+        for path in index.stale_outputs(unchanged):
+            counts = index.counts(path)
+            if counts:
+                _, out_base, *_ = jobs_by_path[path]
+                save_result(AnalysisResult(counts), out_base, n, formats, compress)
+            index.set_outputs(path, outputs[path])
+
+        for key in removed:
+            index.remove(key)
+
+        index.commit()
+        return AnalysisResult(index.aggregate()), index.file_count(), len(changed), len(removed)
+
+
+def aggregate_clash(files: list[Path], out_dir: Path) -> Path | None:
+    # Ficheiro do corpus cujos outputs ficariam com os nomes do agregado (um sobrescrevia o outro), ou None.
+    aggregate = out_dir / AGGREGATE_NAME
+    return next((job[0] for job in make_jobs(files, out_dir, None, ()) if job[1] == aggregate), None)
+
+
+def batch_main(args) -> int:
+    # Ponto de entrada do modo batch (chamado por app.main com os argumentos já validados).
+    files = collect_files(args.input_dir, args.glob)
+    if not files:
+        print("Nenhum ficheiro encontrado.")
+        return 1
+
+    # No modo batch, --out é a pasta onde ficam os outputs (default: output/).
+    out_dir = Path(args.out) if args.out else Path("output")
+
+    clash = aggregate_clash(files, out_dir)
+    if clash is not None:
+        print(f"Os outputs de {clash} teriam o nome do agregado ({AGGREGATE_NAME}.*): mude o nome do ficheiro.")
+        return 1
+
+    start = time.perf_counter()
+    if args.index:
+        result, processed, changed, removed = run_indexed_batch(
+            files, out_dir, args.n, Path(args.index), args.csv, args.json, args.workers, args.jsonl, args.gzip
+        )
+        print(f"Índice: {changed} ficheiros novos/alterados, {removed} removidos, {len(files) - changed} sem alterações")
+    else:
+        result, processed = run_batch(
+            files, out_dir, args.n, args.csv, args.json, args.workers, args.jsonl, args.gzip
+        )
+    elapsed = time.perf_counter() - start
+
+    if processed == 0:
+        print("Nenhum texto fornecido (ou ficheiros vazios/erro).")
+        return 1
+
+    # Top N agregado de todos os ficheiros (impresso e guardado como _aggregate.*).
+    print(result.report(args.n))
+    save_result(result, out_dir / AGGREGATE_NAME, args.n, output_formats(args.csv, args.json, args.jsonl), args.gzip)
+
+    # Vocabulário agregado completo num ficheiro de contagens, se pedido (--counts).
+    if args.counts:
+        save_counts(result.counts, Path(args.counts))
+
+    # Resumo de desempenho.
+    rate = len(files) / elapsed if elapsed > 0 else float("inf")
+    print(f"{processed}/{len(files)} ficheiros processados em {elapsed:.2f}s ({rate:.1f} ficheiros/s)")
+    logging.info("Batch: %d/%d ficheiros em %.2fs", processed, len(files), elapsed)
+    return 0
@@ -0,0 +1,9 @@
+"""Benchmarks do analisador de texto.
+
+- corpus.py: gerador determinístico de corpus sintéticos (vocabulário Zipf, acentos, utf-8/latin-1);
+- run.py: suite que mede cada etapa (ler, tokenizar, contar, normalizar, selecionar, escrever),
+  guarda um baseline em JSON e falha se houver regressões (python -m benchmarks.run --check);
+- bench_top_n.py: comparação de sort_counts com select_top.
+- import_audit.py: módulos carregados (e o seu custo) ao importar app.py e o cliente do daemon.
+- loadtest.py: teste de carga da API (throughput, latência p50/p95/p99 por endpoint, memória do servidor).
+"""
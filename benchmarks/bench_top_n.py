@@ -0,0 +1,61 @@
+"""Benchmark da seleção do top N: sort_counts (ordena tudo) vs select_top (heap).
+
+Uso:
+    python benchmarks/bench_top_n.py
+    python benchmarks/bench_top_n.py --max-exp 6 --n 10 100
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Permite correr o script diretamente a partir da raiz do repositório.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text_analysis import select_top, sort_counts
+
+
+def make_counts(vocab_size: int, seed: int = 0) -> dict[str, int]:
+    # Contagens com distribuição de cauda longa (muitas palavras raras, poucas muito comuns),
+    # parecida com a de texto real.
+    rng = random.Random(seed)
+    return {f"w{i:08d}": int(rng.paretovariate(1.1)) for i in range(vocab_size)}
+
+
+def best_time(func, counts: dict[str, int], n: int, repeat: int) -> float:
+    # Melhor tempo de várias repetições (menos ruído do que a média).
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(counts, n)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de sort_counts vs select_top.")
+    parser.add_argument("--min-exp", type=int, default=3, help="Menor vocabulário = 10^min-exp (default: 3)")
+    parser.add_argument("--max-exp", type=int, default=7, help="Maior vocabulário = 10^max-exp (default: 7)")
+    parser.add_argument("--n", type=int, nargs="+", default=[10, 100], help="Valores de N (default: 10 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por medição (default: 3)")
+    args = parser.parse_args(argv)
+
+    print(f"{'vocab':>10} {'n':>5} {'sort (s)':>10} {'heap (s)':>10} {'speedup':>8}")
+    for exp in range(args.min_exp, args.max_exp + 1):
+        counts = make_counts(10**exp)
+        for n in args.n:
+            # Garante que os dois caminhos dão exatamente o mesmo resultado.
+            assert select_top(counts, n) == sort_counts(counts, n)
+
+            t_sort = best_time(sort_counts, counts, n, args.repeat)
+            t_heap = best_time(select_top, counts, n, args.repeat)
+            print(f"{10**exp:>10} {n:>5} {t_sort:>10.4f} {t_heap:>10.4f} {t_sort / t_heap:>7.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+"""Gerador determinístico de corpus sintéticos para os benchmarks.
+
+O texto imita texto real: as palavras seguem uma distribuição de Zipf (poucas palavras muito
+comuns, uma cauda longa de palavras raras), uma fração das palavras tem acentos, e há pontuação,
+maiúsculas e quebras de linha. Com a mesma seed o resultado é sempre igual.
+
+Uso:
+    python -m benchmarks.corpus --size 10MB --out corpus.txt
+    python -m benchmarks.corpus --size 100MB --files 20 --latin1-ratio 0.3 --out corpus/
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+from pathlib import Path
+
+# Sílabas usadas para construir as palavras do vocabulário.
+SYLLABLES = [
+    "ba", "be", "ca", "co", "da", "de", "do", "fa", "fi", "ga", "la", "le", "li", "lo", "ma", "me",
+    "mi", "mo", "na", "ne", "no", "pa", "pe", "po", "ra", "re", "ri", "ro", "sa", "se", "so", "ta",
+    "te", "ti", "to", "va", "ve", "vi", "an", "en", "in", "or", "es", "al", "ar", "um", "cao", "oes",
+]
+
+# Vogais que podem ganhar acento (todas representáveis em latin-1).
+ACCENTS = {
+    "a": "áàâã",
+    "e": "éê",
+    "i": "í",
+    "o": "óôõ",
+    "u": "úü",
+    "c": "ç",
+}
+
+# Pontuação que pode aparecer depois de uma palavra (com o peso de cada uma).
+PUNCTUATION = ["", "", "", "", "", "", "", "", ",", ".", "!", "?", ";", ":"]
+
+# Palavras por linha do texto gerado.
+WORDS_PER_LINE = 12
+
+# Sufixos aceites em tamanhos ("10MB", "1GB", ...).
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+
+def parse_size(value: str) -> int:
+    # Converte "10MB", "512KB", "1GB" ou "1000" num número de bytes.
+    value = value.strip().upper()
+    digits = value.rstrip("KMGB")
+    unit = value[len(digits):]
+    if not digits or unit not in SIZE_UNITS:
+        raise ValueError(f"tamanho inválido: {value!r}")
+    return int(float(digits) * SIZE_UNITS[unit])
+
+
+def make_vocabulary(size: int, accent_density: float = 0.1, seed: int = 0) -> list[str]:
+    # Vocabulário de `size` palavras distintas, feitas de 1 a 4 sílabas.
+    # Cada letra que pode ter acento leva um com probabilidade accent_density.
+    rng = random.Random(seed)
+    vocab: list[str] = []
+    seen: set[str] = set()
+
+    while len(vocab) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        if accent_density > 0:
+            word = "".join(
+                rng.choice(ACCENTS[c]) if c in ACCENTS and rng.random() < accent_density else c
+                for c in word
+            )
+        # Sufixo numérico quando as combinações de sílabas se repetem (vocabulários grandes).
+        if word in seen:
+            word = f"{word}{len(vocab)}"
+        seen.add(word)
+        vocab.append(word)
+
+    return vocab
+
+
+def zipf_cum_weights(size: int, s: float = 1.1) -> list[float]:
+    # Pesos cumulativos de Zipf: a palavra de rank r tem peso 1 / r^s.
+    return list(itertools.accumulate(1.0 / rank**s for rank in range(1, size + 1)))
+
+
+def generate_text(
+    size: int,
+    vocab_size: int = 50_000,
+    zipf_s: float = 1.1,
+    accent_density: float = 0.1,
+    seed: int = 0,
+) -> str:
+    # Gera ~size caracteres de texto (corta na última palavra completa).
+    rng = random.Random(seed)
+    vocab = make_vocabulary(vocab_size, accent_density, seed)
+    cum_weights = zipf_cum_weights(vocab_size, zipf_s)
+
+    parts: list[str] = []
+    length = 0
+    capitalize = True
+    while length < size:
+        # Gera uma linha de cada vez (random.choices escolhe as palavras todas de uma vez).
+        words = rng.choices(vocab, cum_weights=cum_weights, k=WORDS_PER_LINE)
+        marks = rng.choices(PUNCTUATION, k=WORDS_PER_LINE)
+        tokens = []
+        for word, mark in zip(words, marks):
+            # Maiúscula no início de cada frase.
+            tokens.append((word.capitalize() if capitalize else word) + mark)
+            capitalize = mark in ".!?"
+        line = " ".join(tokens) + "\n"
+        parts.append(line)
+        length += len(line)
+
+    return "".join(parts)[:size].rsplit(" ", 1)[0] + "\n"
+
+
+def write_corpus(path: Path, size: int, encoding: str = "utf-8", seed: int = 0, **options) -> Path:
+    # Escreve um ficheiro de ~size caracteres no encoding pedido ("utf-8" ou "latin-1").
+    # Os restantes argumentos (vocab_size, zipf_s, accent_density) vão para generate_text.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(generate_text(size, seed=seed, **options).encode(encoding))
+    return path
+
+
+def write_corpus_dir(
+    out_dir: Path, size: int, files: int, latin1_ratio: float = 0.0, seed: int = 0, **options
+) -> list[Path]:
+    # Escreve um corpus de `files` ficheiros .txt com ~size caracteres no total.
+    # Os primeiros round(files * latin1_ratio) ficheiros são gravados em latin-1, os outros em utf-8.
+    latin1_files = round(files * latin1_ratio)
+    paths = []
+    for i in range(files):
+        encoding = "latin-1" if i < latin1_files else "utf-8"
+        paths.append(write_corpus(out_dir / f"doc{i:05d}.txt", size // files, encoding, seed + i, **options))
+    return paths
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera um corpus sintético para benchmarks.")
+    parser.add_argument("--size", default="10MB", help="Tamanho total em caracteres, ex.: 10MB (default: 10MB)")
+    parser.add_argument("--out", required=True, help="Ficheiro de saída (ou pasta, com --files)")
+    parser.add_argument("--files", type=int, default=1, help="Número de ficheiros (default: 1)")
+    parser.add_argument("--vocab", type=int, default=50_000, help="Tamanho do vocabulário (default: 50000)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Expoente de Zipf (default: 1.1)")
+    parser.add_argument("--accents", type=float, default=0.1, help="Densidade de acentos 0..1 (default: 0.1)")
+    parser.add_argument("--latin1-ratio", type=float, default=0.0, help="Fração de ficheiros em latin-1 (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed do gerador (default: 0)")
+    args = parser.parse_args(argv)
+
+    options = {"vocab_size": args.vocab, "zipf_s": args.zipf, "accent_density": args.accents}
+    size = parse_size(args.size)
+    if args.files > 1:
+        paths = write_corpus_dir(Path(args.out), size, args.files, args.latin1_ratio, args.seed, **options)
+        print(f"{len(paths)} ficheiros escritos em {args.out}")
+    else:
+        encoding = "latin-1" if args.latin1_ratio >= 0.5 else "utf-8"
+        write_corpus(Path(args.out), size, encoding, args.seed, **options)
+        print(f"Corpus escrito em {args.out} ({encoding})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+"""Auditoria dos imports: que módulos são carregados (e quanto custam) só por importar o app.py.
+
+Cada `python app.py ...` paga os imports do app.py antes de fazer qualquer coisa, e o cliente do
+daemon (daemon.py) só é fino se não carregar os módulos da análise. Os módulos que só algumas opções
+usam (--csv, --gzip, --profile-memory, --index, --workers, ...) devem ser importados só quando precisos:
+LAZY_MODULES lista, para cada módulo auditado, os que não podem aparecer ao importá-lo.
+
+Cada auditoria corre num processo novo (python -X importtime), com os módulos que o arranque do
+Python já tinha carregado excluídos.
+
+Uso:
+    python -m benchmarks.import_audit               # os imports mais lentos de app e daemon
+    python -m benchmarks.import_audit --check       # exit 1 se algum módulo de LAZY_MODULES for carregado
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+# Raiz do repositório (onde estão app.py e daemon.py).
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que não podem ser carregados ao importar cada módulo auditado.
+LAZY_MODULES = {
+    "app": (
+        "batch", "corpus_index", "countfile", "csv", "daemon", "follow", "gzip", "logging.handlers",
+        "multiprocessing", "concurrent.futures", "parallel", "pipeline", "secrets", "sketch", "socket",
+        "sqlite3", "tracemalloc", "typing",
+    ),
+    "daemon": (
+        "app", "argparse", "exporters", "json", "logging", "logging_setup", "text_analysis", "threading",
+    ),
+}
+
+# Marca escrita no stderr antes do import auditado (as linhas antes dela são do arranque do Python).
+_MARKER = "--import-audit--"
+
+_SCRIPT = f"""
+import sys
+before = set(sys.modules)
+sys.stderr.write("{_MARKER}\\n")
+import {{module}}
+print("\\n".join(sorted(set(sys.modules) - before)))
+"""
+
+
+def audit(module: str) -> tuple[set[str], list[tuple[str, int, int]]]:
+    """Importa um módulo num processo novo e mede os imports.
+
+    Args:
+        module: Nome do módulo (ex.: "app").
+
+    Returns:
+        (módulos carregados pelo import, [(módulo, tempo próprio, tempo acumulado) em microssegundos]),
+        pela ordem em que o -X importtime os mostra."""
+    done = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set(done.stdout.split())
+
+    times = []
+    lines = done.stderr.splitlines()
+    for line in lines[lines.index(_MARKER) + 1:]:
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(own), int(cumulative)))
+    return loaded, times
+
+
+def forbidden(module: str, loaded: set[str]) -> list[str]:
+    # Módulos de LAZY_MODULES[module] que foram carregados.
+    return sorted(name for name in LAZY_MODULES.get(module, ()) if name in loaded)
+
+
+def format_audit(module: str, loaded: set[str], times: list[tuple[str, int, int]], top: int = 15) -> str:
+    # Tempo total do import e os `top` módulos com maior tempo próprio.
+    total = sum(own for _, own, _ in times)
+    lines = [f"import {module}: {total / 1000:.1f} ms, {len(loaded)} módulos"]
+    for name, own, cumulative in sorted(times, key=lambda item: -item[1])[:top]:
+        lines.append(f"  {name:<30} {own / 1000:7.2f} ms  (acumulado {cumulative / 1000:.2f} ms)")
+    bad = forbidden(module, loaded)
+    if bad:
+        lines.append(f"  carregados mas deviam ser importados só quando precisos: {', '.join(bad)}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Auditoria dos imports do app.py e do cliente do daemon.")
+    parser.add_argument("modules", nargs="*", default=list(LAZY_MODULES), help="Módulos a auditar (default: app daemon)")
+    parser.add_argument("--top", type=int, default=15, help="Nº de imports mais lentos a mostrar (default: 15)")
+    parser.add_argument("--check", action="store_true", help="Falhar se algum módulo de LAZY_MODULES for carregado")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        loaded, times = audit(module)
+        print(format_audit(module, loaded, times, args.top))
+        failed = failed or bool(forbidden(module, loaded))
+
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
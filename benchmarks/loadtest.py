@@ -0,0 +1,308 @@
+"""Teste de carga da API (api.py): throughput e latência por endpoint, e a memória do servidor.
+
+Os pedidos são feitos com httpx: por defeito à app no próprio processo (httpx.ASGITransport, sem rede
+nem uvicorn), ou a um servidor já a correr com --url (ex.: uvicorn api:app). N pedidos em paralelo
+(--concurrency) percorrem uma carga gerada com uma seed:
+- uma fração dos pedidos vai para /health (--health-ratio), o resto para /analyze;
+- os textos do /analyze têm tamanhos sorteados de uma mistura (--mix tiny=70,10KB=25,1MB=5),
+  gerados com benchmarks.corpus (vocabulário Zipf, acentos, pontuação);
+- uma fração dos textos repete um documento já enviado (--repeat-ratio), para medir a cache.
+
+Para cada endpoint (e cada tamanho de texto) mostra o nº de pedidos, os erros, o throughput e a
+latência p50/p95/p99; a memória do servidor vem do /metrics antes e depois da carga (no modo
+in-process é a do próprio processo, sem os processos do pool). Com --out os resultados são guardados
+em JSON e --compare mostra a diferença para uma execução anterior.
+
+Uso:
+    python -m benchmarks.loadtest                                        # in-process, 200 pedidos
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --concurrency 32 --requests 2000
+    python -m benchmarks.loadtest --repeat-ratio 0.5 --out depois.json --compare antes.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+from benchmarks.corpus import generate_text, parse_size
+
+# Mistura default de tamanhos dos textos (nome=peso); "tiny" é um texto de TINY_SIZE caracteres.
+DEFAULT_MIX = "tiny=70,10KB=25,1MB=5"
+TINY_SIZE = 64
+
+# Percentis da latência mostrados e guardados.
+PERCENTILES = (50, 95, 99)
+
+# Top N pedido em cada /analyze.
+ANALYZE_N = 10
+
+# Gauges de memória do /metrics (ver instrumentation.Metrics.render).
+MEMORY_GAUGES = {"process_resident_memory_bytes": "rss", "process_max_resident_memory_bytes": "max_rss"}
+
+
+def parse_mix(value: str) -> list[tuple[str, int, float]]:
+    # "tiny=70,10KB=25,1MB=5" -> [(nome, tamanho em caracteres, peso), ...].
+    mix = []
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        size = TINY_SIZE if name.lower() == "tiny" else parse_size(name)
+        mix.append((name, size, float(weight or 1)))
+    if not mix or any(weight < 0 for _, _, weight in mix) or sum(weight for _, _, weight in mix) <= 0:
+        raise ValueError(f"mistura inválida: {value}")
+    return mix
+
+
+def build_workload(
+    requests: int, mix: list[tuple[str, int, float]], repeat_ratio: float = 0.0, health_ratio: float = 0.1, seed: int = 0
+) -> list[tuple[str, str | None, int | None]]:
+    """Lista de pedidos (endpoint, nome do tamanho, nº do documento), determinística para a mesma seed.
+
+    Um documento repetido tem o mesmo nº que um pedido anterior do mesmo tamanho (o mesmo texto)."""
+    rng = random.Random(seed)
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, _, weight in mix]
+    sent: dict[str, list[int]] = {name: [] for name in names}
+    workload = []
+    next_doc = 0
+    for _ in range(requests):
+        if rng.random() < health_ratio:
+            workload.append(("/health", None, None))
+            continue
+        name = rng.choices(names, weights)[0]
+        if sent[name] and rng.random() < repeat_ratio:
+            doc = rng.choice(sent[name])
+        else:
+            doc = next_doc
+            next_doc += 1
+            sent[name].append(doc)
+        workload.append(("/analyze", name, doc))
+    return workload
+
+
+class Texts:
+    # Textos dos documentos: um texto base por tamanho (gerado uma vez) com um prefixo único por documento
+    # (cada documento novo tem outro hash, logo não vem da cache, mas custa o mesmo a analisar).
+
+    def __init__(self, mix: list[tuple[str, int, float]], seed: int = 0) -> None:
+        self.sizes = {name: size for name, size, _ in mix}
+        self.seed = seed
+        self._base: dict[str, str] = {}
+
+    def get(self, name: str, doc: int) -> str:
+        if name not in self._base:
+            self._base[name] = generate_text(self.sizes[name], vocab_size=5_000, seed=self.seed)
+        return f"doc{doc} {self._base[name]}"
+
+
+def percentile(values: list[float], q: float) -> float:
+    # Percentil q (0-100) pelo método nearest-rank (values já ordenados).
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(samples: list[tuple[str, int, float]], elapsed: float) -> dict[str, dict]:
+    # Por grupo (ex.: "/analyze", "/analyze 10KB"): pedidos, erros, throughput e latência em ms.
+    groups: dict[str, list[tuple[int, float]]] = {}
+    for group, status, seconds in samples:
+        groups.setdefault(group, []).append((status, seconds))
+
+    summary = {}
+    for group, values in sorted(groups.items()):
+        latencies = sorted(seconds * 1000 for _, seconds in values)
+        entry = {
+            "requests": len(values),
+            "errors": sum(1 for status, _ in values if not 200 <= status < 300),
+            # Nº de respostas por status (0 = erro de ligação/timeout; 503 = servidor ocupado).
+            "statuses": {str(status): count for status, count in sorted(Counter(status for status, _ in values).items())},
+            "throughput": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+        }
+        for q in PERCENTILES:
+            entry[f"p{q}_ms"] = round(percentile(latencies, q), 3)
+        entry["max_ms"] = round(latencies[-1], 3)
+        summary[group] = entry
+    return summary
+
+
+async def server_memory(client) -> dict[str, int]:
+    # Memória do servidor, lida dos gauges do /metrics ({} se não existirem).
+    r = await client.get("/metrics")
+    memory = {}
+    for line in r.text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in MEMORY_GAUGES:
+            memory[MEMORY_GAUGES[name]] = int(float(value))
+    return memory
+
+
+async def run_load(client, workload: list, texts: Texts, concurrency: int) -> tuple[list[tuple[str, int, float]], float]:
+    # Corre a carga com `concurrency` pedidos em paralelo. Retorna ([(grupo, status, segundos)], duração).
+    import httpx
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in workload:
+        queue.put_nowait(item)
+    samples = []
+
+    async def worker():
+        while not queue.empty():
+            endpoint, name, doc = queue.get_nowait()
+            body = {"text": texts.get(name, doc), "n": ANALYZE_N} if endpoint == "/analyze" else None
+            start = time.perf_counter()
+            try:
+                if body is None:
+                    r = await client.get(endpoint)
+                else:
+                    r = await client.post(endpoint, json=body)
+                status = r.status_code
+            except httpx.HTTPError:
+                status = 0
+            seconds = time.perf_counter() - start
+            samples.append((endpoint, status, seconds))
+            if name is not None:
+                samples.append((f"{endpoint} {name}", status, seconds))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def run(
+    workload: list, texts: Texts, concurrency: int, url: str | None = None, timeout: float = 60.0
+) -> dict:
+    # Liga-se à API (in-process ou --url), mede a memória, corre a carga e mede de novo.
+    import httpx
+
+    async def measure(client):
+        memory_before = await server_memory(client)
+        samples, elapsed = await run_load(client, workload, texts, concurrency)
+        memory_after = await server_memory(client)
+        cache = (await client.get("/cache/stats")).json()
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "endpoints": summarize(samples, elapsed),
+            "memory": {"before": memory_before, "after": memory_after},
+            "cache": cache,
+        }
+
+    if url is not None:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            return await measure(client)
+
+    # In-process: a app corre no mesmo event loop (com o lifespan: logs e pool de processos).
+    # (import aqui: com --url não é preciso carregar a API)
+    import api
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with api.app.router.lifespan_context(api.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            return await measure(client)
+
+
+def format_results(results: dict) -> str:
+    # Tabela por endpoint (com os status dos erros) e a memória do servidor.
+    header = f"{'endpoint':<18} {'pedidos':>8} {'erros':>6} {'req/s':>9}" + "".join(
+        f" {f'p{q} (ms)':>10}" for q in PERCENTILES
+    )
+    lines = [header]
+    for group, entry in results["endpoints"].items():
+        line = f"{group:<18} {entry['requests']:>8} {entry['errors']:>6} {entry['throughput']:>9.1f}"
+        line += "".join(f" {entry[f'p{q}_ms']:>10.2f}" for q in PERCENTILES)
+        if entry["errors"]:
+            line += "  (" + ", ".join(f"{status}: {count}" for status, count in entry["statuses"].items() if status[0] != "2") + ")"
+        lines.append(line)
+
+    after = results["memory"]["after"]
+    if after:
+        before = results["memory"]["before"]
+        lines.append(
+            f"Memória do servidor: {before.get('rss', 0) / 1024 / 1024:.1f} MB -> {after.get('rss', 0) / 1024 / 1024:.1f} MB"
+            f" (pico {after.get('max_rss', 0) / 1024 / 1024:.1f} MB)"
+        )
+    cache = results["cache"]
+    lines.append(f"Cache: {cache['hits']} hits, {cache['misses']} misses, {cache['entries']} entradas")
+    lines.append(f"Duração: {results['elapsed_seconds']:.2f}s")
+    return "\n".join(lines)
+
+
+def compare(before: dict, after: dict) -> str:
+    # Diferença (em %) do throughput e dos percentis de cada endpoint entre duas execuções.
+    lines = [f"{'endpoint':<18} {'req/s':>9}" + "".join(f" {f'p{q}':>9}" for q in PERCENTILES)]
+
+    def delta(old: float, new: float) -> str:
+        return f"{(new / old - 1) * 100:+.0f}%" if old else "-"
+
+    for group, new in after["endpoints"].items():
+        old = before["endpoints"].get(group)
+        if old is None:
+            continue
+        line = f"{group:<18} {delta(old['throughput'], new['throughput']):>9}"
+        line += "".join(f" {delta(old[f'p{q}_ms'], new[f'p{q}_ms']):>9}" for q in PERCENTILES)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da API (latência, throughput e memória).")
+    parser.add_argument("--url", help="URL de um servidor a correr (default: a app no próprio processo)")
+    parser.add_argument("--requests", type=int, default=200, help="Nº total de pedidos (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pedidos em paralelo (default: 8)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Tamanhos dos textos e pesos (default: {DEFAULT_MIX})")
+    parser.add_argument(
+        "--repeat-ratio", type=float, default=0.0, help="Fração de textos que repetem um documento já enviado (default: 0)"
+    )
+    parser.add_argument("--health-ratio", type=float, default=0.1, help="Fração de pedidos ao /health (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed da carga e dos textos (default: 0)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Tempo máximo de cada pedido em segundos (default: 60)")
+    parser.add_argument("--out", help="Guardar os resultados neste ficheiro JSON")
+    parser.add_argument("--compare", help="Comparar com os resultados de uma execução anterior (JSON)")
+    args = parser.parse_args(argv)
+
+    if args.requests <= 0 or args.concurrency <= 0:
+        print("--requests e --concurrency devem ser maiores que 0")
+        return 1
+    if not (0 <= args.repeat_ratio <= 1 and 0 <= args.health_ratio <= 1):
+        print("--repeat-ratio e --health-ratio devem estar entre 0 e 1")
+        return 1
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    workload = build_workload(args.requests, mix, args.repeat_ratio, args.health_ratio, args.seed)
+    results = asyncio.run(run(workload, Texts(mix, args.seed), args.concurrency, args.url, args.timeout))
+    results["meta"] = {
+        "target": args.url or "in-process",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "repeat_ratio": args.repeat_ratio,
+        "health_ratio": args.health_ratio,
+        "seed": args.seed,
+        "python": platform.python_version(),
+    }
+    print(format_results(results))
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Resultados guardados em {out}")
+
+    if args.compare:
+        print()
+        print(compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), results))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
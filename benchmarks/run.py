@@ -0,0 +1,215 @@
+"""Suite de benchmarks: mede cada etapa da análise num corpus sintético e deteta regressões.
+
+Para cada encoding (utf-8 e latin-1) gera um ficheiro com benchmarks.corpus e mede o tempo
+(melhor de --repeat execuções) e o pico de memória (tracemalloc, numa execução à parte) de:
+    read      read_text_file (ler e descodificar)
+    tokenize  raw_tokens (minúsculas e separar palavras)
+    count     Counter das palavras em bruto
+    normalize merge_raw (normalizar cada palavra distinta, sem a cache de normalize_raw)
+    select    select_top (top N)
+    write     save_csv + save_json do vocabulário completo
+    top_words top_words do texto inteiro (ponta a ponta)
+    file      count_file_words do ficheiro (ponta a ponta, em bytes)
+
+Uso:
+    python -m benchmarks.run --size 10MB --save            # grava o baseline
+    python -m benchmarks.run --size 10MB --check           # compara com o baseline (exit 1 se piorar)
+    python -m benchmarks.run --check --threshold 10        # tolerância de 10% em vez de 20%
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from app import count_file_words, read_text_file, save_csv, save_json
+from benchmarks.corpus import parse_size, write_corpus
+from text_analysis import merge_raw, normalize_raw, raw_tokens, select_top, sort_counts, top_words
+
+# Baseline default (ao lado deste ficheiro).
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Encodings dos ficheiros do corpus.
+ENCODINGS = ("utf-8", "latin-1")
+
+# Tolerância default (em %) antes de uma etapa contar como regressão.
+DEFAULT_THRESHOLD = 20.0
+
+# Etapas mais rápidas do que isto (no baseline) não são comparadas em tempo: o ruído é maior que a medida.
+DEFAULT_MIN_SECONDS = 0.005
+
+
+def measure(func, repeat: int) -> dict[str, float | int]:
+    # Melhor tempo de `repeat` execuções e pico de memória numa execução extra com tracemalloc
+    # (o tracemalloc torna o código mais lento, por isso não entra na medição do tempo).
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": round(best, 6), "peak_bytes": peak}
+
+
+def run_stages(path: Path, out_dir: Path, n: int, repeat: int) -> dict[str, dict]:
+    # Mede as etapas para um ficheiro. Cada etapa recebe o resultado da anterior (calculado uma vez
+    # fora da medição), para o tempo de uma etapa não incluir o das outras.
+    results = {}
+    text = read_text_file(str(path))
+    tokens = raw_tokens(text)
+    raw = Counter(tokens)
+    counts = merge_raw(raw)
+    vocabulary = sort_counts(counts, len(counts))
+
+    def normalize():
+        # Sem a cache, para medir o custo real de normalizar o vocabulário.
+        normalize_raw.cache_clear()
+        merge_raw(raw)
+
+    def write():
+        save_csv(vocabulary, out_dir / "vocabulary.csv")
+        save_json(vocabulary, out_dir / "vocabulary.json")
+
+    stages = {
+        "read": lambda: read_text_file(str(path)),
+        "tokenize": lambda: raw_tokens(text),
+        "count": lambda: Counter(tokens),
+        "normalize": normalize,
+        "select": lambda: select_top(counts, n),
+        "write": write,
+        "top_words": lambda: top_words(text, n),
+        "file": lambda: count_file_words(str(path)),
+    }
+    for name, func in stages.items():
+        results[name] = measure(func, repeat)
+    return results
+
+
+def run_suite(size: int, seed: int = 0, n: int = 10, repeat: int = 3) -> dict:
+    # Gera o corpus (num diretório temporário) e mede todas as etapas para cada encoding.
+    # Retorna {"meta": {...}, "stages": {"utf-8/read": {"seconds", "peak_bytes"}, ...}}.
+    stages = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        for encoding in ENCODINGS:
+            path = write_corpus(tmp_dir / f"corpus-{encoding}.txt", size, encoding, seed)
+            for name, result in run_stages(path, tmp_dir, n, repeat).items():
+                stages[f"{encoding}/{name}"] = result
+
+    meta = {"size": size, "seed": seed, "n": n, "repeat": repeat, "python": platform.python_version()}
+    return {"meta": meta, "stages": stages}
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD, min_seconds: float = DEFAULT_MIN_SECONDS
+) -> list[str]:
+    # Compara duas execuções e retorna a lista de regressões (vazia se está tudo dentro da tolerância).
+    # Uma etapa regride se o tempo ou o pico de memória crescerem mais de threshold %.
+    regressions = []
+    limit = 1 + threshold / 100
+
+    for name, old in baseline["stages"].items():
+        new = current["stages"].get(name)
+        if new is None:
+            continue
+
+        if old["seconds"] >= min_seconds and new["seconds"] > old["seconds"] * limit:
+            regressions.append(
+                f"{name}: tempo {old['seconds']:.4f}s -> {new['seconds']:.4f}s "
+                f"(+{(new['seconds'] / old['seconds'] - 1) * 100:.0f}%)"
+            )
+
+        if old["peak_bytes"] > 0 and new["peak_bytes"] > old["peak_bytes"] * limit:
+            regressions.append(
+                f"{name}: memória {old['peak_bytes']} -> {new['peak_bytes']} bytes "
+                f"(+{(new['peak_bytes'] / old['peak_bytes'] - 1) * 100:.0f}%)"
+            )
+
+    return regressions
+
+
+def format_results(results: dict) -> str:
+    # Tabela com o tempo e o pico de memória de cada etapa.
+    lines = [f"{'etapa':<20} {'tempo (s)':>10} {'pico (MB)':>10}"]
+    for name, stage in results["stages"].items():
+        lines.append(f"{name:<20} {stage['seconds']:>10.4f} {stage['peak_bytes'] / 1024 / 1024:>10.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks das etapas da análise de texto.")
+    parser.add_argument("--size", default="10MB", help="Tamanho do corpus por encoding, ex.: 10MB, 1GB (default: 10MB)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed do gerador do corpus (default: 0)")
+    parser.add_argument("--n", type=int, default=10, help="Top N (default: 10)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por etapa (default: 3)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Ficheiro JSON do baseline")
+    parser.add_argument("--save", action="store_true", help="Guardar esta execução como baseline")
+    parser.add_argument("--check", action="store_true", help="Comparar com o baseline e falhar se houver regressões")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Tolerância em %% antes de contar como regressão (default: {DEFAULT_THRESHOLD:g})",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=DEFAULT_MIN_SECONDS,
+        help=f"Etapas mais rápidas do que isto não são comparadas em tempo (default: {DEFAULT_MIN_SECONDS:g})",
+    )
+    args = parser.parse_args(argv)
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if args.check:
+        if not baseline_path.exists():
+            print(f"Baseline não encontrado: {baseline_path} (correr primeiro com --save)")
+            return 1
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+
+    # Os avisos do fallback de encoding (latin-1) não interessam aqui.
+    logging.disable(logging.WARNING)
+    try:
+        results = run_suite(parse_size(args.size), args.seed, args.n, args.repeat)
+    finally:
+        logging.disable(logging.NOTSET)
+    print(format_results(results))
+
+    if args.save:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline guardado em: {baseline_path}")
+
+    if baseline is not None:
+        # Só faz sentido comparar execuções com o mesmo corpus.
+        same = ("size", "seed", "n")
+        if any(baseline["meta"].get(key) != results["meta"][key] for key in same):
+            print("O baseline foi gravado com outro --size/--seed/--n; não é comparável.")
+            return 1
+
+        regressions = compare(baseline, results, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"Regressões acima de {args.threshold:g}%:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"Sem regressões acima de {args.threshold:g}%.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
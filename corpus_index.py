@@ -0,0 +1,174 @@
+"""Índice persistente (SQLite) para re-análises incrementais de um corpus (app.py --index).
+
+Para cada ficheiro guarda o caminho, tamanho, mtime, hash SHA-256 do conteúdo, as suas contagens
+de palavras e os parâmetros com que os seus outputs foram escritos (--n, formatos, --gzip, pasta),
+e mantém também a contagem agregada de todo o corpus. Numa nova execução só os ficheiros novos ou
+alterados são lidos e contados; os removidos saem do agregado, e o top N agregado é calculado a
+partir das contagens guardadas. Os outputs de um ficheiro sem alterações só são reescritos (a partir
+das contagens guardadas, sem o ler) se os parâmetros dos outputs mudaram.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from collections import Counter
+from pathlib import Path
+
+# Caminho default do índice (usado com --index sem valor).
+DEFAULT_INDEX_PATH = Path("output") / "index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    counts TEXT NOT NULL,
+    outputs TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS aggregate (
+    word TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    # Hash do conteúdo do ficheiro, lido em blocos para não carregar ficheiros grandes em memória.
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CorpusIndex:
+    """Índice de um corpus guardado numa base de dados SQLite.
+
+    Uso típico: scan() para saber que ficheiros mudaram, record()/remove() para atualizar,
+    commit() no fim e aggregate() para obter as contagens de todo o corpus."""
+
+    def __init__(self, path: Path | str = DEFAULT_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(_SCHEMA)
+        # Índices criados antes da coluna outputs: os outputs de todos os ficheiros são reescritos uma vez.
+        if "outputs" not in {row[1] for row in self._db.execute("PRAGMA table_info(files)")}:
+            self._db.execute("ALTER TABLE files ADD COLUMN outputs TEXT NOT NULL DEFAULT ''")
+        self._aggregate: Counter[str] | None = None
+        self._dirty = False  # True se o agregado foi alterado nesta execução
+        self._hashes: dict[str, str] = {}  # hashes já calculados no scan() (evita ler o ficheiro outra vez)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "CorpusIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _key(self, path: Path) -> str:
+        # Os ficheiros são identificados pelo caminho absoluto.
+        return str(path.resolve())
+
+    def scan(self, files: list[Path]) -> tuple[list[Path], list[str]]:
+        # Compara os ficheiros atuais com o índice.
+        # Retorna (ficheiros novos/alterados, caminhos removidos).
+        # Um ficheiro com o mesmo tamanho e mtime é considerado igual sem ser lido; se só o
+        # mtime mudou mas o hash é o mesmo (ex.: "touch"), atualiza o registo e também não é recontado.
+        known = {
+            path: (size, mtime_ns, sha256)
+            for path, size, mtime_ns, sha256 in self._db.execute("SELECT path, size, mtime_ns, sha256 FROM files")
+        }
+
+        changed = []
+        seen = set()
+        for file in files:
+            key = self._key(file)
+            seen.add(key)
+            stat = file.stat()
+            entry = known.get(key)
+
+            if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                continue
+
+            if entry is not None and entry[0] == stat.st_size:
+                self._hashes[key] = file_sha256(file)
+                if entry[2] == self._hashes[key]:
+                    self._db.execute("UPDATE files SET mtime_ns = ? WHERE path = ?", (stat.st_mtime_ns, key))
+                    continue
+
+            changed.append(file)
+
+        removed = [path for path in known if path not in seen]
+        return changed, removed
+
+    def aggregate(self) -> Counter[str]:
+        # Contagens agregadas de todo o corpus (carregadas uma vez e atualizadas em memória).
+        if self._aggregate is None:
+            self._aggregate = Counter(dict(self._db.execute("SELECT word, count FROM aggregate")))
+        return self._aggregate
+
+    def _old_counts(self, key: str) -> Counter[str] | None:
+        row = self._db.execute("SELECT counts FROM files WHERE path = ?", (key,)).fetchone()
+        return Counter(json.loads(row[0])) if row else None
+
+    def counts(self, file: Path) -> Counter[str] | None:
+        # Contagens guardadas de um ficheiro (None se não está no índice).
+        return self._old_counts(self._key(file))
+
+    def stale_outputs(self, outputs: dict[Path, str]) -> list[Path]:
+        # Ficheiros cujos outputs foram escritos com outros parâmetros (outputs: ficheiro -> parâmetros atuais).
+        stored = dict(self._db.execute("SELECT path, outputs FROM files"))
+        return [file for file, params in outputs.items() if stored.get(self._key(file), params) != params]
+
+    def set_outputs(self, file: Path, outputs: str) -> None:
+        self._db.execute("UPDATE files SET outputs = ? WHERE path = ?", (outputs, self._key(file)))
+
+    def record(self, file: Path, counts: dict[str, int], sha256: str | None = None, outputs: str = "") -> None:
+        # Guarda (ou substitui) as contagens de um ficheiro e atualiza o agregado.
+        # sha256: hash já calculado ao contar (senão é lido do scan() ou do ficheiro);
+        # outputs: parâmetros com que os outputs do ficheiro foram escritos.
+        key = self._key(file)
+        stat = file.stat()
+        aggregate = self.aggregate()
+
+        old = self._old_counts(key)
+        if old is not None:
+            aggregate.subtract(old)
+        aggregate.update(counts)
+        self._dirty = True
+
+        sha256 = sha256 or self._hashes.pop(key, None) or file_sha256(file)
+        self._hashes.pop(key, None)
+        self._db.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, counts, outputs) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, stat.st_size, stat.st_mtime_ns, sha256, json.dumps(counts, ensure_ascii=False), outputs),
+        )
+
+    def remove(self, key: str) -> None:
+        # Retira um ficheiro do índice e as suas contagens do agregado.
+        old = self._old_counts(key)
+        if old is not None:
+            self.aggregate().subtract(old)
+            self._dirty = True
+        self._db.execute("DELETE FROM files WHERE path = ?", (key,))
+
+    def commit(self) -> None:
+        # Grava o agregado (só se foi alterado nesta execução) e confirma a transação.
+        if self._aggregate is not None and self._dirty:
+            self._db.execute("DELETE FROM aggregate")
+            self._db.executemany(
+                "INSERT INTO aggregate (word, count) VALUES (?, ?)",
+                ((word, count) for word, count in self._aggregate.items() if count > 0),
+            )
+            # Remove palavras que deixaram de existir no corpus.
+            self._aggregate = +self._aggregate
+            self._dirty = False
+        self._db.commit()
+
+    def file_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
@@ -0,0 +1,296 @@
+"""Ficheiro binário de contagens (.wcnt): o vocabulário completo e as contagens de uma análise.
+
+Serve para juntar resultados de várias execuções (app.py merge) sem voltar a ler e analisar os textos.
+
+Formato (inteiros little-endian, tudo alinhado a 8 bytes):
+
+    cabeçalho   magic b"WCNT", versão (u16), reservado (u16), nº de palavras N (u64),
+                posição da tabela de strings, do array de offsets e do array de contagens (3 x u64)
+    strings     as palavras em utf-8, seguidas, ordenadas por bytes (= ordem das str em Python)
+    offsets     N + 1 x u64: a palavra i está em strings[offsets[i]:offsets[i + 1]]
+    contagens   N x u64
+
+O ficheiro é lido com mmap: os arrays são vistas (memoryview) sobre o ficheiro, sem o carregar em
+memória, e como as palavras estão ordenadas dá para procurar uma palavra por pesquisa binária e
+juntar vários ficheiros com um merge k-way em streaming (tempo linear no total de palavras).
+"""
+from __future__ import annotations
+
+import heapq
+import mmap
+import struct
+import sys
+from array import array
+from itertools import count as counter, groupby
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from exporters import atomic_open
+from instrumentation import stage
+
+# Extensão dos ficheiros de contagens.
+SUFFIX = ".wcnt"
+
+MAGIC = b"WCNT"
+VERSION = 1
+
+# magic, versão, reservado, nº de palavras, posição das strings, dos offsets e das contagens.
+HEADER = struct.Struct("<4sHHQQQQ")
+
+# Nº de palavras lidas de cada vez ao percorrer um ficheiro.
+BLOCK_WORDS = 4096
+
+# Os arrays são gravados em little-endian; numa máquina big-endian são convertidos.
+_SWAP = sys.byteorder == "big"
+
+
+def _padding(size: int) -> bytes:
+    # Bytes a acrescentar para a próxima secção começar num múltiplo de 8.
+    return b"\0" * (-size % 8)
+
+
+class CountFileWriter:
+    """Escreve um ficheiro de contagens a partir de (palavra, contagem) já ordenados por palavra.
+
+    As strings vão diretamente para o ficheiro; só os offsets e as contagens ficam em memória
+    (arrays de inteiros, 16 bytes por palavra) até close() os escrever e completar o cabeçalho."""
+
+    def __init__(self, f) -> None:
+        self.f = f
+        self.offsets = array("Q", [0])
+        self.counts = array("Q")
+        self._last: bytes | None = None
+        f.write(b"\0" * HEADER.size)
+
+    def add(self, word: str, count: int) -> None:
+        data = word.encode("utf-8")
+        if self._last is not None and data <= self._last:
+            raise ValueError(f"palavras fora de ordem ou repetidas no ficheiro de contagens: {word!r}")
+        self._last = data
+        self.f.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+        self.counts.append(count)
+
+    def write_items(self, items: Iterable[tuple[str, int]]) -> None:
+        add = self.add
+        for word, count in items:
+            add(word, count)
+
+    def tee(self, items: Iterable[tuple[str, int]]) -> Iterator[tuple[str, int]]:
+        # Grava cada (palavra, contagem) e passa-o adiante (para outro consumidor na mesma passagem).
+        add = self.add
+        for word, count in items:
+            add(word, count)
+            yield word, count
+
+    def close(self) -> None:
+        # Offsets e contagens depois das strings (alinhados) e, por fim, o cabeçalho no início.
+        strings_size = self.offsets[-1]
+        self.f.write(_padding(strings_size))
+        offsets_at = HEADER.size + strings_size + len(_padding(strings_size))
+        counts_at = offsets_at + len(self.offsets) * 8
+        for values in (self.offsets, self.counts):
+            if _SWAP:
+                values.byteswap()
+            values.tofile(self.f)
+        self.f.seek(0)
+        self.f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.counts), HEADER.size, offsets_at, counts_at))
+
+
+def write_count_items(items: Iterable[tuple[str, int]], path: Path) -> int:
+    """Grava (palavra, contagem) já ordenados por palavra num ficheiro de contagens, de forma atómica.
+
+    Args:
+        items: (palavra, contagem) por ordem crescente de palavra, sem repetidas (pode ser um iterador).
+        path: Caminho do ficheiro.
+
+    Returns:
+        O número de palavras gravadas."""
+    with stage("write_counts") as s, atomic_open(Path(path), binary=True) as f:
+        writer = CountFileWriter(f)
+        writer.write_items(items)
+        writer.close()
+        s.add(bytes=f.tell(), tokens=len(writer.counts))
+    return len(writer.counts)
+
+
+def write_counts(counts: dict[str, int], path: Path) -> int:
+    """Grava um dicionário palavra -> contagem (ex.: AnalysisResult.counts) num ficheiro de contagens.
+
+    Args:
+        counts: Dicionário palavra -> contagem.
+        path: Caminho do ficheiro.
+
+    Returns:
+        O número de palavras gravadas."""
+    return write_count_items(sorted(counts.items()), path)
+
+
+class CountFile:
+    """Ficheiro de contagens aberto com mmap (usar com `with`).
+
+    len(f) é o nº de palavras, iter(f) dá (palavra, contagem) por ordem de palavra e
+    f.get(palavra) procura uma palavra por pesquisa binária."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"ficheiro de contagens inválido: {self.path}") from None
+
+        try:
+            self._read_header()
+        except ValueError:
+            self._mmap.close()
+            raise
+
+    def _read_header(self) -> None:
+        size = len(self._mmap)
+        if size < HEADER.size:
+            raise ValueError(f"ficheiro de contagens inválido: {self.path}")
+        magic, version, _, n, strings_at, offsets_at, counts_at = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"ficheiro de contagens inválido: {self.path}")
+        if version != VERSION:
+            raise ValueError(f"versão do ficheiro de contagens não suportada ({version}): {self.path}")
+        if offsets_at + (n + 1) * 8 > counts_at or counts_at + n * 8 > size:
+            raise ValueError(f"ficheiro de contagens truncado: {self.path}")
+
+        self._view = memoryview(self._mmap)
+        self._strings = self._view[strings_at:offsets_at]
+        self.offsets = self._array(offsets_at, n + 1)
+        self.counts = self._array(counts_at, n)
+
+    def _array(self, start: int, n: int):
+        # Vista sobre o ficheiro (sem cópia); numa máquina big-endian, cópia convertida.
+        data = self._view[start:start + n * 8]
+        if not _SWAP:
+            return data.cast("Q")
+        values = array("Q", data)
+        values.byteswap()
+        return values
+
+    def close(self) -> None:
+        # As vistas têm de ser libertadas antes de fechar o mmap.
+        for name in ("offsets", "counts", "_strings", "_view"):
+            value = self.__dict__.pop(name, None)
+            if isinstance(value, memoryview):
+                value.release()
+        self._mmap.close()
+
+    def __enter__(self) -> CountFile:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def word(self, index: int) -> str:
+        # Palavra na posição index (por ordem).
+        return bytes(self._strings[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+    def get(self, word: str, default: int = 0) -> int:
+        # Contagem de uma palavra (pesquisa binária sobre as strings ordenadas).
+        target = word.encode("utf-8")
+        strings, offsets = self._strings, self.offsets
+        lo, hi = 0, len(self.counts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            data = strings[offsets[mid]:offsets[mid + 1]]
+            if data == target:
+                return self.counts[mid]
+            if bytes(data) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return default
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        # (palavra, contagem) por ordem de palavra, lidos em blocos de BLOCK_WORDS.
+        n = len(self.counts)
+        for start in range(0, n, BLOCK_WORDS):
+            end = min(start + BLOCK_WORDS, n)
+            offsets = self.offsets[start:end + 1].tolist()
+            counts = self.counts[start:end].tolist()
+            base = offsets[0]
+            text = bytes(self._strings[base:offsets[-1]])
+            for i, count in enumerate(counts):
+                yield text[offsets[i] - base:offsets[i + 1] - base].decode("utf-8"), count
+
+
+def read_counts(path: Path | str) -> dict[str, int]:
+    # Lê um ficheiro de contagens inteiro para um dicionário palavra -> contagem.
+    with CountFile(path) as f:
+        return dict(f)
+
+
+def merge_count_files(paths: Iterable[Path | str]) -> Iterator[tuple[str, int]]:
+    """Junta vários ficheiros de contagens num só fluxo de (palavra, contagem) ordenado por palavra.
+
+    Merge k-way em streaming (heapq.merge sobre os ficheiros já ordenados): só uma palavra de
+    cada ficheiro está em memória de cada vez, e o tempo é linear no total de palavras (x log k).
+
+    Args:
+        paths: Caminhos dos ficheiros de contagens."""
+    files = [CountFile(path) for path in paths]
+    try:
+        merged = heapq.merge(*files, key=lambda item: item[0])
+        for word, group in groupby(merged, key=lambda item: item[0]):
+            yield word, sum(count for _, count in group)
+    finally:
+        for f in files:
+            f.close()
+
+
+def top_from_sorted(items: Iterable[tuple[str, int]], n: int | None) -> list[tuple[str, int]]:
+    """Top n de um fluxo de (palavra, contagem) ordenado por palavra, com a mesma ordenação que
+    text_analysis.sort_counts (contagem decrescente e, em empate, ordem alfabética).
+
+    Só guarda n palavras em memória (heapq.nlargest); com n=None ordena o vocabulário inteiro.
+
+    Args:
+        items: (palavra, contagem) por ordem crescente de palavra.
+        n: O número de palavras a retornar (None = todas)."""
+    if n is None:
+        return sorted(items, key=lambda item: -item[1])
+    if n <= 0:
+        return []
+    # As palavras chegam por ordem alfabética: em empate ganha a que chegou primeiro (menor posição).
+    seq = counter()
+    top = heapq.nlargest(n, ((count, -next(seq), word) for word, count in items))
+    return [(word, count) for count, _, word in top]
+
+
+def merge_files(paths: Iterable[Path | str], n: int | None, out: Path | None = None) -> tuple[list[tuple[str, int]], int]:
+    """Junta ficheiros de contagens numa só passagem: calcula o top n combinado e, se pedido,
+    grava o vocabulário combinado num novo ficheiro de contagens (de forma atómica).
+
+    Args:
+        paths: Caminhos dos ficheiros de contagens.
+        n: O número de palavras do top (None = todas).
+        out: Caminho do novo ficheiro de contagens (None = não gravar).
+
+    Returns:
+        (top n, nº de palavras distintas no vocabulário combinado)."""
+    total = 0
+
+    def counted(items):
+        nonlocal total
+        for item in items:
+            total += 1
+            yield item
+
+    merged = counted(merge_count_files(paths))
+    if out is None:
+        return top_from_sorted(merged, n), total
+
+    with stage("write_counts") as s, atomic_open(Path(out), binary=True) as f:
+        writer = CountFileWriter(f)
+        top = top_from_sorted(writer.tee(merged), n)
+        writer.close()
+        s.add(bytes=f.tell(), tokens=total)
+    return top, total
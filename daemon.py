@@ -0,0 +1,459 @@
+"""Daemon do app.py (--serve): um processo já aquecido que executa as análises pedidas por outros.
+
+Cada `python app.py ...` paga o arranque do interpretador, os imports e a configuração dos logs, o
+que em cron jobs com milhares de análises pequenas custa mais do que a própria análise. Com um daemon
+a correr (`python app.py --serve`), `python app.py ...` passa a ser um cliente fino: logo no início
+do app.py, antes de carregar os módulos da análise, envia os argumentos, o diretório atual e o stdin ao
+daemon por um socket UNIX e escreve o stdout/stderr e o código de saída que recebe. Sem daemon (ou sem
+socket UNIX / fork, ex.: Windows) a análise corre no próprio processo, como antes.
+
+Por isso este módulo só importa módulos leves ao nível do módulo; o resto é importado nas funções.
+
+O daemon carrega os módulos e configura os logs uma só vez; cada ligação é tratada num processo
+filho (fork), que herda tudo já carregado e corre app.main com os argumentos e as variáveis de
+ambiente do cliente (ex.: LOG_LEVEL). As variáveis lidas só no arranque do interpretador (PYTHON*)
+são as do daemon.
+
+O socket fica em $XDG_RUNTIME_DIR ou numa pasta só do utilizador (0700) na pasta temporária. O
+cliente só usa um socket que seja do próprio utilizador e cujo processo do outro lado também seja
+(SO_PEERCRED, onde existir); senão avisa e corre no próprio processo. O daemon recusa ligações de
+outros utilizadores.
+
+Protocolo: mensagens com um cabeçalho (tipo, 1 byte; tamanho, u32 big-endian) e o conteúdo.
+    cliente -> daemon   V  variáveis de ambiente ("nome=valor", separadas por \0)
+                        A  diretório e argumentos (utf-8, separados por \0)   I  bloco do stdin (vazio = fim)
+    daemon -> cliente   P  pid do filho (para o Ctrl+C)      O/E  bloco do stdout/stderr
+                        X  código de saída (i32)
+"""
+from __future__ import annotations
+
+import io
+import os
+import stat
+import struct
+import sys
+
+# Variável de ambiente com o caminho do socket (default: SOCKET_NAME em $XDG_RUNTIME_DIR ou, sem ela,
+# em SOCKET_DIR na pasta temporária, uma pasta só do utilizador).
+SOCKET_ENV = "TEXT_ANALYSIS_SOCKET"
+SOCKET_NAME = "text-analysis.sock"
+SOCKET_DIR = "text-analysis-{uid}"
+
+# Cabeçalho de cada mensagem: tipo e tamanho do conteúdo.
+FRAME = struct.Struct("!cI")
+EXIT_CODE = struct.Struct("!i")
+
+ENV = b"V"
+ARGS = b"A"
+STDIN = b"I"
+PID = b"P"
+STDOUT = b"O"
+STDERR = b"E"
+EXIT = b"X"
+
+# Tamanho máximo de cada bloco do stdin enviado pelo cliente.
+STDIN_BLOCK = 64 * 1024
+
+# Segundos entre recolhas dos filhos terminados, quando não há ligações novas.
+REAP_SECONDS = 1.0
+
+# Módulos carregados pelo daemon antes de aceitar ligações (os que app.py só importa quando precisa).
+WARM_MODULES = ("csv", "gzip", "batch", "countfile", "follow", "pipeline", "sketch")
+
+
+def socket_path() -> str:
+    # Caminho do socket: TEXT_ANALYSIS_SOCKET, $XDG_RUNTIME_DIR (já só do utilizador) ou uma pasta
+    # do utilizador na pasta temporária (criada com 0700 pelo daemon).
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, SOCKET_NAME)
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(os.environ.get("TMPDIR", "/tmp"), SOCKET_DIR.format(uid=uid), SOCKET_NAME)
+
+
+def peer_uid(sock) -> int | None:
+    # Utilizador do processo do outro lado de um socket UNIX (None se o sistema não o disponibiliza).
+    import socket
+
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = struct.Struct("3i")  # struct ucred: pid, uid, gid
+    _, uid, _ = creds.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, creds.size))
+    return uid
+
+
+def encode_env(env: dict[str, str]) -> bytes:
+    # Variáveis de ambiente numa só mensagem ("nome=valor" separados por \0, como em /proc/<pid>/environ).
+    return "\0".join(f"{name}={value}" for name, value in env.items()).encode("utf-8", "surrogateescape")
+
+
+def decode_env(data: bytes) -> dict[str, str]:
+    if not data:
+        return {}
+    return dict(item.split("=", 1) for item in data.decode("utf-8", "surrogateescape").split("\0"))
+
+
+def encode_args(cwd: str, argv: list[str]) -> bytes:
+    # Diretório e argumentos numa só mensagem (surrogateescape: argumentos com bytes inválidos passam intactos).
+    return "\0".join([cwd, *argv]).encode("utf-8", "surrogateescape")
+
+
+def decode_args(data: bytes) -> tuple[str, list[str]]:
+    cwd, *argv = data.decode("utf-8", "surrogateescape").split("\0")
+    return cwd, argv
+
+
+def send_frame(sock, kind: bytes, data: bytes = b"") -> None:
+    sock.sendall(FRAME.pack(kind, len(data)) + data)
+
+
+def read_frame(f) -> tuple[bytes | None, bytes]:
+    # Lê uma mensagem de um ficheiro binário (sock.makefile("rb")); (None, b"") se a ligação fechou.
+    header = f.read(FRAME.size)
+    if len(header) < FRAME.size:
+        return None, b""
+    kind, size = FRAME.unpack(header)
+    data = f.read(size)
+    if len(data) < size:
+        return None, b""
+    return kind, data
+
+
+class _FrameWriter(io.RawIOBase):
+    # Stream que envia cada escrita como uma mensagem de um tipo (stdout/stderr do filho).
+    # O lock evita misturar mensagens escritas por threads diferentes (ex.: logs).
+
+    def __init__(self, sock, kind: bytes, lock: threading.Lock) -> None:
+        self.sock = sock
+        self.kind = kind
+        self.lock = lock
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        with self.lock:
+            send_frame(self.sock, self.kind, bytes(data))
+        return len(data)
+
+
+class _FrameReader(io.RawIOBase):
+    # Stream com os blocos do stdin enviados pelo cliente (stdin do filho).
+
+    def __init__(self, f) -> None:
+        self.f = f
+        self.pending = b""
+        self.eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending and not self.eof:
+            kind, data = read_frame(self.f)
+            if kind is None or (kind == STDIN and not data):
+                self.eof = True
+            elif kind == STDIN:
+                self.pending = data
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def run_main(argv: list[str]) -> int:
+    # Corre app.main como na linha de comandos: SystemExit (ex.: argparse) e exceções dão um código de saída.
+    from app import main
+
+    try:
+        return main(argv)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+def handle_connection(conn) -> int:
+    # Trata uma ligação (no processo filho): liga o stdin/stdout/stderr ao socket e corre app.main.
+    import threading
+
+    rfile = conn.makefile("rb")
+    kind, data = read_frame(rfile)
+    if kind == ENV:
+        # O ambiente do cliente substitui o do daemon (ex.: LOG_LEVEL lido por setup_logging).
+        os.environ.clear()
+        os.environ.update(decode_env(data))
+        kind, data = read_frame(rfile)
+    if kind != ARGS:
+        return 1
+    cwd, argv = decode_args(data)
+
+    send_frame(conn, PID, EXIT_CODE.pack(os.getpid()))
+    lock = threading.Lock()
+    sys.stdin = io.TextIOWrapper(io.BufferedReader(_FrameReader(rfile)), encoding="utf-8")
+    sys.stdout = io.TextIOWrapper(io.BufferedWriter(_FrameWriter(conn, STDOUT, lock)), encoding="utf-8")
+    sys.stderr = io.TextIOWrapper(
+        io.BufferedWriter(_FrameWriter(conn, STDERR, lock)), encoding="utf-8", line_buffering=True
+    )
+
+    try:
+        # Os caminhos relativos (input, outputs, logs) são os do cliente.
+        os.chdir(cwd)
+        if argv and argv[0] == "--serve":
+            print("--serve não pode ser pedido a um daemon", file=sys.stderr)
+            code = 1
+        else:
+            code = run_main(argv)
+    finally:
+        from logging_setup import flush_logging
+
+        flush_logging()
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    send_frame(conn, EXIT, EXIT_CODE.pack(code))
+    return code
+
+
+def warm_up() -> None:
+    # Carrega os módulos que as análises vão usar e configura os logs (herdados por cada filho).
+    import importlib
+
+    import app
+
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+    app.setup_logging()
+
+
+def _reap_children() -> None:
+    # Recolhe os filhos que já terminaram (sem isto ficavam como processos zombie).
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except ChildProcessError:
+        pass
+
+
+def _prepare_dir(directory: Path) -> None:
+    # Pasta do socket: criada só para o utilizador (0700) se não existir. É recusada se for de outro
+    # utilizador ou se outros puderem escrever nela sem sticky bit (podiam trocar o socket).
+    try:
+        directory.mkdir(mode=0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid not in (os.getuid(), 0):
+        raise RuntimeError(f"a pasta do socket não pertence a este utilizador: {directory}")
+    if st.st_mode & 0o022 and not st.st_mode & stat.S_ISVTX:
+        raise RuntimeError(f"outros utilizadores podem escrever na pasta do socket: {directory}")
+
+
+def serve(path: Path | str | None = None) -> None:
+    """Aceita ligações no socket até receber SIGTERM ou Ctrl+C; cada ligação corre num filho (fork).
+
+    Args:
+        path: Caminho do socket (default: socket_path())."""
+    import logging
+    import signal
+    import socket
+    import traceback
+    from pathlib import Path
+
+    path = Path(path if path is not None else socket_path())
+    _prepare_dir(path.parent)
+    warm_up()
+
+    # Um socket que sobrou de um daemon que já não corre é apagado; um daemon ativo não é substituído.
+    if path.exists():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(path))
+            except OSError:
+                path.unlink()
+            else:
+                raise RuntimeError(f"já existe um daemon em {path}")
+
+    # SIGTERM e Ctrl+C só marcam o fim: o ciclo termina no próximo accept (até REAP_SECONDS depois).
+    # Uma exceção lançada pelo handler podia interromper o fork a meio (com o lock do logging preso).
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # O socket é criado já com 0600 (umask), sem um intervalo em que outros se podiam ligar.
+    umask = os.umask(0o177)
+    try:
+        server.bind(str(path))
+    finally:
+        os.umask(umask)
+    server.listen(64)
+    server.settimeout(REAP_SECONDS)
+    previous = {signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    logging.info("Daemon à escuta em %s (pid %d)", path, os.getpid())
+
+    try:
+        while not stopping:
+            _reap_children()
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+
+            uid = peer_uid(conn)
+            if uid is not None and uid != os.getuid():
+                logging.warning("Ligação recusada de outro utilizador (uid %d)", uid)
+                conn.close()
+                continue
+
+            pid = os.fork()
+            if pid == 0:
+                # Filho: trata a ligação e termina sem voltar ao ciclo do daemon.
+                code = 1
+                try:
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    signal.signal(signal.SIGINT, signal.default_int_handler)
+                    server.close()
+                    conn.settimeout(None)
+                    code = handle_connection(conn)
+                except BaseException:
+                    traceback.print_exc()
+                finally:
+                    os._exit(code)
+            conn.close()
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        server.close()
+        path.unlink(missing_ok=True)
+        logging.info("Daemon terminado: %s", path)
+
+
+def _pump_stdin(sock) -> None:
+    # Envia o stdin do cliente ao daemon em blocos, e o fim (bloco vazio) quando acabar.
+    source = sys.stdin.buffer if sys.stdin is not None and not sys.stdin.isatty() else None
+    try:
+        while source is not None and (data := source.read1(STDIN_BLOCK)):
+            send_frame(sock, STDIN, data)
+        send_frame(sock, STDIN)
+    except (OSError, ValueError):
+        # O filho já terminou (ligação fechada) ou o stdin foi fechado.
+        pass
+
+
+def run_client(argv: list[str], path: str | None = None) -> int | None:
+    """Executa os argumentos no daemon e escreve o seu stdout/stderr.
+
+    Args:
+        argv: Argumentos da linha de comandos (como em app.main).
+        path: Caminho do socket (default: socket_path()).
+
+    Returns:
+        O código de saída, ou None se não houver daemon (a análise deve correr no próprio processo)."""
+    path = path if path is not None else socket_path()
+    if not hasattr(os, "fork"):
+        return None
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    # Um socket de outro utilizador recebia os argumentos, o stdin e o ambiente e podia responder o que quisesse.
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        print(f"Aviso: a ignorar {path} (não é um socket deste utilizador)", file=sys.stderr)
+        return None
+
+    # (import aqui: sem daemon, o cliente não carrega socket)
+    import signal
+    import socket
+    import threading
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        # Socket de um daemon que já não corre.
+        sock.close()
+        return None
+
+    uid = peer_uid(sock)
+    if uid is not None and uid != os.getuid():
+        print(f"Aviso: a ignorar {path} (o daemon é de outro utilizador)", file=sys.stderr)
+        sock.close()
+        return None
+
+    with sock:
+        send_frame(sock, ENV, encode_env(dict(os.environ)))
+        send_frame(sock, ARGS, encode_args(os.getcwd(), argv))
+        threading.Thread(target=_pump_stdin, args=(sock,), daemon=True).start()
+
+        rfile = sock.makefile("rb")
+        outputs = {STDOUT: sys.stdout, STDERR: sys.stderr}
+        child = None
+        while True:
+            try:
+                kind, data = read_frame(rfile)
+            except KeyboardInterrupt:
+                # Ctrl+C no cliente: o filho recebe-o também (ex.: --follow mostra o top final e termina).
+                if child is None:
+                    return 130
+                os.kill(child, signal.SIGINT)
+                child = None
+                continue
+
+            if kind is None:
+                print("Erro: a ligação ao daemon terminou sem código de saída", file=sys.stderr)
+                return 1
+            if kind == PID:
+                child = EXIT_CODE.unpack(data)[0]
+            elif kind == EXIT:
+                return EXIT_CODE.unpack(data)[0]
+            elif kind in outputs:
+                stream = outputs[kind]
+                stream.flush()
+                stream.buffer.write(data)
+                stream.buffer.flush()
+
+
+def client_main() -> None:
+    # Chamado no início do app.py (executado como script): se houver um daemon, a execução é feita
+    # por ele e o processo termina com o seu código de saída; senão volta e o app.py corre normalmente.
+    argv = sys.argv[1:]
+    if argv and argv[0] == "--serve":
+        return
+    code = run_client(argv)
+    if code is not None:
+        raise SystemExit(code)
+
+
+def serve_main(argv: list[str]) -> int:
+    # Modo "--serve [--socket PATH]" (chamado por app.main).
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(prog="app.py --serve", description="Daemon que executa as análises do app.py.")
+    parser.add_argument("--socket", help=f"Caminho do socket UNIX (default: {SOCKET_ENV} ou {socket_path()})")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        print("--serve precisa de fork e de sockets UNIX (não disponível neste sistema)")
+        return 1
+
+    path = Path(args.socket) if args.socket else socket_path()
+    try:
+        print(f"Daemon à escuta em {path} (Ctrl+C para terminar)", flush=True)
+        serve(path)
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}")
+        return 1
+    return 0
@@ -0,0 +1,257 @@
+"""Escrita dos resultados (relatório .txt, CSV, JSON e NDJSON) em streaming e de forma atómica.
+
+- Os writers recebem as linhas (rank, palavra, contagem) de um iterador, em blocos, sem construir
+  listas de dicionários nem o texto inteiro em memória (dá para exportar vocabulários completos).
+- Vários formatos são escritos numa só passagem pelos items: cada bloco é passado a todos os writers.
+- Cada ficheiro é escrito num temporário na mesma pasta, passado ao disco (fsync) e só no fim substitui
+  o destino (os.replace), por isso uma falha a meio (ou uma falha de energia) nunca deixa um ficheiro
+  vazio ou truncado no lugar do anterior.
+- Opcionalmente os ficheiros são comprimidos com gzip (sufixo .gz).
+
+O formato de cada ficheiro é igual ao que era escrito antes (json.dump com indent=2, csv.writer, ...).
+Com errors=True (contagens aproximadas, ver sketch.py) os items são (palavra, contagem, erro) e cada
+formato tem também o erro máximo de cada contagem.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+from collections.abc import Iterable
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from pathlib import Path
+
+from instrumentation import stage
+
+# Formatos suportados e a extensão de cada um.
+SUFFIXES = {"txt": ".txt", "csv": ".csv", "json": ".json", "jsonl": ".jsonl"}
+
+# Nº de linhas passadas de cada vez aos writers.
+BLOCK_ROWS = 4096
+
+_dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def output_path(path: Path, compress: bool = False) -> Path:
+    # Caminho final de um ficheiro (com .gz acrescentado se for comprimido).
+    return path.with_name(path.name + ".gz") if compress else path
+
+
+@contextmanager
+def atomic_open(path: Path, compress: bool = False, newline: str | None = None, binary: bool = False):
+    """Abre um ficheiro de texto (utf-8) para escrita atómica: escreve num temporário na mesma pasta
+    e, se tudo correr bem, passa-o ao disco (fsync) e substitui o destino com os.replace (em POSIX é
+    também feito o fsync da pasta, para a substituição sobreviver a uma falha de energia); se houver
+    erro, apaga o temporário.
+
+    Args:
+        path: Caminho final (sem o .gz; é acrescentado se compress=True).
+        compress: Comprimir com gzip.
+        newline: Como em open() (o CSV usa newline="").
+        binary: Dar o ficheiro em modo binário (com seek) em vez de texto; não pode ser comprimido."""
+    path = output_path(path, compress)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.urandom(4).hex()}.tmp")
+
+    # (descritor aberto à parte: os writers fecham o ficheiro, mas o fsync é feito depois)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with open(fd, "wb", closefd=False) as raw:
+            if binary:
+                yield raw
+            else:
+                if compress:
+                    # (import aqui: gzip só é carregado com --gzip)
+                    import gzip
+
+                    # mtime=0: o mesmo conteúdo dá sempre o mesmo .gz.
+                    stream = gzip.GzipFile(path.stem, "wb", fileobj=raw, mtime=0)
+                else:
+                    stream = raw
+                with io.TextIOWrapper(stream, encoding="utf-8", newline=newline) as f:
+                    yield f
+        os.fsync(fd)
+        os.close(fd)
+        fd = None
+        os.replace(tmp, path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        tmp.unlink(missing_ok=True)
+        raise
+    if os.name == "posix":
+        _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: Path) -> None:
+    # Passa ao disco a entrada da pasta (o nome novo do ficheiro depois do os.replace).
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class TxtWriter:
+    """Relatório de texto (mesmo formato que text_analysis.format_top_words; com erros: "-> 12 (±3)")."""
+
+    newline = None
+
+    def __init__(self, f: io.TextIOBase, n: int, errors: bool = False) -> None:
+        self.f = f
+        self.errors = errors
+        f.write(f"Top {n} palavras mais comuns:\n")
+
+    def write_rows(self, rows: list[tuple[int, str, int]]) -> None:
+        if self.errors:
+            self.f.write("".join([f"{rank}. {word} -> {count} (±{error})\n" for rank, word, count, error in rows]))
+        else:
+            self.f.write("".join([f"{rank}. {word} -> {count}\n" for rank, word, count in rows]))
+
+    def close(self) -> None:
+        pass
+
+
+class CsvWriter:
+    """CSV com cabeçalho rank,word,count (com erros: rank,word,count,error)."""
+
+    newline = ""
+
+    def __init__(self, f: io.TextIOBase, n: int, errors: bool = False) -> None:
+        # (import aqui: csv só é carregado quando se pede CSV)
+        import csv
+
+        self.writer = csv.writer(f)
+        self.writer.writerow(["rank", "word", "count", "error"] if errors else ["rank", "word", "count"])
+
+    def write_rows(self, rows: list[tuple[int, str, int]]) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        pass
+
+
+class JsonWriter:
+    """JSON com a lista de {"rank", "word", "count"}, byte a byte igual a json.dump(..., indent=2,
+    ensure_ascii=False). Com extras (ex.: stats, profile) escreve {"items": [...], <extras>}.
+    Com erros cada item tem também "error"."""
+
+    newline = None
+
+    def __init__(self, f: io.TextIOBase, n: int, extras: dict | None = None, errors: bool = False) -> None:
+        self.f = f
+        self.extras = extras or {}
+        self.errors = errors
+        self.first = True
+        # Indentação dos items: dentro de "items" ficam mais 2 espaços para a direita.
+        self.indent = "  " if self.extras else ""
+        f.write('{\n  "items": [' if self.extras else "[")
+
+    def write_rows(self, rows: list[tuple[int, str, int]]) -> None:
+        if not rows:
+            return
+        i = self.indent
+        if self.errors:
+            text = ",".join([
+                f'\n{i}  {{\n{i}    "rank": {rank},\n{i}    "word": {_dumps(word)},\n{i}    "count": {count},'
+                f'\n{i}    "error": {error}\n{i}  }}'
+                for rank, word, count, error in rows
+            ])
+        else:
+            text = ",".join([
+                f'\n{i}  {{\n{i}    "rank": {rank},\n{i}    "word": {_dumps(word)},\n{i}    "count": {count}\n{i}  }}'
+                for rank, word, count in rows
+            ])
+        self.f.write(text if self.first else "," + text)
+        self.first = False
+
+    def close(self) -> None:
+        # Fecha a lista (vazia: "[]", como o json.dump) e escreve os extras.
+        self.f.write("]" if self.first else f"\n{self.indent}]")
+        if self.extras:
+            for key, value in self.extras.items():
+                body = json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+                self.f.write(f",\n  {_dumps(key)}: {body}")
+            self.f.write("\n}")
+
+
+class NdjsonWriter:
+    """NDJSON: um objeto {"rank", "word", "count"} por linha (com erros também "error")."""
+
+    newline = None
+
+    def __init__(self, f: io.TextIOBase, n: int, errors: bool = False) -> None:
+        self.f = f
+        self.errors = errors
+
+    def write_rows(self, rows: list[tuple[int, str, int]]) -> None:
+        if self.errors:
+            self.f.write("".join([
+                f'{{"rank": {rank}, "word": {_dumps(word)}, "count": {count}, "error": {error}}}\n'
+                for rank, word, count, error in rows
+            ]))
+            return
+        self.f.write("".join([
+            f'{{"rank": {rank}, "word": {_dumps(word)}, "count": {count}}}\n' for rank, word, count in rows
+        ]))
+
+    def close(self) -> None:
+        pass
+
+
+WRITERS = {"txt": TxtWriter, "csv": CsvWriter, "json": JsonWriter, "jsonl": NdjsonWriter}
+
+
+def iter_rows(items: Iterable[tuple[str, int]], start: int = 1):
+    # Blocos de até BLOCK_ROWS linhas (rank, palavra, contagem[, erro]), com o rank a começar em start
+    # (ex.: numa página do vocabulário, o rank da primeira palavra da página).
+    rows = ((rank, *item) for rank, item in enumerate(items, start))
+    while block := list(islice(rows, BLOCK_ROWS)):
+        yield block
+
+
+def write_outputs(
+    items: Iterable[tuple[str, int]],
+    paths: dict[str, Path],
+    n: int,
+    compress: bool = False,
+    extras: dict | None = None,
+    streams: dict[str, io.TextIOBase] | None = None,
+    errors: bool = False,
+) -> dict[str, Path]:
+    """Escreve os items em vários formatos numa só passagem, cada ficheiro de forma atómica.
+
+    Args:
+        items: (palavra, contagem) já ordenados (pode ser um iterador).
+        paths: Formato ("txt", "csv", "json", "jsonl") -> caminho final.
+        n: O número de palavras pedido (usado no título do relatório .txt).
+        compress: Comprimir os ficheiros com gzip.
+        extras: Secções extra do JSON (ex.: {"stats": ..., "profile": ...}).
+        streams: Formato -> stream já aberto onde escrever também (ex.: {"txt": sys.stdout}).
+        errors: Os items são (palavra, contagem, erro) e o erro é escrito em todos os formatos.
+
+    Returns:
+        Formato -> caminho final de cada ficheiro escrito."""
+    with ExitStack() as stack:
+        writers = []
+        for fmt, path in paths.items():
+            f = stack.enter_context(atomic_open(path, compress, WRITERS[fmt].newline))
+            writer = JsonWriter(f, n, extras, errors) if fmt == "json" else WRITERS[fmt](f, n, errors)
+            writers.append((f"write_{fmt}", writer))
+        for fmt, f in (streams or {}).items():
+            writers.append((f"write_{fmt}", WRITERS[fmt](f, n, errors=errors)))
+
+        tokens = 0
+        for rows in iter_rows(items):
+            tokens += len(rows)
+            for name, writer in writers:
+                with stage(name):
+                    writer.write_rows(rows)
+
+        for name, writer in writers:
+            with stage(name) as s:
+                writer.close()
+                s.add(tokens=tokens)
+
+    return {fmt: output_path(path, compress) for fmt, path in paths.items()}
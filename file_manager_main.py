@@ -1,10 +1,10 @@
-from text_analysis import top_words, top_words_format
+from text_analysis import WordIndex, analyze_text, format_top_words
+from exporters import write_outputs
 from pathlib import Path
 import logging
 import csv
 import json
-
-LOG_PATH = Path("logs") / "app.log"
+from logging_setup import LOG_PATH, setup_logging #Configuração de logging partilhada com app.py e api.py (escrita numa thread à parte, com rotação e sem handlers duplicados)
 
 def read_text_file(file_path: str) -> str:
     try:
@@ -55,30 +55,6 @@ def save_json(items: list[tuple[str, int]], path: Path) -> None:
     with path.open("w", encoding="utf-8") as file:
         json.dump(data, file, ensure_ascii=False, indent=2)
             
-def setup_logging() -> None:
-    LOG_PATH.parent.mkdir(parents=True, exist_ok=True) #cria a pasta logs/ se não existir
-
-    logger = logging.getLogger() #Obtém o logger raiz para configurar os handlers e o nível de logging. O logger raiz é usado para garantir que todas as mensagens de log sejam capturadas, independentemente do módulo ou parte do código onde são geradas.
-    logger.setLevel(logging.INFO) #Define o nível de logging para INFO, o que significa que mensagens de nível INFO e superiores (WARNING, ERROR, CRITICAL) serão registradas. Isso é necessário para garantir que as mensagens de log relevantes sejam capturadas e registradas no ficheiro de log e na consola, facilitando a identificação de eventos importantes e problemas durante a execução do programa.
-
-    # limpa handlers antigos (útil no VS Code)
-    logger.handlers.clear()
-
-    fmt = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s") #Cria um objeto Formatter para definir o formato das mensagens de log, incluindo a data e hora, o nível de log e a mensagem. Isso é necessário para garantir que as mensagens de log sejam formatadas de maneira consistente e informativa, facilitando a leitura e a análise dos logs.
-
-    # 1) Log para ficheiro (INFO e acima)
-    file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(fmt)
-
-    # 2) Log para consola (WARNING e acima)
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.WARNING)
-    console_handler.setFormatter(fmt)
-
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-                
 #def menu() -> str:
 def menu() -> tuple[str, str]:
     while True:
@@ -110,6 +86,85 @@ def menu() -> tuple[str, str]:
         print("Opção inválida. Por favor, escolha 1 ou 2.\n") #Exibe uma mensagem de erro indicando que a opção escolhida é inválida
         continue #Continua o loop para solicitar ao user que escolha uma opção válida
 
+DEFAULT_N = 10 #Número de palavras mostrado no início da sessão (muda com o comando "top N").
+
+HELP = """Comandos:
+  top N             - mostrar as N palavras mais comuns (e passar a usar este N)
+  palavra P         - contagem da palavra P
+  prefixo P [LIM]   - palavras começadas por P (no máximo LIM)
+  min C             - palavras com contagem >= C
+  guardar [CAMINHO] - guardar a última lista em .txt, .csv e .json
+  ajuda             - mostrar esta ajuda
+  sair              - terminar"""
+
+def export_items(items: list[tuple[str, int]], path: Path, n: int) -> dict[str, Path]:
+    #Guarda os items (já calculados pelo índice, sem recontar o texto) no relatório .txt, no .csv e no .json com o mesmo nome, numa só passagem e de forma atómica (ver exporters.py)
+    if path.suffix == "": #Se o caminho não tem extensão (é uma pasta), o relatório é guardado como report.txt dentro dela
+        path = path / "report.txt"
+    paths = {fmt: path.with_suffix(suffix) for fmt, suffix in (("txt", ".txt"), ("csv", ".csv"), ("json", ".json"))}
+    written = write_outputs(items, paths, n) #Escreve os três formatos a partir da mesma lista
+    for fmt, saved in written.items():
+        logging.info("%s guardado em: %s", fmt.upper(), saved) #Regista onde cada ficheiro foi guardado
+    return written
+
+def session(index: WordIndex, default_output: Path, read=input, write=print) -> None:
+    """Sessão interativa sobre um índice já construído: cada comando é respondido pelo índice, sem recontar o texto.
+
+    Args:
+        index: O índice das contagens do texto (ver text_analysis.WordIndex).
+        default_output: Caminho usado pelo comando "guardar" quando não é dado outro.
+        read: Função que lê cada comando (default: input).
+        write: Função que mostra cada resposta (default: print)."""
+    n = DEFAULT_N #N atual (usado pelo "top" sem número e no título dos relatórios guardados)
+    items = index.top(n) #Última lista mostrada (é esta que o comando "guardar" exporta)
+    title = n #Número usado no título do relatório da última lista
+    write(HELP)
+    while True:
+        try:
+            line = read("> ").strip()
+        except (EOFError, KeyboardInterrupt): #Fim do input (ou Ctrl+C) termina a sessão
+            write("")
+            break
+        command, _, arg = line.partition(" ") #Separa o comando do argumento
+        command, arg = command.lower(), arg.strip()
+        logging.info("Comando: %s", line) #Regista cada comando para facilitar o acompanhamento da sessão nos logs
+        try:
+            if command in ("sair", "q", "quit"):
+                break
+            elif command == "":
+                continue
+            elif command == "ajuda":
+                write(HELP)
+            elif command == "top":
+                if arg:
+                    n = int(arg)
+                    if n <= 0:
+                        raise ValueError
+                items, title = index.top(n), n #O top N é um prefixo do vocabulário já ordenado pelo índice
+                write(format_top_words(items, n))
+            elif command == "palavra" and arg:
+                write(f"{arg} -> {index.count(arg)}")
+            elif command == "prefixo" and arg:
+                prefix, _, limit = arg.partition(" ")
+                items = index.prefix(prefix, int(limit) if limit.strip() else None) #Procura com bisect no vocabulário por ordem alfabética
+                title = len(items)
+                write("\n".join(f"{word} -> {count}" for word, count in items) or "Nenhuma palavra com esse prefixo.")
+            elif command == "min" and arg:
+                items = index.at_least(int(arg)) #Prefixo do vocabulário ordenado por contagem
+                title = len(items)
+                write(format_top_words(items, title) if items else "Nenhuma palavra com essa contagem.")
+            elif command == "guardar":
+                path = Path(arg) if arg else default_output
+                written = export_items(items, path, title) #Exporta a última lista, já calculada pelo índice
+                write("Guardado em: " + ", ".join(str(saved) for saved in written.values()))
+            else:
+                write("Comando inválido. Escreva \"ajuda\" para ver os comandos.")
+        except ValueError: #Números inválidos (ex.: "top abc" ou "min -")
+            write("Número inválido.")
+        except OSError as e: #Erros ao guardar (ex.: pasta sem permissões)
+            logging.error("Erro ao guardar: %s", e)
+            write(f"Erro ao guardar: {e}")
+
 if __name__ == "__main__":
     try:
         setup_logging() #Chama a função setup_logging para configurar o logging, garantindo que as mensagens de log sejam registradas em um ficheiro de log específico
@@ -121,26 +176,21 @@ if __name__ == "__main__":
         if not txt.strip(): #Verifica se o texto obtido do menu está vazio (após remover espaços em branco) e, se estiver, imprime uma mensagem indicando que nenhum texto foi fornecido e encerra o programa. Caso contrário, continua com o processamento do texto para obter as palavras mais comuns e salvar os resultados.
             print("Nenhum texto fornecido.") #Exibe uma mensagem indicando que nenhum texto foi fornecido
             raise SystemExit(0) #Encerra o programa com um código de saída 0, indicando que a execução foi bem-sucedida, mas sem processar nenhum texto devido à falta de entrada válida.
-        report = top_words_format(txt, 10) #Chama a função top_words_format para obter as 10 palavras mais comuns e suas contagens a partir do texto obtido do menu, e armazena o resultado formatado na variável report
+        result = analyze_text(txt) #Chama a função analyze_text para contar as palavras do texto obtido do menu uma só vez
+        index = WordIndex(result) #Constrói o índice (vocabulário ordenado por contagem e por ordem alfabética) uma só vez; o relatório, os ficheiros e os comandos da sessão usam-no sem recontar
+        report = format_top_words(index.top(DEFAULT_N), DEFAULT_N) #Obtém o relatório formatado com as 10 palavras mais comuns e suas contagens a partir do índice
         print(report) #Imprime o relatório formatado contendo as 10 palavras mais comuns e suas contagens
     
         if opt == "1": #Verifica se a opção escolhida foi a de inserir texto manualmente
             user_path = input(f"Caminho para guardar (Enter = {default_output}): ").strip() #Lê o caminho onde o user deseja salvar o relatório, permitindo que ele pressione Enter para usar o caminho padrão definido por DEFAULT_OUTPUT. A função strip() é usada para garantir que a entrada do user seja limpa de espaços em branco antes de ser processada.
             output_path = Path(user_path) if user_path else default_output #Define o caminho de saída para salvar o relatório, usando o caminho fornecido pelo user se ele não for vazio, ou o caminho padrão DEFAULT_OUTPUT caso contrário. Isso permite que o user escolha onde deseja salvar o relatório, com a opção de usar um caminho padrão se preferir.
-
-            if output_path.suffix == "": #Verifica se o caminho de saída não tem uma extensão de ficheiro (ou seja, se é um diretório) e, se for o caso, adiciona "report.txt" ao caminho para garantir que o relatório seja salvo como um ficheiro de texto dentro do diretório especificado. Isso é necessário para evitar erros ao tentar salvar o relatório em um diretório sem especificar um nome de ficheiro.
-                output_path = output_path / "report.txt" #Adiciona "report.txt" ao caminho de saída se ele não tiver uma extensão de ficheiro, garantindo que o relatório seja salvo como um ficheiro de texto dentro do diretório especificado. Isso é necessário para evitar erros ao tentar salvar o relatório em um diretório sem especificar um nome de ficheiro.
-
-            save_report(report, output_path) #Chama a função save_report para salvar o relatório formatado no ficheiro especificado por outputPath, garantindo que a pasta de destino exista e usando encoding UTF-8
-            save_csv(top_words(txt, 10), output_path.with_suffix(".csv")) #Chama a função save_csv para salvar as 10 palavras mais comuns e suas contagens em um ficheiro CSV, usando o mesmo caminho de saída do relatório, mas com a extensão ".csv". Isso permite que os resultados sejam salvos em ambos os formatos, texto e CSV, para facilitar a análise e o compartilhamento dos dados.
-            logging.info("Relatório guardado em: %s", output_path) #Regista uma mensagem de log indicando que o relatório foi salvo, incluindo o caminho do ficheiro para facilitar a identificação do processo de salvamento nos logs
-            logging.info("CSV guardado em: %s", output_path.with_suffix('.csv')) #Regista uma mensagem de log indicando que o ficheiro CSV foi salvo, incluindo o caminho do ficheiro para facilitar a identificação do processo de salvamento nos logs
-            logging.info("JSON guardado em: %s", output_path.with_suffix('.json')) #Regista uma mensagem de log indicando que o ficheiro JSON foi salvo, incluindo o caminho do ficheiro para facilitar a identificação do processo de salvamento nos logs
-            print(f"Relatório guardado em: {output_path}, CSV em: {output_path.with_suffix('.csv')} e em: {output_path.with_suffix('.json')}") #Exibe uma mensagem indicando o caminho onde o relatório foi salvo, para informar ao user que o processo de salvamento foi concluído com sucesso
-    
+            written = export_items(index.top(DEFAULT_N), output_path, DEFAULT_N) #Guarda o relatório, o CSV e o JSON a partir do mesmo top 10 do índice (sem recontar o texto)
+            print("Relatório guardado em: " + ", ".join(str(saved) for saved in written.values())) #Exibe uma mensagem indicando os caminhos onde os ficheiros foram salvos
         else:
             logging.info("Modo leitura.") #Regista uma mensagem de log indicando que o modo de leitura foi selecionado, para facilitar a identificação do processo de escolha nos logs
             print("Modo leitura.")
+
+        session(index, default_output) #Sessão interativa: mudar o N, procurar palavras, prefixos e contagens mínimas e exportar, tudo a partir do índice
     except Exception:
         logging.exception("Erro inesperado")
         raise
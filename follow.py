@@ -0,0 +1,247 @@
+"""Modo follow do app.py: acompanha um ficheiro que vai crescendo (ex.: logs), como `tail -F`.
+
+Só os bytes acrescentados desde a última leitura são lidos e contados (nunca se relê o ficheiro).
+Se o ficheiro for rodado (outro ficheiro com o mesmo nome, ex.: logrotate) ou truncado, a leitura
+recomeça no início do ficheiro novo, sem perder as contagens já feitas.
+
+De --interval em --interval segundos o top N atual é mostrado no terminal e, se pedidos, os
+ficheiros de output são reescritos (de forma atómica, com app.save_outputs).
+
+Com --window (ex.: 5m) só contam as palavras dos últimos minutos: as contagens ficam em baldes
+(um Counter por fatia de tempo) e, quando um balde sai da janela, as suas contagens são subtraídas
+do total, sem recontar nada. O relógio e o sleep podem ser trocados (testes).
+"""
+from __future__ import annotations
+
+import codecs
+import logging
+import os
+import re
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Callable, Iterator
+
+from text_analysis import DecodingWordCounter, select_top
+
+# Nº de baldes da janela de tempo (a janela avança em passos de window / WINDOW_BUCKETS segundos).
+WINDOW_BUCKETS = 60
+
+# Tempo (segundos) entre verificações do ficheiro quando não há dados novos.
+POLL_SECONDS = 0.5
+
+# Unidades aceites em --window e --interval.
+DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> float:
+    # "300", "30s", "5m", "1.5h" -> segundos.
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", value.lower())
+    if match is None:
+        raise ValueError(f"duração inválida: {value}")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+class FileTail:
+    """Lê os bytes acrescentados a um ficheiro, seguindo rotações e truncagens (como tail -F).
+
+    read() dá eventos ("data", bytes) com os bytes novos e ("reset", b"") quando passa a ler um
+    ficheiro novo (rodado) ou o mesmo ficheiro desde o início (truncado)."""
+
+    def __init__(self, path: Path | str, chunk_size: int = 1024 * 1024, from_start: bool = False) -> None:
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.file = None
+        self.identity: tuple[int, int] | None = None  # (dispositivo, inode) do ficheiro aberto
+        self._open(at_end=not from_start)
+
+    def _open(self, at_end: bool = False) -> bool:
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        st = os.fstat(file.fileno())
+        self.identity = (st.st_dev, st.st_ino)
+        if at_end:
+            file.seek(0, os.SEEK_END)
+        self.file = file
+        return True
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _drain(self) -> Iterator[tuple[str, bytes]]:
+        # Tudo o que já está escrito a partir da posição atual.
+        while chunk := self.file.read(self.chunk_size):
+            yield "data", chunk
+
+    def read(self) -> Iterator[tuple[str, bytes]]:
+        if self.file is None:
+            # O ficheiro ainda não existia (ou desapareceu numa rotação): lê-o desde o início quando aparecer.
+            if not self._open():
+                return
+            yield "reset", b""
+
+        # Primeiro o resto do ficheiro aberto (numa rotação, o fim do ficheiro antigo).
+        yield from self._drain()
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # Rodado e o novo ainda não foi criado: continua com o antigo até aparecer.
+            return
+
+        if (st.st_dev, st.st_ino) != self.identity:
+            logging.info("Ficheiro rodado, a ler o novo desde o início: %s", self.path)
+            self.close()
+            if self._open():
+                yield "reset", b""
+                yield from self._drain()
+        elif st.st_size < self.file.tell():
+            logging.info("Ficheiro truncado, a ler desde o início: %s", self.path)
+            self.file.seek(0)
+            yield "reset", b""
+            yield from self._drain()
+
+
+class WindowCounter(DecodingWordCounter):
+    """DecodingWordCounter para o modo follow: contagens acumuladas ou só dos últimos `window` segundos.
+
+    Com janela, cada bloco conta num balde da sua fatia de tempo e no total; os baldes que saem da
+    janela são subtraídos do total (custo proporcional ao vocabulário do balde, não ao texto)."""
+
+    def __init__(
+        self, window: float | None = None, buckets: int = WINDOW_BUCKETS, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        super().__init__("utf-8", fallback="latin-1")
+        self.window = window
+        self.bucket_seconds = window / buckets if window else None
+        self.buckets = buckets
+        self.clock = clock
+        self._buckets: deque[tuple[int, Counter[bytes]]] = deque()  # (nº da fatia de tempo, contagens em bruto)
+
+    def feed_bytes(self, data: bytes) -> None:
+        # Como em DecodingWordCounter; um ficheiro acompanhado não pode ser relido desde o início,
+        # por isso a partir do primeiro erro de utf-8 passa a descodificar em latin-1 (fallback).
+        encoding = self.encoding
+        super().feed_bytes(data)
+        if self.encoding != encoding:
+            logging.warning("Falhou utf-8, a continuar em latin-1")
+
+    def restart(self) -> None:
+        # Fim do ficheiro atual (rotação/truncagem): conta a última palavra e recomeça em utf-8.
+        self.feed(self._decode(b"", final=True))
+        super(DecodingWordCounter, self).close()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.encoding, self.fallback = "utf-8", "latin-1"
+
+    def _count(self, words: list[bytes]) -> None:
+        super()._count(words)
+        if self.window is None:
+            return
+        index = int(self.clock() // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] != index:
+            self._buckets.append((index, Counter()))
+        self._buckets[-1][1].update(words)
+
+    def expire(self) -> None:
+        # Tira do total os baldes que já saíram da janela.
+        if self.window is None:
+            return
+        oldest = int(self.clock() // self.bucket_seconds) - self.buckets + 1
+        raw = self._raw
+        while self._buckets and self._buckets[0][0] < oldest:
+            _, bucket = self._buckets.popleft()
+            raw.subtract(bucket)
+            # Só as palavras deste balde podem ter ficado a zero.
+            for token in bucket:
+                if raw[token] <= 0:
+                    del raw[token]
+
+    def top(self, n: int | None = 5) -> list[tuple[str, int]]:
+        """As n palavras mais comuns (na janela, se houver), com a ordenação de sort_counts."""
+        self.expire()
+        counts = self.counts
+        return select_top(counts, len(counts) if n is None else n)
+
+
+def follow(
+    path: Path | str,
+    emit: Callable[[list[tuple[str, int]]], None],
+    n: int | None = 10,
+    interval: float = 5.0,
+    window: float | None = None,
+    chunk_size: int = 1024 * 1024,
+    from_start: bool = False,
+    clock: Callable[[], float] | None = None,
+    sleep: Callable[[float], None] | None = None,
+    stop: Callable[[], bool] | None = None,
+) -> WindowCounter:
+    """Acompanha um ficheiro e chama emit(top n) a cada `interval` segundos, até stop() ser True
+    ou até Ctrl+C (KeyboardInterrupt); ao parar chama emit uma última vez com o top n final.
+
+    Args:
+        path: Ficheiro a acompanhar.
+        emit: Função chamada com o top n atual.
+        n: O número de palavras (None = todas).
+        interval: Segundos entre cada emit.
+        window: Só contar as palavras dos últimos `window` segundos (None = desde o início).
+        chunk_size: Tamanho máximo de cada leitura.
+        from_start: Contar também o que o ficheiro já tem (senão começa no fim, como tail -f).
+        clock: Relógio em segundos (default: time.monotonic).
+        sleep: Função de espera (default: time.sleep).
+        stop: Função que diz quando parar (default: só com Ctrl+C).
+
+    Returns:
+        O contador (com as contagens no momento em que parou)."""
+    clock = clock or time.monotonic
+    sleep = sleep or time.sleep
+    tail = FileTail(path, chunk_size, from_start)
+    counter = WindowCounter(window, clock=clock)
+    next_emit = clock() + interval
+    try:
+        while not (stop and stop()):
+            idle = True
+            for event, data in tail.read():
+                idle = False
+                if event == "reset":
+                    counter.restart()
+                else:
+                    counter.feed_bytes(data)
+
+            if clock() >= next_emit:
+                emit(counter.top(n))
+                next_emit = clock() + interval
+
+            if idle:
+                sleep(min(POLL_SECONDS, interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tail.close()
+
+    emit(counter.top(n))
+    return counter
+
+
+def follow_main(args) -> int:
+    # Ponto de entrada do modo follow (chamado por app.main com os argumentos já validados).
+    # (import aqui: app só importa este módulo quando --follow é usado)
+    from app import output_paths, save_outputs
+
+    paths = output_paths(args)
+    window = parse_duration(args.window) if args.window else None
+    interval = parse_duration(args.interval)
+    logging.info("A acompanhar %s (intervalo %gs, janela %s)", args.input, interval, args.window or "-")
+
+    def emit(items: list[tuple[str, int]]) -> None:
+        # Top N atual no terminal e, se pedidos, nos ficheiros (reescritos de forma atómica).
+        title_n = args.n if args.n is not None else len(items)
+        print(f"[{time.strftime('%H:%M:%S')}]")
+        save_outputs(items, paths, title_n, args.gzip, echo=True)
+        print(flush=True)
+
+    follow(args.input, emit, args.n, interval, window, args.chunk_size, args.from_start)
+    return 0
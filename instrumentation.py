@@ -0,0 +1,296 @@
+"""Instrumentação das etapas da análise (ler, descodificar, normalizar, separar, contar, selecionar, escrever).
+
+O código da análise marca cada etapa com `with stage("tokenize") as s: ...; s.add(tokens=...)`.
+Sem um Profiler ativo, stage() devolve sempre o mesmo objeto vazio (custo de uma leitura de
+ContextVar por etapa, e as etapas são por texto/bloco, nunca por palavra). Com um Profiler ativo
+(ver profiling()), cada etapa regista o tempo, os bytes e tokens processados e, opcionalmente,
+o pico de memória (tracemalloc).
+
+- app.py --profile: tabela por etapa no terminal, um registo de log por etapa e secção "profile" no JSON;
+- api.py: o Metrics (um Profiler) alimenta o endpoint /metrics em formato de texto do Prometheus.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Profiler ativo no contexto atual (None = instrumentação desligada).
+_active: ContextVar[Profiler | None] = ContextVar("profiler", default=None)
+
+# Etapa com medição de memória em curso no contexto atual (para as etapas aninhadas).
+_current_stage: ContextVar[_Stage | None] = ContextVar("stage", default=None)
+
+
+class _NullStage:
+    # Etapa sem Profiler ativo: não mede nada. É falsa em contexto booleano, para o código
+    # poder evitar calcular valores que só servem para a instrumentação (`if s: s.add(...)`).
+    __slots__ = ()
+
+    def __enter__(self) -> _NullStage:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def __bool__(self) -> bool:
+        return False
+
+    def add(self, bytes: int = 0, tokens: int = 0) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    # Uma execução de uma etapa com o Profiler ativo.
+    __slots__ = ("profiler", "name", "bytes", "tokens", "start", "memory_start", "peak_seen", "parent", "token")
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.bytes = 0
+        self.tokens = 0
+
+    def __enter__(self) -> _Stage:
+        if self.profiler.memory:
+            # O pico é medido em relação à memória em uso no início da etapa.
+            # (import aqui: tracemalloc só é carregado com --profile-memory)
+            import tracemalloc
+
+            # reset_peak() apaga o pico da etapa exterior (se houver): é guardado nela antes.
+            self.parent = _current_stage.get()
+            if self.parent is not None:
+                self.parent.peak_seen = max(self.parent.peak_seen, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+            self.peak_seen = 0
+            self.token = _current_stage.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        seconds = time.perf_counter() - self.start
+        peak = None
+        if self.profiler.memory:
+            import tracemalloc
+
+            # Pico desde o início da etapa: o atual e os guardados antes dos reset_peak() das
+            # etapas aninhadas; é também passado à etapa exterior.
+            traced_peak = max(tracemalloc.get_traced_memory()[1], self.peak_seen)
+            _current_stage.reset(self.token)
+            if self.parent is not None:
+                self.parent.peak_seen = max(self.parent.peak_seen, traced_peak)
+            peak = max(traced_peak - self.memory_start, 0)
+        self.profiler.record(self.name, seconds, self.bytes, self.tokens, peak)
+
+    def add(self, bytes: int = 0, tokens: int = 0) -> None:
+        # Acrescenta os bytes/tokens processados nesta execução da etapa.
+        self.bytes += bytes
+        self.tokens += tokens
+
+
+def stage(name: str) -> _Stage | _NullStage:
+    # Marca uma etapa da análise (no Profiler ativo, se houver).
+    profiler = _active.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name)
+
+
+@contextmanager
+def profiling(profiler: Profiler | None):
+    # Ativa o profiler no contexto atual (None não faz nada). Com memory=True liga o tracemalloc
+    # enquanto o profiler estiver ativo (se ainda não estava ligado).
+    if profiler is None:
+        yield None
+        return
+
+    import tracemalloc
+
+    started = profiler.memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+        if started:
+            tracemalloc.stop()
+
+
+class Profiler:
+    """Acumula, por etapa, o nº de execuções, o tempo total, os bytes e tokens processados e o
+    maior pico de memória (se memory=True)."""
+
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.stages: dict[str, dict] = {}  # etapa -> {"calls", "seconds", "bytes", "tokens"[, "peak_bytes"]}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, bytes: int = 0, tokens: int = 0, peak: int | None = None) -> None:
+        # Regista uma execução de uma etapa.
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {"calls": 0, "seconds": 0.0, "bytes": 0, "tokens": 0}
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["bytes"] += bytes
+            entry["tokens"] += tokens
+            if peak is not None:
+                entry["peak_bytes"] = max(entry.get("peak_bytes", 0), peak)
+
+    def merge(self, stages: dict[str, dict]) -> None:
+        # Junta as etapas de outro Profiler (ex.: de um processo do pool).
+        for name, entry in stages.items():
+            self.record(name, entry["seconds"], entry["bytes"], entry["tokens"], entry.get("peak_bytes"))
+
+    def as_dict(self) -> dict:
+        # Resumo para o export JSON: tempo total desde a criação e as etapas.
+        with self._lock:
+            stages = {name: dict(entry, seconds=round(entry["seconds"], 6)) for name, entry in self.stages.items()}
+        return {"total_seconds": round(time.perf_counter() - self.started, 6), "stages": stages}
+
+    def report(self) -> str:
+        # Tabela por etapa para mostrar no terminal (--profile).
+        data = self.as_dict()
+        lines = [
+            "Perfil por etapa:",
+            f"{'etapa':<12} {'chamadas':>9} {'tempo (s)':>10} {'bytes':>13} {'tokens':>11}"
+            + (f" {'pico (MB)':>10}" if self.memory else ""),
+        ]
+        for name, entry in data["stages"].items():
+            line = f"{name:<12} {entry['calls']:>9} {entry['seconds']:>10.4f} {entry['bytes']:>13} {entry['tokens']:>11}"
+            if self.memory:
+                line += f" {entry.get('peak_bytes', 0) / 1024 / 1024:>10.2f}"
+            lines.append(line)
+        lines.append(f"Tempo total: {data['total_seconds']:.4f}s")
+        return "\n".join(lines) + "\n"
+
+    def log(self, logger: logging.Logger | None = None) -> None:
+        # Um registo de log por etapa, com os valores também como atributos do registo
+        # (stage, calls, seconds, bytes, tokens, peak_bytes) para handlers/formatters estruturados.
+        logger = logger or logging.getLogger()
+        for name, entry in self.as_dict()["stages"].items():
+            logger.info(
+                "Perfil %s: %d chamadas, %.6fs, %d bytes, %d tokens",
+                name, entry["calls"], entry["seconds"], entry["bytes"], entry["tokens"],
+                extra={"stage": name, **entry},
+            )
+
+
+# Limites dos buckets dos histogramas (como os defaults dos clientes Prometheus, até 30s).
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Limites dos buckets de tamanhos (bytes): de 100 B a 100 MB.
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+
+def process_memory() -> dict[str, int]:
+    # Memória do processo em bytes: residente atual ("rss", Linux: /proc/self/statm) e o pico
+    # ("max_rss", getrusage). 0 no que o sistema não disponibiliza.
+    rss = max_rss = 0
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return {"rss": rss, "max_rss": max_rss}
+    # ru_maxrss está em KB no Linux e em bytes no macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+    return {"rss": rss, "max_rss": max_rss}
+
+
+class Histogram:
+    """Histograma com buckets fixos e labels, no formato de texto do Prometheus."""
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._series: dict[tuple[str, ...], list] = {}  # valores dos labels -> [contagens por bucket, soma, total]
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            sep = "," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:g}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Metrics(Profiler):
+    """Profiler da API: além dos totais por etapa, guarda histogramas da latência de cada etapa,
+    da latência e do tamanho dos pedidos HTTP, e exporta tudo em formato Prometheus (render())."""
+
+    def __init__(self, prefix: str = "textanalyzer") -> None:
+        super().__init__(memory=False)
+        self.prefix = prefix
+        self.stage_seconds = Histogram(
+            f"{prefix}_stage_seconds", "Duração de cada etapa da análise.", LATENCY_BUCKETS, ("stage",)
+        )
+        self.request_seconds = Histogram(
+            f"{prefix}_request_seconds", "Latência dos pedidos HTTP.", LATENCY_BUCKETS, ("method", "path", "status")
+        )
+        self.request_bytes = Histogram(
+            f"{prefix}_request_bytes", "Tamanho do corpo dos pedidos HTTP.", SIZE_BUCKETS, ("method", "path")
+        )
+
+    def record(self, name: str, seconds: float, bytes: int = 0, tokens: int = 0, peak: int | None = None) -> None:
+        super().record(name, seconds, bytes, tokens, peak)
+        with self._lock:
+            self.stage_seconds.observe(seconds, name)
+
+    def observe_request(self, method: str, path: str, status: int, seconds: float, size: int) -> None:
+        with self._lock:
+            self.request_seconds.observe(seconds, method, path, str(status))
+            self.request_bytes.observe(size, method, path)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = self.stage_seconds.render()
+            for field, help in (("bytes", "Bytes processados por etapa."), ("tokens", "Tokens processados por etapa.")):
+                name = f"{self.prefix}_stage_{field}_total"
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+                lines += [f'{name}{{stage="{stage}"}} {entry[field]}' for stage, entry in sorted(self.stages.items())]
+            lines += self.request_seconds.render()
+            lines += self.request_bytes.render()
+        # Memória do processo da API (os processos do pool não estão incluídos).
+        memory = process_memory()
+        for name, key, help in (
+            ("process_resident_memory_bytes", "rss", "Memória residente do processo."),
+            ("process_max_resident_memory_bytes", "max_rss", "Pico da memória residente do processo."),
+        ):
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {memory[key]}"]
+        return "\n".join(lines) + "\n"
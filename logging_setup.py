@@ -0,0 +1,176 @@
+"""Configuração de logging partilhada por app.py, file_manager_main.py e api.py.
+
+Os registos não são escritos no momento do logging.info(...): o logger raiz só tem um QueueHandler,
+que põe o registo numa fila, e uma thread (QueueListener) escreve-os depois no ficheiro (com rotação)
+e na consola (WARNING e acima). Assim a escrita em disco nunca fica no caminho crítico da CLI nem
+dos pedidos da API.
+
+setup_logging() é idempotente: chamar várias vezes (ex.: main() em testes) não duplica handlers;
+só atualiza o nível ou troca o ficheiro se estes mudarem.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# logging.handlers (QueueHandler, QueueListener, RotatingFileHandler) é importado dentro das funções:
+# importar este módulo (ex.: no cliente do daemon, ver daemon.py) não o carrega. As anotações usam o
+# nome completo (logging.handlers.X), que se resolve (ex.: typing.get_type_hints) depois de setup_logging().
+if TYPE_CHECKING:
+    import logging.handlers
+
+# Ficheiro de logs default.
+LOG_PATH = Path("logs") / "app.log"
+
+# Formato das linhas (data/hora + nível + mensagem).
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Rotação: tamanho máximo de cada ficheiro e nº de ficheiros antigos guardados (app.log.1, app.log.2, ...).
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+# Variável de ambiente com o nível de logging default (ex.: LOG_LEVEL=DEBUG).
+LEVEL_ENV = "LOG_LEVEL"
+
+# Estado da configuração atual (um só por processo).
+_queue: queue.Queue | None = None
+_queue_handler: logging.handlers.QueueHandler | None = None
+_listener: logging.handlers.QueueListener | None = None
+_file_handler: logging.handlers.RotatingFileHandler | None = None
+_direct_handlers: list[logging.Handler] = []  # handlers sem fila, num processo filho criado com fork
+
+
+class _StderrHandler(logging.StreamHandler):
+    # Handler da consola que usa sempre o sys.stderr atual (e não o que existia quando foi criado),
+    # para funcionar quando o stderr é trocado (ex.: pytest, redirecionamentos).
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value) -> None:
+        pass
+
+
+def resolve_level(level: int | str | None) -> int:
+    # Converte "info"/"DEBUG"/20/None num nível do logging (None: variável LOG_LEVEL ou INFO).
+    if level is None:
+        level = os.environ.get(LEVEL_ENV, "INFO")
+    if isinstance(level, str):
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"nível de logging inválido: {level}")
+        return value
+    return level
+
+
+def setup_logging(level: int | str | None = None, path: Path | str = LOG_PATH) -> None:
+    """Configura o logger raiz (uma só vez por processo) com escrita assíncrona em ficheiro e consola.
+
+    Args:
+        level: Nível mínimo para o ficheiro ("DEBUG", "INFO", ..., ou int). None: LOG_LEVEL ou INFO.
+        path: Caminho do ficheiro de logs (com rotação)."""
+    global _queue, _queue_handler, _listener, _file_handler, _direct_handlers
+    # (import aqui: logging.handlers só é carregado quando os logs são configurados, não ao importar o módulo)
+    from logging.handlers import QueueHandler
+
+    level = resolve_level(level)
+    path = Path(path)
+    logger = logging.getLogger()
+
+    # A consola mostra sempre WARNING e acima, mesmo que o ficheiro tenha um nível mais alto.
+    logger.setLevel(min(level, logging.WARNING))
+
+    # Já configurado: só atualiza o nível e, se mudou, o ficheiro.
+    if _listener is not None:
+        _file_handler.setLevel(level)
+        if Path(_file_handler.baseFilename) != path.resolve():
+            _listener.stop()
+            _file_handler.close()
+            _file_handler = _make_file_handler(path, level)
+            _listener = _start_listener()
+        return
+
+    # Num filho de fork (ex.: uma ligação ao daemon --serve) os registos já vão diretamente para o
+    # ficheiro: se for o mesmo ficheiro, só atualiza o nível (sem reabrir o ficheiro nem criar a thread).
+    if _direct_handlers and Path(_file_handler.baseFilename) == path.resolve():
+        _file_handler.setLevel(level)
+        return
+
+    # Retira handlers de uma configuração anterior já parada (ex.: depois de um fork).
+    for handler in (_queue_handler, _file_handler, *_direct_handlers):
+        if handler is not None and handler in logger.handlers:
+            logger.removeHandler(handler)
+
+    _direct_handlers = []
+    _file_handler = _make_file_handler(path, level)
+    _queue = queue.Queue()
+    _queue_handler = QueueHandler(_queue)
+    logger.addHandler(_queue_handler)
+    _listener = _start_listener()
+
+
+def _make_file_handler(path: Path, level: int) -> logging.handlers.RotatingFileHandler:
+    # Garante que a pasta dos logs existe e cria o handler do ficheiro com rotação.
+    from logging.handlers import RotatingFileHandler
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8")
+    handler.setLevel(level)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def _console_handler() -> logging.Handler:
+    # Handler da consola: só WARNING e acima.
+    console = _StderrHandler()
+    console.setLevel(logging.WARNING)
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    return console
+
+
+def _start_listener() -> logging.handlers.QueueListener:
+    # Thread que tira os registos da fila e os escreve no ficheiro e na consola.
+    from logging.handlers import QueueListener
+
+    listener = QueueListener(_queue, _file_handler, _console_handler(), respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def flush_logging() -> None:
+    # Espera até todos os registos já feitos estarem escritos (ex.: antes de ler o ficheiro de logs).
+    if _listener is not None:
+        _queue.join()
+        _file_handler.flush()
+
+
+def _stop_listener() -> None:
+    # No fim do processo: escreve os registos pendentes e pára a thread.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _after_fork_in_child() -> None:
+    # Num processo criado com fork (pools do batch, --workers, API) a thread de escrita não existe
+    # e o processo pode terminar sem correr o atexit: os registos do filho são escritos diretamente.
+    global _listener, _direct_handlers
+    if _listener is not None:
+        _listener = None
+        logger = logging.getLogger()
+        logger.removeHandler(_queue_handler)
+        _direct_handlers = [_file_handler, _console_handler()]
+        for handler in _direct_handlers:
+            logger.addHandler(handler)
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,97 @@
+"""Contagem de palavras de um ficheiro grande em vários processos (app.py --workers N).
+
+O ficheiro é dividido em intervalos de bytes que terminam sempre num espaço em branco ASCII
+(nunca a meio de uma palavra nem de um caractere UTF-8). Cada processo abre o ficheiro com mmap
+e conta só o seu intervalo (com text_analysis.count_bytes), e no fim as contagens parciais são somadas.
+O resultado é exatamente o mesmo que o de contar o ficheiro inteiro num só processo.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentation import stage
+from text_analysis import AnalysisResult, count_bytes, merge_raw, split_ranges
+
+# Abaixo deste tamanho não compensa arrancar processos: conta tudo no processo atual.
+MIN_PARALLEL_SIZE = 4 * 1024 * 1024
+
+
+def count_range(file_path: str, start: int, end: int, encoding: str) -> tuple[Counter[bytes], bool] | None:
+    # Conta as palavras em bruto de um intervalo de bytes do ficheiro (corre dentro de um processo do pool).
+    # Retorna (contagens em bruto, tem_texto) ou None se o intervalo não for válido no encoding pedido.
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Só o intervalo deste processo é copiado.
+        return count_bytes(mm[start:end], encoding)
+
+
+def count_file_parallel(
+    file_path: str, workers: int, min_size: int = MIN_PARALLEL_SIZE
+) -> tuple[AnalysisResult, bool] | None:
+    # Conta as palavras de um ficheiro usando `workers` processos.
+    # Mantém o mesmo fallback de read_text_file: utf-8 e, se algum intervalo falhar, latin-1
+    # (no ficheiro inteiro). Retorna (resultado, tem_texto) ou None em caso de erro.
+    try:
+        size = os.path.getsize(file_path)
+    except FileNotFoundError:
+        logging.error("Ficheiro não encontrado: %s", file_path)
+        return None
+    except OSError as e:
+        logging.error("Erro ao abrir/ler ficheiro: %s (%s)", file_path, e)
+        return None
+
+    # Ficheiro vazio: mmap não aceita tamanho 0.
+    if size == 0:
+        return AnalysisResult(Counter()), False
+
+    try:
+        # Calcula os intervalos (lendo só à volta dos cortes, via mmap).
+        with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = split_ranges(mm, workers if size >= min_size else 1)
+    except OSError as e:
+        logging.error("Erro ao abrir/ler ficheiro: %s (%s)", file_path, e)
+        return None
+
+    logging.info("A contar %s em %d intervalos com %d processos", file_path, len(ranges), workers)
+
+    # Só arranca o pool se houver mesmo mais do que um intervalo.
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(ranges))) if len(ranges) > 1 else None
+
+    try:
+        for encoding in ("utf-8", "latin-1"):
+            # As etapas dentro dos processos não são medidas; aqui conta o tempo de todos os intervalos.
+            with stage("count") as s:
+                s.add(bytes=size)
+                if executor is None:
+                    parts = [count_range(file_path, start, end, encoding) for start, end in ranges]
+                else:
+                    futures = [executor.submit(count_range, file_path, start, end, encoding) for start, end in ranges]
+                    parts = [future.result() for future in futures]
+
+            # Se algum intervalo não for UTF-8 válido, o ficheiro inteiro é lido como latin-1
+            # (tal como read_text_file faz).
+            if any(part is None for part in parts):
+                logging.warning("Falhou utf-8, a tentar latin-1: %s", file_path)
+                continue
+
+            # Soma as contagens parciais e só no fim normaliza cada palavra distinta.
+            total: Counter[bytes] = Counter()
+            has_text = False
+            for counts, part_has_text in parts:
+                total.update(counts)
+                has_text = has_text or part_has_text
+
+            return AnalysisResult(merge_raw(total, encoding)), has_text
+
+    except OSError as e:
+        logging.error("Erro ao abrir/ler ficheiro: %s (%s)", file_path, e)
+        return None
+
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return None
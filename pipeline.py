@@ -0,0 +1,159 @@
+"""Modo NDJSON do app.py (--ndjson): muitos documentos curtos numa só execução, como um filtro de shell.
+
+Cada linha do --input (um ficheiro ou "-" para o stdin) é um documento JSON {"id": ..., "text": ...}.
+Para cada documento é escrita no stdout uma linha NDJSON com o seu top N, pela mesma ordem da entrada:
+
+    {"id": 7, "items": [{"rank": 1, "word": "ola", "count": 2}, ...]}
+
+(com --stats também "stats"). Uma linha inválida não pára o processamento: dá {"id": ..., "error": ...}.
+Linhas em branco são ignoradas.
+
+Os documentos são lidos em lotes de --batch-size linhas. Com --workers > 1 cada lote é analisado num
+processo de um ProcessPoolExecutor; há no máximo 2 lotes por worker em curso (memória limitada mesmo com
+milhões de documentos) e os resultados são escritos pela ordem dos lotes, à medida que ficam prontos.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import time
+from collections import deque
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, TextIO
+
+from text_analysis import analyze_text, item_rows
+
+# Nº de documentos (linhas) de cada lote.
+BATCH_SIZE = 1000
+
+# Nº máximo de lotes em curso por worker (os seguintes só são lidos quando os primeiros terminam).
+BATCHES_PER_WORKER = 2
+
+# ensure_ascii: um JSON válido pode ter surrogates isolados (ex.: "\ud800" no id ou no texto), que não
+# se conseguem escrever em UTF-8; escapados, uma linha assim não pára o processamento.
+_dumps = json.JSONEncoder(ensure_ascii=True).encode
+
+
+def analyze_document(line: bytes, n: int | None, stats: bool = False, ngram: int = 1) -> str:
+    # Analisa uma linha (documento JSON) e retorna a linha NDJSON do resultado (sem o "\n").
+    doc_id = None
+    try:
+        doc = json.loads(line)
+        if not isinstance(doc, dict):
+            raise ValueError("o documento deve ser um objeto JSON")
+        doc_id = doc.get("id")
+        text = doc.get("text")
+        if not isinstance(text, str):
+            raise ValueError('o documento deve ter "text" (string)')
+    except ValueError as e:
+        # (json.JSONDecodeError e UnicodeDecodeError são ValueError)
+        return _dumps({"id": doc_id, "error": str(e)})
+
+    result = analyze_text(text, stats=stats, ngram=ngram)
+    output = {"id": doc_id, "items": item_rows(result.top(n))}
+    if result.stats is not None:
+        output["stats"] = result.stats
+    return _dumps(output)
+
+
+def analyze_documents(lines: list[bytes], n: int | None, stats: bool = False, ngram: int = 1) -> list[str]:
+    """Analisa um lote de documentos (corre dentro de um worker).
+
+    Args:
+        lines: Linhas da entrada, cada uma um documento JSON.
+        n: O número de palavras de cada top (None = todas).
+        stats: Se True, inclui as estatísticas de cada documento.
+        ngram: Contar sequências de ngram palavras em vez de palavras.
+
+    Returns:
+        Uma linha NDJSON (sem o "\\n") por documento, pela mesma ordem; as linhas em branco são ignoradas."""
+    return [analyze_document(line, n, stats, ngram) for line in lines if line.strip()]
+
+
+def read_batches(f: Iterable[bytes], batch_size: int = BATCH_SIZE) -> Iterator[list[bytes]]:
+    # Lotes de até batch_size linhas (lidas à medida que são precisas).
+    lines = iter(f)
+    while batch := list(islice(lines, batch_size)):
+        yield batch
+
+
+def iter_results(
+    batches: Iterable[list[bytes]], n: int | None, stats: bool = False, ngram: int = 1, workers: int = 1
+) -> Iterator[list[str]]:
+    # Resultados de cada lote, pela ordem dos lotes.
+    if workers <= 1:
+        for batch in batches:
+            yield analyze_documents(batch, n, stats, ngram)
+        return
+
+    # (import aqui para não carregar multiprocessing quando não é preciso)
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(analyze_documents, batch, n, stats, ngram))
+            # Janela limitada: espera pelo lote mais antigo antes de ler mais.
+            if len(pending) >= workers * BATCHES_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_pipeline(
+    source: BinaryIO,
+    out: TextIO,
+    n: int | None,
+    stats: bool = False,
+    ngram: int = 1,
+    workers: int = 1,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Lê documentos NDJSON de source e escreve o top n de cada um em out (uma linha por documento).
+
+    Args:
+        source: Entrada binária (ficheiro ou sys.stdin.buffer), lida linha a linha.
+        out: Saída de texto (ex.: sys.stdout); é feito flush depois de cada lote.
+        n: O número de palavras de cada top (None = todas).
+        stats: Se True, inclui as estatísticas de cada documento.
+        ngram: Contar sequências de ngram palavras em vez de palavras.
+        workers: Nº de processos (1 = no próprio processo).
+        batch_size: Nº de documentos de cada lote.
+
+    Returns:
+        O número de documentos escritos."""
+    documents = 0
+    for lines in iter_results(read_batches(source, batch_size), n, stats, ngram, workers):
+        if lines:
+            out.write("\n".join(lines) + "\n")
+            out.flush()
+        documents += len(lines)
+    return documents
+
+
+def pipeline_main(args) -> int:
+    # Ponto de entrada do modo NDJSON (chamado por app.main com os argumentos já validados).
+    start = time.perf_counter()
+    try:
+        if args.input == "-":
+            documents = run_pipeline(
+                sys.stdin.buffer, sys.stdout, args.n, args.stats, args.ngram, args.workers, args.batch_size
+            )
+        else:
+            with open(args.input, "rb") as source:
+                documents = run_pipeline(
+                    source, sys.stdout, args.n, args.stats, args.ngram, args.workers, args.batch_size
+                )
+    except FileNotFoundError:
+        logging.error("Ficheiro não encontrado: %s", args.input)
+        print(f"Ficheiro não encontrado: {args.input}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        logging.error("Erro ao abrir/ler ficheiro: %s (%s)", args.input, e)
+        print(f"Erro ao abrir/ler ficheiro: {args.input}", file=sys.stderr)
+        return 1
+
+    elapsed = time.perf_counter() - start
+    logging.info("NDJSON: %d documentos em %.2fs", documents, elapsed)
+    return 0
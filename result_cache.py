@@ -0,0 +1,102 @@
+"""Cache LRU em memória para resultados de análise, com limite de entradas e de bytes.
+
+Usada pela API: a chave é um hash do texto (sem espaços nas pontas) e o valor inclui a lista
+completa de (palavra, contagem) já ordenada, por isso qualquer n pode ser servido da mesma entrada.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+
+# Custo aproximado (em bytes) de cada par (palavra, contagem) numa lista em memória:
+# tupla + int + cabeçalho da str, além dos caracteres da palavra.
+ITEM_OVERHEAD = 120
+
+
+def text_key(text: str) -> str:
+    # Chave de conteúdo: hash SHA-256 do texto sem espaços nas pontas
+    # (o mesmo texto com espaços diferentes no início/fim tem o mesmo resultado).
+    return hashlib.sha256(text.strip().encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def items_size(items: list[tuple[str, int]]) -> int:
+    # Estimativa do tamanho em memória de uma lista de (palavra, contagem).
+    return sum(len(word) for word, _ in items) + ITEM_OVERHEAD * len(items)
+
+
+class ResultCache:
+    """Cache LRU thread-safe com limite de número de entradas e de bytes totais.
+
+    Quando um dos limites é ultrapassado, remove as entradas usadas há mais tempo.
+    Guarda contadores de hits, misses e evictions para monitorização."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, tuple[Any, int]] = OrderedDict()  # chave -> (valor, tamanho)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        # Retorna o valor guardado (e marca-o como usado recentemente) ou None.
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        # Guarda um valor com o tamanho indicado, removendo as entradas mais antigas se for preciso.
+        # Valores maiores do que o limite total de bytes não são guardados.
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            self._data[key] = (value, size)
+            self._bytes += size
+
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old_size) = self._data.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+
+    def discard(self, key: str) -> bool:
+        # Remove uma entrada (ex.: um documento que o cliente já não precisa). Retorna se existia.
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[1]
+            return True
+
+    def clear(self) -> None:
+        # Esvazia a cache e os contadores.
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        # Contadores e ocupação atual da cache.
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
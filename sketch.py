@@ -0,0 +1,125 @@
+"""Contagem aproximada das palavras mais comuns com memória fixa (app.py --approx --capacity M).
+
+Usa o algoritmo Space-Saving (Metwally et al.): guarda no máximo M palavras, cada uma com uma
+contagem estimada e o erro máximo dessa estimativa. Quando aparece uma palavra nova e já não há
+lugar, saem as palavras com menor contagem e a nova entra com a contagem da maior que saiu
+(`floor`), porque pode ter aparecido até esse número de vezes antes sem ser guardada.
+
+Garantias (N = total de palavras contadas):
+- a contagem real de uma palavra guardada está em [contagem - erro, contagem];
+- qualquer palavra que não está guardada apareceu no máximo `floor` vezes;
+- o erro nunca passa de floor <= N / M, por isso as palavras com mais de N / M ocorrências estão sempre guardadas.
+
+As palavras de cada bloco de texto são contadas primeiro de forma exata (Counter, em C) e só depois
+juntas ao sketch, com uma atualização pesada por palavra distinta do bloco (e não uma por ocorrência).
+A memória depende de M e do tamanho dos blocos, não do vocabulário total.
+"""
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+
+from instrumentation import stage
+from text_analysis import AnalysisResult, DecodingWordCounter, WordCounter, merge_raw, select_top
+
+# Capacidade default (nº máximo de palavras guardadas).
+DEFAULT_CAPACITY = 10_000
+
+
+class SpaceSaving:
+    """Sketch Space-Saving com capacidade fixa e atualizações pesadas (palavra, nº de ocorrências)."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity <= 0:
+            raise ValueError("a capacidade deve ser maior que 0")
+        self.capacity = capacity
+        self.counts: dict[str, int] = {}  # palavra -> contagem estimada (nunca abaixo da real)
+        self.errors: dict[str, int] = {}  # palavra -> erro máximo da contagem
+        self.floor = 0  # maior contagem que já saiu do sketch (limite das palavras não guardadas)
+        self.total = 0  # nº de palavras contadas (N)
+
+    def add(self, word: str, count: int = 1) -> None:
+        # Uma palavra com `count` ocorrências.
+        self.update({word: count})
+
+    def update(self, counts: dict[str, int]) -> None:
+        """Junta as contagens exatas de um bloco (palavra -> ocorrências no bloco).
+
+        Args:
+            counts: Dicionário palavra -> contagem."""
+        summary, errors, floor = self.counts, self.errors, self.floor
+        for word, count in counts.items():
+            if word in summary:
+                summary[word] += count
+            else:
+                summary[word] = count + floor
+                errors[word] = floor
+            self.total += count
+
+        # Acima da capacidade: saem as palavras com menor contagem.
+        excess = len(summary) - self.capacity
+        if excess > 0:
+            evicted = heapq.nsmallest(excess, summary.items(), key=lambda item: item[1])
+            for word, _ in evicted:
+                del summary[word]
+                del errors[word]
+            self.floor = max(floor, evicted[-1][1])
+
+    def top(self, n: int | None) -> list[tuple[str, int, int]]:
+        """Retorna as n palavras com maior contagem estimada como (palavra, contagem, erro), com a mesma
+        ordenação que text_analysis.sort_counts. Com n=None retorna todas as palavras guardadas."""
+        items = select_top(self.counts, len(self.counts) if n is None else n)
+        return [(word, count, self.errors[word]) for word, count in items]
+
+    def summary(self) -> dict:
+        # Parâmetros e limites do sketch (secção "approx" do JSON).
+        return {"capacity": self.capacity, "total": self.total, "words": len(self.counts), "max_error": self.floor}
+
+
+class ApproxCounter(WordCounter):
+    """WordCounter com memória fixa: cada bloco é contado de forma exata e junto a um SpaceSaving."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, stats: bool = False) -> None:
+        super().__init__(stats)
+        self.sketch = SpaceSaving(capacity)
+
+    def _count(self, words: list[bytes]) -> None:
+        with stage("count"):
+            raw = Counter(words)
+        counts = merge_raw(raw)
+        with stage("sketch") as s:
+            s.add(tokens=len(counts))
+            self.sketch.update(counts)
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Contagem estimada de cada palavra guardada no sketch."""
+        return self.sketch.counts
+
+    def result(self) -> AnalysisResult:
+        """Retorna um AnalysisResult com as contagens estimadas e o erro de cada uma."""
+        stats = self.stats.as_dict() if self.stats is not None else None
+        sketch = self.sketch
+        return AnalysisResult(dict(sketch.counts), stats, errors=dict(sketch.errors), approx=sketch.summary())
+
+
+class DecodingApproxCounter(DecodingWordCounter, ApproxCounter):
+    """ApproxCounter que recebe bytes (ver DecodingWordCounter)."""
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, encoding: str = "utf-8", stats: bool = False, fallback: str | None = None
+    ) -> None:
+        super().__init__(encoding, stats, fallback, capacity=capacity)
+
+
+def analyze_approx(text: str, capacity: int = DEFAULT_CAPACITY, stats: bool = False) -> AnalysisResult:
+    """Analisa um texto com o sketch (como text_analysis.analyze_text, mas com memória fixa).
+
+    Args:
+        text: O texto a ser analisado.
+        capacity: O nº máximo de palavras guardadas.
+        stats: Se True, calcula também as estatísticas do texto."""
+    counter = ApproxCounter(capacity, stats)
+    counter.feed(text)
+    counter.close()
+    return counter.result()
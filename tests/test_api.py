@@ -0,0 +1,383 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import api
+from api import app
+
+client = TestClient(app)
+
+
+def test_health():
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert r.json() == {"status": "ok"}
+
+
+def test_analyze_ok():
+    r = client.post("/analyze", json={"text": "ola ola mundo", "n": 2})
+    assert r.status_code == 200
+
+    data = r.json()
+    assert data["n"] == 2
+    assert "1. ola -> 2" in data["report"]
+    assert data["items"] == [
+        {"rank": 1, "word": "ola", "count": 2},
+        {"rank": 2, "word": "mundo", "count": 1},
+    ]
+
+
+def test_analyze_blank_text():
+    r = client.post("/analyze", json={"text": "   ", "n": 2})
+    assert r.status_code == 400
+
+
+def test_analyze_cache_hit_serves_any_n():
+    api.CACHE.clear()
+    text = "cache cache cache teste teste unico"
+
+    r1 = client.post("/analyze", json={"text": text, "n": 1})
+    r2 = client.post("/analyze", json={"text": "  " + text, "n": 3})
+    assert r1.json()["items"] == [{"rank": 1, "word": "cache", "count": 3}]
+    assert [i["word"] for i in r2.json()["items"]] == ["cache", "teste", "unico"]
+
+    stats = client.get("/cache/stats").json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["entries"] == 1
+
+
+def test_analyze_large_text_runs_in_pool(monkeypatch):
+    monkeypatch.setattr(api, "INLINE_MAX_CHARS", 10)
+    api.CACHE.clear()
+
+    r = client.post("/analyze", json={"text": "grande grande texto para o pool", "n": 2})
+    assert r.status_code == 200
+    assert r.json()["items"][0] == {"rank": 1, "word": "grande", "count": 2}
+
+
+def test_analyze_backpressure_503(monkeypatch):
+    monkeypatch.setattr(api, "INLINE_MAX_CHARS", 10)
+    monkeypatch.setattr(api, "MAX_PENDING", 0)
+    api.CACHE.clear()
+
+    r = client.post("/analyze", json={"text": "texto grande demais para inline", "n": 2})
+    assert r.status_code == 503
+
+    # textos pequenos continuam a ser servidos no próprio processo
+    r = client.post("/analyze", json={"text": "ola", "n": 2})
+    assert r.status_code == 200
+
+
+def test_analyze_batch():
+    r = client.post(
+        "/analyze/batch",
+        json={"items": [{"text": "ola ola mundo", "n": 1}, {"text": "adeus", "n": 5}]},
+    )
+    assert r.status_code == 200
+
+    results = r.json()["results"]
+    assert results[0]["items"] == [{"rank": 1, "word": "ola", "count": 2}]
+    assert results[1]["items"] == [{"rank": 1, "word": "adeus", "count": 1}]
+
+
+def test_analyze_batch_more_large_items_than_pending(monkeypatch):
+    # Num servidor sem carga, um lote com mais textos grandes que MAX_PENDING espera por lugares (não leva 503).
+    monkeypatch.setattr(api, "INLINE_MAX_CHARS", 10)
+    monkeypatch.setattr(api, "MAX_PENDING", 2)
+    api.CACHE.clear()
+
+    items = [{"text": "grande " * (i + 2) + f"texto {i}", "n": 1} for i in range(3)]
+    r = client.post("/analyze/batch", json={"items": items})
+    assert r.status_code == 200
+    assert [result["items"][0] for result in r.json()["results"]] == [
+        {"rank": 1, "word": "grande", "count": i + 2} for i in range(3)
+    ]
+    assert api._pending == 0
+
+
+def test_analyze_batch_small_items_beyond_inline_budget_go_to_pool(monkeypatch):
+    monkeypatch.setattr(api, "INLINE_MAX_CHARS", 20)
+    api.CACHE.clear()
+    calls = []
+    run_in_pool = api.run_in_pool
+
+    async def spy(func, *args):
+        calls.append((func.__name__, len(args[0])))
+        return await run_in_pool(func, *args)
+
+    monkeypatch.setattr(api, "run_in_pool", spy)
+    items = [{"text": f"ola ola mundo {i}", "n": 1, "stats": i == 4} for i in range(6)]
+    r = client.post("/analyze/batch", json={"items": items})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert all(result["items"] == [{"rank": 1, "word": "ola", "count": 2}] for result in results)
+    assert results[4]["stats"]["words"] == 4
+    # Só o primeiro cabe no limite do próprio processo; os outros vão em grupos de até 20 caracteres.
+    assert calls == [("analyze_sorted_many", 1)] * 5
+
+
+def test_pool_timeout_keeps_slot_until_job_ends(monkeypatch):
+    # Depois de um 504 a análise continua a correr no pool e continua a contar para MAX_PENDING.
+    monkeypatch.setattr(api, "DEADLINE_SECONDS", 0.3)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as e:
+            async with api.request_deadline():
+                await api.run_in_pool(time.sleep, 1.0)
+        assert e.value.status_code == 504
+        assert api._pending == 1
+        await wait_idle()
+
+    asyncio.run(scenario())
+
+
+async def wait_idle():
+    deadline = time.monotonic() + 10
+    while api._pending and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    assert api._pending == 0
+
+
+def test_deadline_covers_waiting_for_a_slot(monkeypatch):
+    # Com o pool cheio, a espera por um lugar também conta para o prazo do pedido.
+    monkeypatch.setattr(api, "DEADLINE_SECONDS", 0.3)
+    monkeypatch.setattr(api, "MAX_PENDING", 1)
+
+    async def scenario():
+        busy = asyncio.ensure_future(api.run_in_pool(time.sleep, 1.0))
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        with pytest.raises(HTTPException) as e:
+            async with api.request_deadline():
+                await api.run_in_pool(time.sleep, 0)
+        assert e.value.status_code == 504
+        assert time.monotonic() - start < 0.9
+        assert api._pending == 1 and not api._waiters
+        await busy
+        await wait_idle()
+
+    asyncio.run(scenario())
+
+
+def test_batch_failure_cancels_other_items(monkeypatch):
+    # Quando um item falha (ou o prazo expira), os outros itens do pedido são cancelados.
+    monkeypatch.setattr(api, "INLINE_MAX_CHARS", 3)
+    monkeypatch.setattr(api, "DEADLINE_SECONDS", 0.3)
+    api.CACHE.clear()
+    cancelled = []
+
+    async def fake(func, *args):
+        if "falha" in args[0]:
+            raise HTTPException(status_code=503, detail="x")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(args[0])
+            raise
+
+    monkeypatch.setattr(api, "run_in_pool", fake)
+    r = client.post("/analyze/batch", json={"items": [{"text": "lento um"}, {"text": "lento dois"}]})
+    assert r.status_code == 504
+    assert sorted(cancelled) == ["lento dois", "lento um"]
+
+    cancelled.clear()
+    r = client.post("/analyze/batch", json={"items": [{"text": "lento um"}, {"text": "falha"}]})
+    assert r.status_code == 503
+    assert cancelled == ["lento um"]
+
+
+def test_broken_pool_is_replaced():
+    # Um processo do pool que morre parte o pool: o pedido leva 503 e o seguinte usa um pool novo.
+    async def scenario():
+        with pytest.raises(HTTPException) as e:
+            await api.run_in_pool(os._exit, 1)
+        assert e.value.status_code == 503
+        assert api._pool is None
+        assert await api.run_in_pool(abs, -3) == 3
+        await wait_idle()
+
+    asyncio.run(scenario())
+
+
+def test_analyze_batch_blank_item():
+    r = client.post("/analyze/batch", json={"items": [{"text": "ola"}, {"text": "  "}]})
+    assert r.status_code == 400
+    assert "item 1" in r.json()["detail"]
+
+
+def test_analyze_upload_raw_body():
+    body = ("Olá mundo! " * 1000 + "ola").encode("utf-8")
+    r = client.post(
+        "/analyze/upload?n=2",
+        content=body,
+        headers={"content-type": "text/plain; charset=utf-8"},
+    )
+    assert r.status_code == 200
+    assert r.json()["items"] == [
+        {"rank": 1, "word": "ola", "count": 1001},
+        {"rank": 2, "word": "mundo", "count": 1000},
+    ]
+
+
+def test_analyze_upload_latin1_charset():
+    r = client.post(
+        "/analyze/upload",
+        content="olá olá".encode("latin-1"),
+        headers={"content-type": "text/plain; charset=latin-1"},
+    )
+    assert r.status_code == 200
+    assert r.json()["items"] == [{"rank": 1, "word": "ola", "count": 2}]
+
+
+def test_analyze_upload_multipart():
+    r = client.post(
+        "/analyze/upload?n=1",
+        files={"file": ("a.txt", "ola ola mundo".encode("utf-8"), "text/plain")},
+        data={"outro": "nao conta nao nao nao"},
+    )
+    assert r.status_code == 200
+    assert r.json()["items"] == [{"rank": 1, "word": "ola", "count": 2}]
+
+
+def test_analyze_upload_invalid_utf8():
+    r = client.post("/analyze/upload", content=b"ol\xe1", headers={"content-type": "text/plain"})
+    assert r.status_code == 400
+
+
+def test_analyze_upload_malformed_multipart():
+    # Corpos multipart mal formados dão 400 (e não 500), como o utf-8 ou o charset inválidos.
+    bodies = [
+        b"--x\r\nbad header\r\n\r\ndata\r\n--x--\r\n",
+        b"--x\r\nContent\x00-Type: a\r\n\r\ndata\r\n--x--\r\n",
+        b'--x\r\nContent-Type: text/plain; charset=\x00\r\nContent-Disposition: form-data; name="file"\r\n\r\nola\r\n--x--\r\n',
+        b"lixo",
+    ]
+    for body in bodies:
+        r = client.post("/analyze/upload", content=body, headers={"content-type": "multipart/form-data; boundary=x"})
+        assert r.status_code == 400, body
+
+
+def test_analyze_upload_empty():
+    r = client.post("/analyze/upload", content=b"   ", headers={"content-type": "text/plain"})
+    assert r.status_code == 400
+
+
+def test_analyze_stats_after_cached_counts():
+    api.CACHE.clear()
+    text = "Olá mundo!\nIsto é Python."
+
+    r1 = client.post("/analyze", json={"text": text, "n": 1})
+    assert r1.json()["stats"] is None
+
+    r2 = client.post("/analyze", json={"text": text, "n": 1, "stats": True})
+    assert r2.json()["stats"] == {"char": 25, "char_without_space": 21, "words": 5, "lines": 2, "vowels": 9}
+    assert r2.json()["items"] == r1.json()["items"]
+
+
+def test_analyze_ngram():
+    api.CACHE.clear()
+    text = "Olá mundo! Olá, mundo. Adeus mundo"
+
+    r = client.post("/analyze", json={"text": text, "n": 1, "ngram": 2})
+    assert r.status_code == 200
+    assert r.json()["items"] == [{"rank": 1, "word": "ola mundo", "count": 2}]
+
+    # as palavras e os bigramas do mesmo texto têm entradas diferentes na cache
+    r = client.post("/analyze", json={"text": text, "n": 1})
+    assert r.json()["items"] == [{"rank": 1, "word": "mundo", "count": 3}]
+
+    r = client.post("/analyze/upload?n=1&ngram=2", content=text.encode())
+    assert r.json()["items"] == [{"rank": 1, "word": "ola mundo", "count": 2}]
+
+    assert client.post("/analyze", json={"text": text, "ngram": 0}).status_code == 422
+
+
+def test_upload_stats():
+    r = client.post("/analyze/upload?n=1&stats=true", content="ola ola\nmundo".encode())
+    assert r.status_code == 200
+    assert r.json()["stats"]["words"] == 3
+    assert r.json()["stats"]["lines"] == 2
+
+
+def test_metrics_prometheus():
+    client.post("/analyze", json={"text": "metricas metricas", "n": 1})
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert '# TYPE textanalyzer_request_seconds histogram' in r.text
+    assert 'textanalyzer_request_seconds_count{method="POST",path="/analyze",status="200"}' in r.text
+    assert 'textanalyzer_request_bytes_bucket{method="POST",path="/analyze",le="100"}' in r.text
+    assert 'textanalyzer_stage_seconds_count{stage="tokenize"}' in r.text
+    assert "# TYPE process_resident_memory_bytes gauge" in r.text
+    assert "process_max_resident_memory_bytes " in r.text
+
+
+def test_documents_paginate_full_vocabulary():
+    api.DOCUMENTS.clear()
+    text = " ".join(f"w{i:03d} " * (i % 5 + 1) for i in range(250))
+    r = client.post("/documents", json={"text": text})
+    assert r.status_code == 201
+    handle = r.json()["handle"]
+    assert r.json()["words"] == 250
+
+    # Páginas seguidas pelo cursor: juntas dão o vocabulário inteiro ordenado.
+    items, cursor = [], None
+    while True:
+        params = {"limit": 100} | ({"cursor": cursor} if cursor else {})
+        page = client.get(f"/documents/{handle}/words", params=params).json()
+        assert page["total"] == 250
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = api.analyze_text(text).sorted_items()
+    assert items == api.item_rows(expected)
+
+    # NDJSON: mesmas linhas, com o cursor seguinte no cabeçalho.
+    r = client.get(f"/documents/{handle}/words", params={"limit": 100, "format": "ndjson"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in r.text.splitlines()] == items[:100]
+    second = client.get(f"/documents/{handle}/words", params={"cursor": r.headers["x-next-cursor"], "limit": 3})
+    assert second.json()["items"] == items[100:103]
+
+
+def test_documents_errors_and_expiry(monkeypatch):
+    api.DOCUMENTS.clear()
+    handle = client.post("/documents", json={"text": "a b b"}).json()["handle"]
+    other = client.post("/documents", json={"text": "c d d", "ngram": 2}).json()["handle"]
+    assert handle != other
+
+    assert client.get(f"/documents/{handle}/words", params={"cursor": "lixo"}).status_code == 400
+    cursor = api.encode_cursor(other, 1)
+    assert client.get(f"/documents/{handle}/words", params={"cursor": cursor}).status_code == 400
+    assert client.get("/documents/nao-existe/words").status_code == 404
+
+    assert client.delete(f"/documents/{handle}").status_code == 204
+    assert client.get(f"/documents/{handle}/words").status_code == 404
+
+    # Com o limite de memória ultrapassado, os documentos mais antigos expiram.
+    monkeypatch.setattr(api, "DOCUMENTS", api.ResultCache(max_entries=10, max_bytes=400))
+    first = client.post("/documents", json={"text": "um dois tres"}).json()["handle"]
+    client.post("/documents", json={"text": "quatro cinco seis"})
+    assert client.get(f"/documents/{first}/words").status_code == 404
+    assert client.post("/documents", json={"text": " ".join(f"p{i}" for i in range(100))}).status_code == 413
+
+
+def test_documents_handles_are_random_per_request():
+    # O mesmo texto dá handles diferentes (não derivados do conteúdo): apagar um não afeta o outro.
+    api.DOCUMENTS.clear()
+    first = client.post("/documents", json={"text": "a b b"}).json()["handle"]
+    second = client.post("/documents", json={"text": "a b b"}).json()["handle"]
+    assert first != second
+    assert api.text_key("a b b") not in (first, second)
+
+    assert client.delete(f"/documents/{first}").status_code == 204
+    assert client.get(f"/documents/{second}/words").json()["total"] == 2
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from app import main
+from batch import collect_files, run_batch
+from text_analysis import top_words
+
+
+def make_corpus(root: Path) -> dict[str, str]:
+    texts = {
+        "a.txt": "ola ola mundo",
+        "sub/b.txt": "mundo mundo código",
+        "sub/a.txt": "Olá adeus",
+    }
+    for name, text in texts.items():
+        p = root / name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+    (root / "ignorar.md").write_text("nao conta", encoding="utf-8")
+    return texts
+
+
+def test_collect_files(tmp_path: Path):
+    make_corpus(tmp_path)
+    files = collect_files(input_dir=str(tmp_path))
+    assert [p.relative_to(tmp_path).as_posix() for p in files] == ["a.txt", "sub/a.txt", "sub/b.txt"]
+
+    files = collect_files(pattern=str(tmp_path / "**" / "*.md"))
+    assert [p.name for p in files] == ["ignorar.md"]
+
+
+def test_run_batch_per_file_and_aggregate(tmp_path: Path):
+    texts = make_corpus(tmp_path / "in")
+    out_dir = tmp_path / "out"
+
+    files = collect_files(input_dir=str(tmp_path / "in"))
+    for workers in (1, 2):
+        result, processed = run_batch(files, out_dir, 3, write_csv=True, workers=workers)
+        assert processed == 3
+        assert result.top(3) == top_words(" ".join(texts.values()), 3)
+
+    assert (out_dir / "a.txt").exists()
+    assert (out_dir / "sub" / "a.txt").exists()
+    assert (out_dir / "sub" / "b.csv").exists()
+
+
+def test_main_input_dir(tmp_path: Path, capsys):
+    make_corpus(tmp_path / "in")
+    out_dir = tmp_path / "out"
+
+    code = main(["--input-dir", str(tmp_path / "in"), "--out", str(out_dir), "--json", "--n", "2"])
+    assert code == 0
+
+    out = capsys.readouterr().out
+    assert "1. mundo -> 3" in out
+    assert "3/3 ficheiros processados" in out
+    assert (out_dir / "_aggregate.txt").exists()
+    assert (out_dir / "_aggregate.json").exists()
+
+
+def test_main_input_dir_rejects_file_named_like_aggregate(tmp_path: Path, capsys):
+    make_corpus(tmp_path / "in")
+    (tmp_path / "in" / "_aggregate.txt").write_text("ola", encoding="utf-8")
+
+    code = main(["--input-dir", str(tmp_path / "in"), "--out", str(tmp_path / "out")])
+    assert code == 1
+    assert "_aggregate" in capsys.readouterr().out
+    assert not (tmp_path / "out").exists()
+
+
+def test_main_glob_no_files(tmp_path: Path, capsys):
+    code = main(["--glob", str(tmp_path / "*.txt")])
+    assert code == 1
+    assert "nenhum ficheiro" in capsys.readouterr().out.lower()
@@ -0,0 +1,100 @@
+from collections import Counter
+
+from benchmarks.corpus import generate_text, parse_size, write_corpus_dir
+from benchmarks.run import compare, main, run_suite
+
+
+def test_generate_text_is_deterministic_and_zipfian():
+    text = generate_text(50_000, vocab_size=500, seed=3)
+    assert text == generate_text(50_000, vocab_size=500, seed=3)
+    assert text != generate_text(50_000, vocab_size=500, seed=4)
+    assert 49_000 < len(text) <= 50_001
+
+    # Zipf: a palavra mais comum aparece muito mais vezes que a décima.
+    counts = Counter(text.lower().split()).most_common(10)
+    assert counts[0][1] > 3 * counts[9][1]
+
+
+def test_accent_density():
+    assert generate_text(5_000, accent_density=0).isascii()
+    assert not generate_text(5_000, accent_density=0.5).isascii()
+
+
+def test_corpus_dir_latin1_mix(tmp_path):
+    paths = write_corpus_dir(tmp_path, 20_000, files=4, latin1_ratio=0.5, accent_density=0.5)
+    assert len(paths) == 4
+
+    decoded = []
+    for path in paths:
+        try:
+            path.read_bytes().decode("utf-8")
+            decoded.append("utf-8")
+        except UnicodeDecodeError:
+            decoded.append("latin-1")
+    assert decoded == ["latin-1", "latin-1", "utf-8", "utf-8"]
+
+
+def test_parse_size():
+    assert parse_size("10MB") == 10 * 1024 * 1024
+    assert parse_size("512kb") == 512 * 1024
+    assert parse_size("1000") == 1000
+
+
+def test_compare_detects_regressions():
+    baseline = {"stages": {"utf-8/read": {"seconds": 1.0, "peak_bytes": 100}, "utf-8/select": {"seconds": 0.001, "peak_bytes": 0}}}
+    same = {"stages": {"utf-8/read": {"seconds": 1.1, "peak_bytes": 110}, "utf-8/select": {"seconds": 0.01, "peak_bytes": 10}}}
+    slower = {"stages": {"utf-8/read": {"seconds": 1.5, "peak_bytes": 100}, "utf-8/select": {"seconds": 0.001, "peak_bytes": 0}}}
+
+    # Etapas abaixo de min_seconds não contam em tempo (só ruído).
+    assert compare(baseline, same, threshold=20) == []
+    assert len(compare(baseline, slower, threshold=20)) == 1
+    assert compare(baseline, slower, threshold=60) == []
+
+
+def test_run_suite_and_check(tmp_path, capsys):
+    results = run_suite(20_000, repeat=1)
+    assert "utf-8/read" in results["stages"]
+    assert "latin-1/write" in results["stages"]
+    assert all(stage["seconds"] >= 0 for stage in results["stages"].values())
+
+    baseline = tmp_path / "baseline.json"
+    assert main(["--size", "20KB", "--repeat", "1", "--baseline", str(baseline), "--save"]) == 0
+    # Tolerância enorme: com o mesmo corpus não há regressões.
+    assert main(["--size", "20KB", "--repeat", "1", "--baseline", str(baseline), "--check", "--threshold", "100000"]) == 0
+    # Corpus diferente do baseline: não é comparável.
+    assert main(["--size", "30KB", "--repeat", "1", "--baseline", str(baseline), "--check"]) == 1
+
+
+def test_loadtest_workload_and_percentiles():
+    from benchmarks.loadtest import build_workload, parse_mix, percentile
+
+    mix = parse_mix("tiny=1,10KB=1")
+    assert mix == [("tiny", 64, 1.0), ("10KB", 10 * 1024, 1.0)]
+
+    workload = build_workload(200, mix, repeat_ratio=0.5, health_ratio=0.2, seed=1)
+    assert workload == build_workload(200, mix, repeat_ratio=0.5, health_ratio=0.2, seed=1)
+    analyze = [item for item in workload if item[0] == "/analyze"]
+    assert 0 < len(workload) - len(analyze) < 100
+    # Metade dos textos (aprox.) repete um documento já enviado.
+    assert len({doc for _, _, doc in analyze}) < len(analyze) * 0.8
+
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 99) == 4.0
+
+
+def test_loadtest_in_process(tmp_path, capsys):
+    import json
+
+    from benchmarks.loadtest import main as loadtest_main
+
+    out = tmp_path / "loadtest.json"
+    args = ["--requests", "30", "--concurrency", "4", "--mix", "tiny=3,2KB=1", "--repeat-ratio", "0.5"]
+    assert loadtest_main(args + ["--out", str(out)]) == 0
+    results = json.loads(out.read_text())
+    assert results["endpoints"]["/analyze"]["errors"] == 0
+    assert results["endpoints"]["/analyze"]["p50_ms"] <= results["endpoints"]["/analyze"]["p99_ms"]
+    assert results["memory"]["after"]["rss"] > 0
+    assert results["meta"]["target"] == "in-process"
+
+    assert loadtest_main(args + ["--compare", str(out)]) == 0
+    assert "/analyze tiny" in capsys.readouterr().out
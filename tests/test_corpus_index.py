@@ -0,0 +1,89 @@
+import os
+from pathlib import Path
+
+from app import main
+from batch import collect_files, run_indexed_batch
+from text_analysis import top_words
+
+
+def write(p: Path, text: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+
+
+def run(tmp_path: Path):
+    files = collect_files(input_dir=str(tmp_path / "in"))
+    return run_indexed_batch(files, tmp_path / "out", 5, tmp_path / "index.sqlite")
+
+
+def test_indexed_batch_only_recounts_changed_files(tmp_path: Path):
+    write(tmp_path / "in" / "a.txt", "ola ola mundo")
+    write(tmp_path / "in" / "b.txt", "mundo adeus")
+    write(tmp_path / "in" / "c.txt", "adeus adeus adeus")
+
+    result, files, changed, removed = run(tmp_path)
+    assert (files, changed, removed) == (3, 3, 0)
+    assert result.top(5) == top_words("ola ola mundo mundo adeus adeus adeus adeus", 5)
+
+    # sem alterações: nada é recontado
+    result, files, changed, removed = run(tmp_path)
+    assert (files, changed, removed) == (3, 0, 0)
+    assert result.top(1) == [("adeus", 4)]
+
+    # "touch" sem mudar o conteúdo: o hash é igual, não reconta
+    st = (tmp_path / "in" / "a.txt").stat()
+    os.utime(tmp_path / "in" / "a.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert run(tmp_path)[2] == 0
+
+    # um ficheiro alterado, um removido, um novo
+    write(tmp_path / "in" / "a.txt", "ola")
+    (tmp_path / "in" / "c.txt").unlink()
+    write(tmp_path / "in" / "d.txt", "novo novo")
+
+    result, files, changed, removed = run(tmp_path)
+    assert (files, changed, removed) == (3, 2, 1)
+    assert result.top(5) == top_words("ola mundo adeus novo novo", 5)
+
+
+def test_indexed_batch_hashes_while_counting(tmp_path: Path, monkeypatch):
+    import corpus_index
+
+    write(tmp_path / "in" / "a.txt", "ola ola mundo")
+    expected = corpus_index.file_sha256(tmp_path / "in" / "a.txt")
+
+    # ficheiros novos: o hash vem da leitura que conta, o ficheiro não é lido uma segunda vez
+    def fail(path):
+        raise AssertionError(f"segunda leitura de {path}")
+
+    monkeypatch.setattr(corpus_index, "file_sha256", fail)
+    run(tmp_path)
+
+    with corpus_index.CorpusIndex(tmp_path / "index.sqlite") as index:
+        assert [row[0] for row in index._db.execute("SELECT sha256 FROM files")] == [expected]
+
+
+def test_indexed_batch_rewrites_outputs_when_parameters_change(tmp_path: Path):
+    write(tmp_path / "in" / "a.txt", "ola ola mundo adeus")
+    files = collect_files(input_dir=str(tmp_path / "in"))
+    index = tmp_path / "index.sqlite"
+
+    run_indexed_batch(files, tmp_path / "out", 5, index)
+    assert (tmp_path / "out" / "a.txt").read_text(encoding="utf-8").count("\n") == 4
+    assert not (tmp_path / "out" / "a.csv").exists()
+
+    # outros --n e formatos: os outputs são reescritos a partir do índice, sem recontar
+    _, _, changed, _ = run_indexed_batch(files, tmp_path / "out", 1, index, write_csv=True)
+    assert changed == 0
+    assert (tmp_path / "out" / "a.txt").read_text(encoding="utf-8").count("\n") == 2
+    assert (tmp_path / "out" / "a.csv").exists()
+
+    # mesmos parâmetros: nada é reescrito
+    (tmp_path / "out" / "a.csv").unlink()
+    run_indexed_batch(files, tmp_path / "out", 1, index, write_csv=True)
+    assert not (tmp_path / "out" / "a.csv").exists()
+
+
+def test_main_index_requires_batch(capsys):
+    code = main(["--text", "ola", "--index"])
+    assert code == 1
+    assert "--index" in capsys.readouterr().out
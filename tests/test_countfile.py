@@ -0,0 +1,90 @@
+import random
+from collections import Counter
+
+import pytest
+
+from app import main
+from countfile import CountFile, merge_count_files, merge_files, read_counts, top_from_sorted, write_counts
+from text_analysis import sort_counts
+
+
+def random_counts(rng, size):
+    words = {"".join(rng.choices("abcéõx", k=rng.randint(1, 6))) for _ in range(size)}
+    return {word: rng.randint(1, 50) for word in words}
+
+
+def test_roundtrip_and_lookup(tmp_path):
+    counts = random_counts(random.Random(1), 3000)
+    path = tmp_path / "a.wcnt"
+    assert write_counts(counts, path) == len(counts)
+
+    assert read_counts(path) == counts
+    with CountFile(path) as f:
+        assert len(f) == len(counts)
+        assert [word for word, _ in f] == sorted(counts)
+        for word in list(counts)[:50]:
+            assert f.get(word) == counts[word]
+        assert f.get("zzz-nao-existe") == 0
+
+
+def test_empty_and_invalid_files(tmp_path):
+    path = tmp_path / "empty.wcnt"
+    write_counts({}, path)
+    assert read_counts(path) == {}
+
+    bad = tmp_path / "bad.wcnt"
+    bad.write_bytes(b"nao e um ficheiro de contagens" * 3)
+    with pytest.raises(ValueError):
+        CountFile(bad)
+
+
+def test_merge_matches_counter(tmp_path):
+    rng = random.Random(2)
+    parts = [random_counts(rng, 2000) for _ in range(4)]
+    paths = []
+    for i, counts in enumerate(parts):
+        paths.append(tmp_path / f"{i}.wcnt")
+        write_counts(counts, paths[-1])
+
+    expected = Counter()
+    for counts in parts:
+        expected.update(counts)
+
+    assert list(merge_count_files(paths)) == sorted(expected.items())
+
+    # O top do merge tem a mesma ordenação (e os mesmos empates) que sort_counts.
+    for n in (1, 10, 500, None):
+        top = top_from_sorted(merge_count_files(paths), n)
+        assert top == sort_counts(expected, n or len(expected))
+
+    out = tmp_path / "merged.wcnt"
+    top, total = merge_files(paths, 5, out)
+    assert total == len(expected)
+    assert top == sort_counts(expected, 5)
+    assert read_counts(out) == dict(expected)
+
+
+def test_main_counts_and_merge(tmp_path, capsys):
+    a = tmp_path / "a.wcnt"
+    b = tmp_path / "b.wcnt"
+    assert main(["--text", "Olá mundo olá", "--counts", str(a)]) == 0
+    assert main(["--text", "mundo mundo adeus", "--counts", str(b)]) == 0
+    assert read_counts(a) == {"ola": 2, "mundo": 1}
+    capsys.readouterr()
+
+    merged = tmp_path / "m.wcnt"
+    out = tmp_path / "m.txt"
+    assert main(["merge", str(a), str(b), "--n", "2", "--counts", str(merged), "--out", str(out), "--csv"]) == 0
+
+    printed = capsys.readouterr().out
+    assert "1. mundo -> 3" in printed
+    assert "2. ola -> 2" in printed
+    assert read_counts(merged) == {"adeus": 1, "mundo": 3, "ola": 2}
+    assert out.with_suffix(".csv").read_text(encoding="utf-8").splitlines()[1] == "1,mundo,3"
+
+
+def test_main_merge_invalid_file(tmp_path, capsys):
+    bad = tmp_path / "bad.wcnt"
+    bad.write_bytes(b"x")
+    assert main(["merge", str(bad)]) == 1
+    assert "Erro" in capsys.readouterr().out
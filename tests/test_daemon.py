@@ -0,0 +1,141 @@
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from benchmarks.import_audit import audit, forbidden
+import daemon as daemon_module
+from daemon import decode_args, decode_env, encode_args, encode_env, run_client, socket_path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="o daemon precisa de fork e sockets UNIX")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    path = tmp_path / "d.sock"
+    proc = subprocess.Popen(
+        [sys.executable, "app.py", "--serve", "--socket", str(path)], cwd=ROOT, stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(str(path))
+            break
+        except OSError:
+            assert time.monotonic() < deadline, "o daemon não arrancou"
+            time.sleep(0.05)
+    yield path
+    proc.send_signal(signal.SIGTERM)
+    proc.wait(10)
+    assert not path.exists()
+
+
+def test_args_roundtrip():
+    assert decode_args(encode_args("/tmp/x", ["--text", "olá mundo", ""])) == ("/tmp/x", ["--text", "olá mundo", ""])
+
+
+def test_env_roundtrip():
+    env = {"LOG_LEVEL": "DEBUG", "VAZIA": "", "COM_IGUAL": "a=b"}
+    assert decode_env(encode_env(env)) == env
+    assert decode_env(encode_env({})) == {}
+
+
+def test_socket_path_is_private(monkeypatch, tmp_path):
+    monkeypatch.delenv("TEXT_ANALYSIS_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert socket_path() == str(tmp_path / "text-analysis.sock")
+
+    # Sem XDG_RUNTIME_DIR: numa pasta do utilizador, não diretamente na pasta temporária.
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    assert socket_path() == str(tmp_path / f"text-analysis-{os.getuid()}" / "text-analysis.sock")
+
+
+def test_run_client_without_daemon(tmp_path):
+    assert run_client(["--text", "ola"], str(tmp_path / "nao_existe.sock")) is None
+
+
+def test_client_runs_in_daemon(daemon, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b""), encoding="utf-8"))
+    out = tmp_path / "r.txt"
+    assert run_client(["--text", "Olá olá mundo", "--n", "1", "--csv", "--out", str(out)], str(daemon)) == 0
+    assert "1. ola -> 2" in capsys.readouterr().out
+    assert out.with_suffix(".csv").read_text(encoding="utf-8").splitlines()[1] == "1,ola,2"
+
+    # Erros de argumentos (argparse) e de validação têm o mesmo código de saída que no próprio processo.
+    assert run_client(["--n", "3"], str(daemon)) == 2
+    assert run_client(["--text", "ola", "--n", "0"], str(daemon)) == 1
+
+
+def test_client_forwards_stdin(daemon, monkeypatch, capsys):
+    data = "ação ação fim\n".encode("utf-8") * 1000
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"))
+    assert run_client(["--input", "-", "--n", "2"], str(daemon)) == 0
+
+    out = capsys.readouterr().out
+    assert "1. acao -> 2000" in out
+    assert "2. fim -> 1000" in out
+
+
+def test_client_forwards_environment(daemon, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b""), encoding="utf-8"))
+    # O LOG_LEVEL do cliente (e não o do daemon) é o usado: um nível inválido dá o mesmo erro que no próprio processo.
+    monkeypatch.setenv("LOG_LEVEL", "nivel_invalido")
+    assert run_client(["--text", "ola"], str(daemon)) == 1
+    assert "nível de logging inválido" in capsys.readouterr().out
+
+
+def test_client_refuses_untrusted_socket(daemon, tmp_path, monkeypatch, capsys):
+    # Um ficheiro que não é um socket não é usado (a análise corre no próprio processo).
+    fake = tmp_path / "falso.sock"
+    fake.write_text("")
+    assert run_client(["--text", "ola"], str(fake)) is None
+    assert "a ignorar" in capsys.readouterr().err
+
+    # Um daemon de outro utilizador (uid do outro lado do socket) também não.
+    monkeypatch.setattr(daemon_module, "peer_uid", lambda sock: os.getuid() + 1)
+    assert run_client(["--text", "ola"], str(daemon)) is None
+    assert "outro utilizador" in capsys.readouterr().err
+
+
+def test_serve_refuses_shared_directory(tmp_path):
+    shared = tmp_path / "partilhada"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(RuntimeError):
+        daemon_module._prepare_dir(shared)
+
+    private = tmp_path / "nova"
+    daemon_module._prepare_dir(private)
+    assert private.stat().st_mode & 0o777 == 0o700
+
+
+def test_script_uses_daemon_and_falls_back(daemon, tmp_path):
+    for path in (daemon, tmp_path / "nao_existe.sock"):
+        done = subprocess.run(
+            [sys.executable, "app.py", "--input", "-", "--n", "1"],
+            cwd=ROOT,
+            input=b"b a b",
+            capture_output=True,
+            env={**os.environ, "TEXT_ANALYSIS_SOCKET": str(path)},
+        )
+        assert done.returncode == 0
+        assert b"1. b -> 2" in done.stdout
+
+
+def test_import_audit():
+    # Importar o app.py não carrega os módulos que só algumas opções usam, e o cliente do daemon
+    # não carrega os módulos da análise.
+    for module in ("app", "daemon"):
+        loaded, times = audit(module)
+        assert module in loaded and times
+        assert forbidden(module, loaded) == []
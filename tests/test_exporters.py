@@ -0,0 +1,103 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+import exporters
+from app import main
+from exporters import atomic_open, write_outputs
+
+ITEMS = [("ola", 3), ('diz "olá"', 2), ("日本", 1)]
+
+
+def rows_as_dicts(items):
+    return [{"rank": i, "word": word, "count": count} for i, (word, count) in enumerate(items, 1)]
+
+
+@pytest.mark.parametrize("items", [ITEMS, []])
+@pytest.mark.parametrize("extras", [None, {"stats": {"char": 3, "words": 1}, "profile": {"total_seconds": 0.5}}])
+def test_json_matches_json_dump(tmp_path: Path, monkeypatch, items, extras):
+    # Blocos pequenos, para testar a junção entre blocos.
+    monkeypatch.setattr(exporters, "BLOCK_ROWS", 2)
+    write_outputs(items, {"json": tmp_path / "r.json"}, 3, extras=extras)
+
+    data = rows_as_dicts(items)
+    if extras:
+        data = {"items": data, **extras}
+    assert (tmp_path / "r.json").read_text(encoding="utf-8") == json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def test_all_formats_in_one_pass_with_gzip(tmp_path: Path):
+    paths = {fmt: tmp_path / f"r.{fmt}" for fmt in ("txt", "csv", "json", "jsonl")}
+    written = write_outputs(iter(ITEMS), paths, 3, compress=True)
+    assert written["csv"] == tmp_path / "r.csv.gz"
+
+    def read(fmt):
+        return gzip.decompress(written[fmt].read_bytes()).decode("utf-8")
+
+    assert read("txt") == "Top 3 palavras mais comuns:\n1. ola -> 3\n2. diz \"olá\" -> 2\n3. 日本 -> 1\n"
+    assert read("csv").splitlines()[:2] == ["rank,word,count", "1,ola,3"]
+    assert json.loads(read("json")) == rows_as_dicts(ITEMS)
+    assert [json.loads(line) for line in read("jsonl").splitlines()] == rows_as_dicts(ITEMS)
+
+
+def test_atomic_open_keeps_old_file_on_error(tmp_path: Path):
+    path = tmp_path / "r.txt"
+    path.write_text("antigo", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with atomic_open(path) as f:
+            f.write("novo e incompleto")
+            raise RuntimeError("falha a meio")
+
+    assert path.read_text(encoding="utf-8") == "antigo"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_atomic_open_fsyncs_before_replace(tmp_path: Path, monkeypatch):
+    # O temporário (já com o conteúdo completo, mesmo comprimido) vai para o disco antes de substituir o destino.
+    events = []
+    fsync, replace = exporters.os.fsync, exporters.os.replace
+
+    def spy_fsync(fd):
+        events.append(("fsync", exporters.os.fstat(fd).st_size))
+        fsync(fd)
+
+    def spy_replace(src, dst):
+        events.append(("replace", Path(dst).name))
+        replace(src, dst)
+
+    monkeypatch.setattr(exporters.os, "fsync", spy_fsync)
+    monkeypatch.setattr(exporters.os, "replace", spy_replace)
+    with atomic_open(tmp_path / "r.txt", compress=True) as f:
+        f.write("ola " * 1000)
+
+    size = (tmp_path / "r.txt.gz").stat().st_size
+    assert events[:2] == [("fsync", size), ("replace", "r.txt.gz")]
+    assert len(events) == (3 if exporters.os.name == "posix" else 2)  # e o fsync da pasta
+
+
+def test_main_n_all_jsonl(tmp_path: Path, capsys):
+    out = tmp_path / "r.txt"
+    code = main(["--text", "c b a b c c", "--n", "all", "--out", str(out), "--jsonl"])
+    assert code == 0
+
+    assert "Top 3 palavras mais comuns:" in capsys.readouterr().out
+    lines = out.with_suffix(".jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["word"] for line in lines] == ["c", "b", "a"]
+
+
+def test_error_column_in_all_formats(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(exporters, "BLOCK_ROWS", 2)
+    items = [("ola", 10, 0), ("mundo", 7, 2), ("日本", 3, 3)]
+    paths = {fmt: tmp_path / f"r{suffix}" for fmt, suffix in exporters.SUFFIXES.items()}
+    write_outputs(items, paths, 3, extras={"approx": {"max_error": 3}}, errors=True)
+
+    data = [{"rank": i, "word": w, "count": c, "error": e} for i, (w, c, e) in enumerate(items, 1)]
+    assert paths["json"].read_text(encoding="utf-8") == json.dumps(
+        {"items": data, "approx": {"max_error": 3}}, ensure_ascii=False, indent=2
+    )
+    assert [json.loads(line) for line in paths["jsonl"].read_text(encoding="utf-8").splitlines()] == data
+    assert paths["csv"].read_text(encoding="utf-8").splitlines()[:2] == ["rank,word,count,error", "1,ola,10,0"]
+    assert "2. mundo -> 7 (±2)" in paths["txt"].read_text(encoding="utf-8")
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import file_manager_main
+from file_manager_main import export_items, session
+from text_analysis import WordIndex, analyze_text
+
+
+def run_session(index: WordIndex, commands: list[str], default_output: Path) -> list[str]:
+    # Corre a sessão com os comandos dados e retorna tudo o que foi mostrado.
+    commands = iter(commands)
+    shown = []
+
+    def read(prompt):
+        try:
+            return next(commands)
+        except StopIteration:
+            raise EOFError
+
+    session(index, default_output, read=read, write=shown.append)
+    return shown[1:]  # sem a ajuda inicial
+
+
+def test_session_commands_use_the_index(tmp_path: Path, monkeypatch):
+    index = WordIndex(analyze_text("Olá olá mundo mundo mundo maçã mar a"))
+    # nenhum comando volta a contar o texto
+    monkeypatch.setattr(file_manager_main, "analyze_text", None)
+
+    shown = run_session(index, ["top 2", "palavra Olá", "prefixo ma", "min 2", "top x", "xyz", "sair", "top 1"], tmp_path)
+    assert shown[0] == "Top 2 palavras mais comuns:\n1. mundo -> 3\n2. ola -> 2\n"
+    assert shown[1] == "Olá -> 2"
+    assert shown[2] == "maca -> 1\nmar -> 1"
+    assert shown[3].splitlines()[1:] == ["1. mundo -> 3", "2. ola -> 2"]
+    assert shown[4] == "Número inválido."
+    assert shown[5].startswith("Comando inválido")
+    # "sair" termina a sessão (o "top 1" já não é lido)
+    assert len(shown) == 6
+
+
+def test_session_saves_last_list(tmp_path: Path):
+    index = WordIndex(analyze_text("b a b c c c"))
+    shown = run_session(index, ["prefixo b", "guardar"], tmp_path / "out")
+    assert shown[1].startswith("Guardado em:")
+    assert (tmp_path / "out" / "report.csv").read_text(encoding="utf-8").splitlines() == ["rank,word,count", "1,b,2"]
+    assert (tmp_path / "out" / "report.txt").exists()
+    assert (tmp_path / "out" / "report.json").exists()
+
+    # o relatório .txt tem o título do N pedido
+    written = export_items(index.top(2), tmp_path / "top.txt", 2)
+    assert written["txt"].read_text(encoding="utf-8") == "Top 2 palavras mais comuns:\n1. c -> 3\n2. b -> 2\n"
@@ -0,0 +1,118 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import follow as follow_module
+from app import main
+from follow import FileTail, WindowCounter, follow, parse_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def events(tail):
+    return [(event, data) for event, data in tail.read()]
+
+
+def test_parse_duration():
+    assert parse_duration("300") == 300
+    assert parse_duration("5m") == 300
+    assert parse_duration("1.5h") == 5400
+    with pytest.raises(ValueError):
+        parse_duration("5 minutos")
+
+
+def test_file_tail_append_truncate_rotate(tmp_path: Path):
+    path = tmp_path / "app.log"
+    path.write_bytes(b"antigo\n")
+
+    tail = FileTail(path)  # começa no fim, como tail -f
+    assert events(tail) == []
+
+    with path.open("ab") as f:
+        f.write(b"ola mundo\n")
+    assert events(tail) == [("data", b"ola mundo\n")]
+
+    # truncado: volta ao início
+    path.write_bytes(b"x\n")
+    assert events(tail) == [("reset", b""), ("data", b"x\n")]
+
+    # rodado: o resto do antigo e depois o novo desde o início
+    with path.open("ab") as f:
+        f.write(b"fim\n")
+    os.rename(path, tmp_path / "app.log.1")
+    path.write_bytes(b"novo\n")
+    assert events(tail) == [("data", b"fim\n"), ("reset", b""), ("data", b"novo\n")]
+    tail.close()
+
+
+def test_window_counter_expires_old_buckets():
+    clock = FakeClock()
+    counter = WindowCounter(window=300, clock=clock)
+    counter.feed_bytes("Olá olá mundo\n".encode())
+    clock.now += 200
+    counter.feed_bytes(b"mundo adeus\n")
+    assert counter.top(3) == [("mundo", 2), ("ola", 2), ("adeus", 1)]
+
+    # 310s depois da primeira linha: só a segunda está na janela
+    clock.now += 110
+    assert counter.top(3) == [("adeus", 1), ("mundo", 1)]
+
+    clock.now += 300
+    assert counter.top(3) == []
+
+
+def test_follow_counts_only_appended_bytes(tmp_path: Path):
+    path = tmp_path / "app.log"
+    path.write_bytes(b"ignorado " * 10)
+    clock = FakeClock()
+    emitted = []
+
+    # Cada espera faz uma alteração no ficheiro; pára quando acabarem.
+    steps = [
+        lambda: path.open("ab").write(b"\nola ola mun"),
+        lambda: path.open("ab").write("do\nolá\n".encode()),
+        lambda: path.write_bytes(b"depois truncado\n"),
+        lambda: (os.rename(path, tmp_path / "app.log.1"), path.write_bytes(b"rodado\n")),
+        lambda: None,
+    ]
+
+    def sleep(seconds):
+        clock.sleep(seconds)
+        if steps:
+            steps.pop(0)()
+
+    counter = follow(path, emitted.append, n=5, interval=1, clock=clock, sleep=sleep, stop=lambda: not steps)
+    # "ignorado" já estava no ficheiro antes de começar
+    assert counter.top(None) == [("ola", 3), ("depois", 1), ("mundo", 1), ("rodado", 1), ("truncado", 1)]
+    # um top a cada segundo (5 esperas de 0.5s) e o top final
+    assert len(emitted) == 3
+    assert emitted[-1] == counter.top(5)
+
+
+def test_main_follow(tmp_path: Path, capsys, monkeypatch):
+    path = tmp_path / "app.log"
+    path.write_text("ola mundo ola\n", encoding="utf-8")
+    out = tmp_path / "top.txt"
+
+    def interrupt(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(follow_module.time, "sleep", interrupt)
+    code = main(["--input", str(path), "--follow", "--from-start", "--n", "1", "--out", str(out)])
+    assert code == 0
+    assert "1. ola -> 2" in capsys.readouterr().out
+    assert "1. ola -> 2" in out.read_text(encoding="utf-8")
+
+    assert main(["--text", "a", "--follow"]) == 1
+    assert main(["--input", str(path), "--window", "5m"]) == 1
+    assert main(["--input", str(path), "--follow", "--interval", "0"]) == 1
@@ -0,0 +1,60 @@
+from instrumentation import Histogram, Profiler, profiling, stage
+from text_analysis import analyze_text, top_words
+
+
+def test_stage_is_noop_without_profiler():
+    with stage("count") as s:
+        s.add(bytes=10, tokens=2)
+    assert not s
+
+
+def test_profiler_records_analysis_stages():
+    profiler = Profiler()
+    with profiling(profiler):
+        result = analyze_text("Olá olá mundo, mundo! ola")
+        result.top(2)
+
+    stages = profiler.as_dict()["stages"]
+    assert {"normalize", "tokenize", "count", "select"} <= set(stages)
+    assert stages["tokenize"]["tokens"] == 5
+    assert all(entry["calls"] >= 1 and entry["seconds"] >= 0 for entry in stages.values())
+
+    # Depois de sair do contexto, a instrumentação volta a estar desligada.
+    top_words("ola ola", 1)
+    assert profiler.stages["tokenize"]["calls"] == 1
+
+
+def test_profiler_memory_peak():
+    profiler = Profiler(memory=True)
+    with profiling(profiler):
+        analyze_text("palavra " * 10_000).top(1)
+
+    assert profiler.stages["tokenize"]["peak_bytes"] > 0
+    assert "pico (MB)" in profiler.report()
+
+
+def test_profiler_memory_peak_survives_nested_stages():
+    profiler = Profiler(memory=True)
+    with profiling(profiler):
+        with stage("outer"):
+            data = bytearray(5_000_000)
+            del data
+            with stage("inner"):
+                pass
+
+    # O pico da etapa exterior não se perde com o reset_peak() da etapa aninhada.
+    assert profiler.stages["outer"]["peak_bytes"] >= 5_000_000
+    assert profiler.stages["inner"]["peak_bytes"] < 5_000_000
+
+
+def test_histogram_prometheus_format():
+    histogram = Histogram("x_seconds", "Teste.", (0.1, 1.0), ("stage",))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5.0, "a")
+
+    lines = histogram.render()
+    assert 'x_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'x_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'x_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'x_seconds_count{stage="a"} 3' in lines
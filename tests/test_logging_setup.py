@@ -0,0 +1,52 @@
+import logging
+import typing
+
+import logging_setup
+from app import main
+
+
+def test_setup_logging_is_idempotent_and_async(tmp_path):
+    log_path = tmp_path / "logs" / "app.log"
+    root = logging.getLogger()
+
+    logging_setup.setup_logging("INFO", log_path)
+    handlers = list(root.handlers)
+    logging_setup.setup_logging("INFO", log_path)
+    logging_setup.setup_logging("INFO", log_path)
+    assert root.handlers == handlers
+
+    logging.info("linha unica de teste")
+    logging_setup.flush_logging()
+    assert log_path.read_text(encoding="utf-8").count("linha unica de teste") == 1
+
+
+def test_setup_logging_level(tmp_path):
+    log_path = tmp_path / "app.log"
+    logging_setup.setup_logging("ERROR", log_path)
+    logging.info("info escondida")
+    logging.error("erro visivel")
+    logging_setup.flush_logging()
+
+    content = log_path.read_text(encoding="utf-8")
+    assert "erro visivel" in content
+    assert "info escondida" not in content
+
+    logging_setup.setup_logging("INFO", log_path)
+
+
+def test_main_does_not_duplicate_handlers(capsys):
+    main(["--text", "ola"])
+    count = len(logging.getLogger().handlers)
+    main(["--text", "ola"])
+    main(["--text", "ola", "--log-level", "debug"])
+    assert len(logging.getLogger().handlers) == count
+
+    assert main(["--text", "ola", "--log-level", "nada"]) == 1
+    main(["--text", "ola", "--log-level", "info"])
+
+
+def test_annotations_resolve(tmp_path):
+    logging_setup.setup_logging("INFO", tmp_path / "app.log")
+    hints = typing.get_type_hints(logging_setup)
+    assert hints["_listener"] == logging.handlers.QueueListener | None
+    assert typing.get_type_hints(logging_setup._make_file_handler)["return"] is logging.handlers.RotatingFileHandler
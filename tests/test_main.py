@@ -1,3 +1,5 @@
+import json
+
 from app import main
 
 def test_main_text_ok(capsys):
@@ -20,4 +22,41 @@ def test_main_empty_text(capsys):
     assert code == 1
 
     out = capsys.readouterr().out.lower()
-    assert "nenhum texto fornecido" in out
\ No newline at end of file
+    assert "nenhum texto fornecido" in out
+
+def test_main_stats(capsys, tmp_path):
+    out_path = tmp_path / "r.txt"
+    code = main(["--text", "Olá mundo!\nIsto é Python.", "--stats", "--json", "--out", str(out_path)])
+    assert code == 0
+
+    out = capsys.readouterr().out
+    assert "Palavras: 5" in out
+    assert "Vogais: 9" in out
+
+    data = json.loads(out_path.with_suffix(".json").read_text(encoding="utf-8"))
+    assert data["stats"]["lines"] == 2
+    assert data["items"][0] == {"rank": 1, "word": "e", "count": 1}
+
+def test_main_stats_input_file(capsys, tmp_path):
+    path = tmp_path / "t.txt"
+    path.write_bytes("olá olá\nmundo\n".encode("latin-1"))
+    code = main(["--input", str(path), "--stats"])
+    assert code == 0
+
+    out = capsys.readouterr().out
+    assert "1. ola -> 2" in out
+    assert "Linhas: 2" in out
+
+def test_main_profile(capsys, tmp_path):
+    out_path = tmp_path / "r.txt"
+    code = main(["--text", "ola ola mundo", "--profile", "--json", "--out", str(out_path)])
+    assert code == 0
+
+    out = capsys.readouterr().out
+    assert "Perfil por etapa:" in out
+    assert "tokenize" in out
+
+    data = json.loads(out_path.with_suffix(".json").read_text(encoding="utf-8"))
+    assert data["items"][0] == {"rank": 1, "word": "ola", "count": 2}
+    assert data["profile"]["stages"]["tokenize"]["tokens"] == 3
+    assert "select" in data["profile"]["stages"]
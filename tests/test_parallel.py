@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from app import main
+from parallel import count_file_parallel, split_ranges
+from text_analysis import top_words
+
+TEXT = "Olá mundo! Código é divertido, código é incrível.\nAção ação AÇÃO coração\n" * 200
+
+
+def test_split_ranges_cut_on_whitespace():
+    data = TEXT.encode("utf-8")
+    ranges = split_ranges(data, 7)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[end - 1:end].isspace()
+
+
+def test_count_file_parallel_matches_single_process(tmp_path: Path):
+    p = tmp_path / "a.txt"
+    p.write_text(TEXT, encoding="utf-8")
+
+    counted = count_file_parallel(str(p), workers=3, min_size=0)
+    assert counted is not None
+    result, has_text = counted
+    assert has_text
+    assert result.top(10) == top_words(TEXT, 10)
+
+
+def test_count_file_parallel_latin1_fallback(tmp_path: Path):
+    p = tmp_path / "b.txt"
+    p.write_text(TEXT, encoding="latin-1")
+
+    counted = count_file_parallel(str(p), workers=2, min_size=0)
+    assert counted is not None
+    assert counted[0].top(10) == top_words(TEXT, 10)
+
+
+def test_count_file_parallel_not_found(tmp_path: Path):
+    assert count_file_parallel(str(tmp_path / "nao_existe.txt"), workers=2) is None
+
+
+def test_main_workers(tmp_path: Path, capsys):
+    p = tmp_path / "c.txt"
+    p.write_text("ola ola mundo", encoding="utf-8")
+
+    code = main(["--input", str(p), "--workers", "2", "--n", "2"])
+    assert code == 0
+    assert "1. ola -> 2" in capsys.readouterr().out
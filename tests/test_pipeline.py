@@ -0,0 +1,95 @@
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app import main
+from pipeline import analyze_documents, run_pipeline
+from text_analysis import top_words
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def stdin_with(monkeypatch, data: bytes):
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"))
+
+
+def test_main_reads_stdin(monkeypatch, capsys):
+    stdin_with(monkeypatch, "Olá olá mundo\n".encode("utf-8") * 3)
+    assert main(["--input", "-", "--n", "2", "--chunk-size", "3"]) == 0
+
+    out = capsys.readouterr().out
+    assert "1. ola -> 6" in out
+    assert "2. mundo -> 3" in out
+
+
+def test_stdin_latin1_fallback_midstream(monkeypatch, capsys):
+    # Não dá para reler o stdin: o que já foi contado em utf-8 fica, o resto passa a latin-1.
+    stdin_with(monkeypatch, "ação ".encode("utf-8") * 5 + "olá".encode("latin-1"))
+    assert main(["--input", "-", "--n", "2", "--chunk-size", "4"]) == 0
+
+    out = capsys.readouterr().out
+    assert "1. acao -> 5" in out
+    assert "2. ola -> 1" in out
+
+
+def test_analyze_documents_and_errors():
+    lines = [
+        json.dumps({"id": "a", "text": "b a b"}).encode(),
+        b"\n",
+        b"nao e json",
+        json.dumps({"id": 2, "text": 5}).encode(),
+    ]
+    out = [json.loads(line) for line in analyze_documents(lines, 5)]
+
+    assert out[0] == {"id": "a", "items": [{"rank": 1, "word": "b", "count": 2}, {"rank": 2, "word": "a", "count": 1}]}
+    assert len(out) == 3
+    assert out[1]["id"] is None and "error" in out[1]
+    assert out[2]["id"] == 2 and "error" in out[2]
+
+
+def test_main_ndjson_lone_surrogate_does_not_stop():
+    # JSON válido com um surrogate isolado no id e no texto: não pode impedir a escrita dos seguintes.
+    data = b'{"id": "\\ud800", "text": "ola \\udc80x"}\n{"id": 2, "text": "b"}\n'
+    done = subprocess.run(
+        [sys.executable, "app.py", "--input", "-", "--ndjson"], cwd=ROOT, input=data, capture_output=True
+    )
+    assert done.returncode == 0, done.stderr
+
+    lines = [json.loads(line) for line in done.stdout.splitlines()]
+    assert [line["id"] for line in lines] == ["\ud800", 2]
+    assert lines[1]["items"] == [{"rank": 1, "word": "b", "count": 1}]
+
+
+def test_run_pipeline_preserves_order_with_workers():
+    texts = [f"doc{i} " * (i % 7 + 1) + "comum" for i in range(50)]
+    source = io.BytesIO(b"".join(json.dumps({"id": i, "text": t}).encode() + b"\n" for i, t in enumerate(texts)))
+    out = io.StringIO()
+
+    assert run_pipeline(source, out, 2, workers=2, batch_size=4) == 50
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["id"] for line in lines] == list(range(50))
+    for line, text in zip(lines, texts):
+        assert [(item["word"], item["count"]) for item in line["items"]] == top_words(text, 2)
+
+
+def test_main_ndjson_stdin(monkeypatch, capsys):
+    docs = [{"id": 1, "text": "Olá mundo olá"}, {"id": 2, "text": "um dois dois"}]
+    stdin_with(monkeypatch, "".join(json.dumps(d) + "\n" for d in docs).encode("utf-8"))
+    assert main(["--input", "-", "--ndjson", "--n", "1", "--stats", "--batch-size", "1"]) == 0
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["items"] for line in lines] == [
+        [{"rank": 1, "word": "ola", "count": 2}],
+        [{"rank": 1, "word": "dois", "count": 2}],
+    ]
+    assert lines[0]["stats"]["words"] == 3
+
+
+def test_main_ndjson_rejects_outputs(capsys):
+    assert main(["--input", "-", "--ndjson", "--csv"]) == 1
+    assert main(["--input", "-", "--ndjson", "--batch-size", "0"]) == 1
+    assert main(["--input", "-", "--workers", "2"]) == 1
+    assert main(["--text", "a", "--ndjson"]) == 1
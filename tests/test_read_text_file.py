@@ -1,5 +1,6 @@
 from pathlib import Path
-from app import read_text_file
+from app import count_file_words, main, read_text_file
+from text_analysis import count_words
 
 def test_read_text_file_utf8(tmp_path: Path):
     p = tmp_path / "a.txt"
@@ -18,4 +19,53 @@ def test_read_text_file_latin1_fallback(tmp_path: Path):
 def test_read_text_file_not_found(tmp_path: Path):
     p = tmp_path / "nao_existe.txt"
     text = read_text_file(str(p))
-    assert text == ""
\ No newline at end of file
+    assert text == ""
+
+TEXT = "Olá mundo! Código é divertido, código é incrível.\nAção ação AÇÃO coração ÿ µ ß\n"
+
+
+def test_count_file_words_utf8_windows(tmp_path: Path):
+    p = tmp_path / "c.txt"
+    p.write_text("ascii only words " * 50 + TEXT * 50, encoding="utf-8")
+
+    # janela pequena: várias janelas lidas com mmap, ASCII e UTF-8 misturadas
+    for window in (64, 1024 * 1024):
+        result, has_text = count_file_words(str(p), window)
+        assert has_text
+        assert result.counts == count_words(p.read_text(encoding="utf-8"))
+
+
+def test_count_file_words_latin1_after_ascii_windows(tmp_path: Path):
+    p = tmp_path / "d.txt"
+    p.write_text("ascii only words " * 50 + TEXT * 50, encoding="latin-1")
+
+    result, has_text = count_file_words(str(p), 64)
+    assert has_text
+    assert result.counts == count_words(p.read_text(encoding="latin-1"))
+
+
+def test_count_file_words_blank_and_missing(tmp_path: Path):
+    p = tmp_path / "e.txt"
+    p.write_bytes(b" \n\t ")
+    result, has_text = count_file_words(str(p))
+    assert not has_text
+    assert not result.counts
+
+    assert count_file_words(str(tmp_path / "nao_existe.txt")) is None
+
+
+def test_count_file_words_latin1_nbsp_only(tmp_path: Path, capsys):
+    # \xa0 e \x85 são espaços em latin-1 (str.strip) mas bytes.split() não os separa: não contam como texto.
+    for data in (b"\xa0", b"\x85 \xa0"):
+        p = tmp_path / "nbsp.txt"
+        p.write_bytes(data)
+        result, has_text = count_file_words(str(p))
+        assert not has_text
+        assert not result.counts
+
+        assert main(["--input", str(p)]) == 1
+        assert "Nenhum texto fornecido" in capsys.readouterr().out
+
+    # Com pontuação há texto (mesmo sem palavras), como text.strip().
+    p.write_bytes(b"!!\xa0")
+    assert count_file_words(str(p))[1]
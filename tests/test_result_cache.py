@@ -0,0 +1,31 @@
+from result_cache import ResultCache, text_key
+
+
+def test_lru_eviction_by_entries():
+    cache = ResultCache(max_entries=2, max_bytes=1000)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.put("c", 3, 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResultCache(max_entries=10, max_bytes=100)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 60
+
+    cache.put("grande", 3, 1000)  # maior que o limite: não é guardado
+    assert cache.get("grande") is None
+    assert cache.get("b") == 2
+
+
+def test_text_key_ignores_outer_whitespace():
+    assert text_key("  ola mundo\n") == text_key("ola mundo")
+    assert text_key("ola") != text_key("olá")
@@ -0,0 +1,30 @@
+import random
+
+from text_analysis import select_top, sort_counts
+
+
+def random_counts(rng: random.Random, vocab_size: int, skewed: bool) -> dict[str, int]:
+    words = {"".join(rng.choice("abcde") for _ in range(rng.randint(1, 6))) for _ in range(vocab_size)}
+    if skewed:
+        return {w: int(rng.paretovariate(1.0)) for w in words}
+    # poucas contagens diferentes = muitos empates
+    return {w: rng.randint(1, 3) for w in words}
+
+
+def test_select_top_matches_sort_on_random_corpora():
+    rng = random.Random(42)
+    for _ in range(200):
+        counts = random_counts(rng, rng.randint(0, 300), skewed=rng.random() < 0.5)
+        for n in (1, 2, 5, 10, 50, 100, 1000):
+            assert select_top(counts, n) == sort_counts(counts, n)
+
+
+def test_select_top_tie_break():
+    counts = {"b": 2, "a": 2, "c": 1, "d": 1, "e": 3}
+    assert select_top(counts, 2) == [("e", 3), ("a", 2)]
+    assert select_top(counts, 4) == [("e", 3), ("a", 2), ("b", 2), ("c", 1)]
+
+
+def test_select_top_empty_and_zero():
+    assert select_top({}, 5) == []
+    assert select_top({"a": 1}, 0) == []
@@ -0,0 +1,77 @@
+import pytest
+
+from app import main
+from benchmarks.corpus import generate_text
+from sketch import ApproxCounter, SpaceSaving, analyze_approx
+from text_analysis import analyze_text
+
+
+@pytest.mark.parametrize("capacity,chunk", [(200, 4096), (1000, 65536), (50, 1000)])
+def test_error_bounds_against_exact_engine(capacity, chunk):
+    # Corpus com distribuição de Zipf (como os textos reais): poucas palavras muito frequentes.
+    text = generate_text(400_000, vocab_size=20_000, seed=7)
+    exact = analyze_text(text).counts
+
+    counter = ApproxCounter(capacity)
+    for i in range(0, len(text), chunk):
+        counter.feed(text[i:i + chunk])
+    counter.close()
+    result = counter.result()
+    sketch = counter.sketch
+
+    assert len(result.counts) <= capacity
+    assert sketch.total == sum(exact.values())
+    assert sketch.floor <= sketch.total / capacity
+
+    # Cada contagem estimada está dentro do intervalo [contagem - erro, contagem].
+    for word, count, error in result.top_with_errors(None):
+        assert count - error <= exact[word] <= count
+        assert error <= sketch.floor
+
+    # As palavras não guardadas apareceram no máximo floor vezes.
+    for word, count in exact.items():
+        if word not in result.counts:
+            assert count <= sketch.floor
+
+    # O top 10 é o mesmo do motor exato.
+    assert [word for word, _ in result.top(10)] == [word for word, _ in analyze_text(text).top(10)]
+
+
+def test_space_saving_replaces_smallest():
+    sketch = SpaceSaving(2)
+    sketch.update({"a": 5, "b": 1})
+    sketch.add("c")
+    # Empate entre "b" e "c": sai o mais antigo; as palavras não guardadas apareceram no máximo 1 vez.
+    assert sketch.top(None) == [("a", 5, 0), ("c", 1, 0)]
+    assert sketch.floor == 1
+
+    # Uma palavra nova entra com a maior contagem que já saiu, e esse valor é o seu erro.
+    sketch.add("d")
+    assert sketch.top(None) == [("a", 5, 0), ("d", 2, 1)]
+    assert sketch.summary() == {"capacity": 2, "total": 8, "words": 2, "max_error": 1}
+
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
+
+
+def test_exact_when_vocabulary_fits():
+    text = "Olá mundo, olá! Ação ação"
+    result = analyze_approx(text, capacity=10)
+    assert result.top(3) == analyze_text(text).top(3)
+    assert set(result.errors.values()) == {0}
+
+
+def test_main_approx(tmp_path, capsys):
+    path = tmp_path / "a.txt"
+    path.write_text(generate_text(50_000, vocab_size=2_000, seed=1), encoding="utf-8")
+    out = tmp_path / "r.txt"
+
+    code = main(["--input", str(path), "--approx", "--capacity", "100", "--n", "5", "--csv", "--out", str(out)])
+    assert code == 0
+    printed = capsys.readouterr().out
+    assert "(±" in printed
+    assert "Contagens aproximadas (capacidade 100" in printed
+    assert out.with_suffix(".csv").read_text(encoding="utf-8").startswith("rank,word,count,error")
+
+    assert main(["--input", str(path), "--approx", "--workers", "2"]) == 1
+    assert main(["--text", "a", "--approx", "--capacity", "0"]) == 1
@@ -0,0 +1,96 @@
+import random
+from pathlib import Path
+
+from app import count_text_file, main
+from text_analysis import DecodingWordCounter, WordCounter, top_words
+
+SAMPLE = "Olá, olá! Mundo, mundo... Código é divertido? Código é incrível!\nAção ação AÇÃO coração"
+
+
+def test_word_counter_matches_top_words_for_any_split():
+    rng = random.Random(1)
+    expected = top_words(SAMPLE * 3, 20)
+
+    for _ in range(50):
+        text = SAMPLE * 3
+        counter = WordCounter()
+        pos = 0
+        while pos < len(text):
+            step = rng.randint(1, 7)
+            counter.feed(text[pos:pos + step])
+            pos += step
+        counter.close()
+        assert counter.top(20) == expected
+
+
+def test_count_text_file_multibyte_split_across_chunks(tmp_path: Path):
+    p = tmp_path / "a.txt"
+    p.write_text(SAMPLE, encoding="utf-8")
+
+    # blocos de 1 e 3 bytes partem os caracteres acentuados (2 bytes em UTF-8)
+    for chunk_size in (1, 3, 1024):
+        counter = count_text_file(str(p), chunk_size)
+        assert counter is not None
+        assert counter.top(20) == top_words(SAMPLE, 20)
+
+
+def test_count_text_file_latin1_fallback(tmp_path: Path):
+    p = tmp_path / "b.txt"
+    p.write_text("olá " * 100 + "mundo", encoding="latin-1")
+
+    counter = count_text_file(str(p), 16)
+    assert counter is not None
+    assert counter.top(2) == [("ola", 100), ("mundo", 1)]
+
+
+def test_decoding_fallback_does_not_depend_on_chunk_size():
+    # O utf-8 válido antes do primeiro byte inválido continua a ser utf-8, em qualquer tamanho de bloco.
+    data = "ação ação ".encode("utf-8") + b"caf\xe9 " + "pé".encode("latin-1")
+    for chunk_size in (1, 4, len(data)):
+        counter = DecodingWordCounter("utf-8", fallback="latin-1")
+        for i in range(0, len(data), chunk_size):
+            counter.feed_bytes(data[i:i + chunk_size])
+        counter.close()
+        assert counter.counts == {"acao": 2, "cafe": 1, "pe": 1}, chunk_size
+        assert counter.encoding == "latin-1"
+
+
+def test_count_text_file_not_found(tmp_path: Path):
+    assert count_text_file(str(tmp_path / "nao_existe.txt")) is None
+
+
+def test_main_stream(tmp_path: Path, capsys):
+    p = tmp_path / "c.txt"
+    p.write_text("ola ola mundo", encoding="utf-8")
+
+    code = main(["--input", str(p), "--stream", "--chunk-size", "2", "--n", "2"])
+    assert code == 0
+
+    out = capsys.readouterr().out
+    assert "1. ola -> 2" in out
+    assert "2. mundo -> 1" in out
+
+
+def test_main_stream_requires_input(capsys):
+    code = main(["--text", "ola", "--stream"])
+    assert code == 1
+    assert "--stream" in capsys.readouterr().out
+
+
+def test_main_ngram_file(tmp_path: Path, capsys):
+    p = tmp_path / "a.txt"
+    p.write_bytes("Ação boa, ação boa! Boa ação".encode("latin-1"))
+
+    code = main(["--input", str(p), "--ngram", "2", "--n", "2", "--chunk-size", "3"])
+    assert code == 0
+
+    out = capsys.readouterr().out
+    assert "1. acao boa -> 2" in out
+    assert "2. boa acao -> 2" in out
+
+
+def test_main_ngram_rejects_workers(tmp_path: Path, capsys):
+    p = tmp_path / "a.txt"
+    p.write_text("a b c", encoding="utf-8")
+    assert main(["--input", str(p), "--ngram", "2", "--workers", "2"]) == 1
+    assert "--ngram" in capsys.readouterr().out
@@ -1,5 +1,8 @@
+import random
 import unittest
-from text_analysis import top_words
+from collections import Counter
+
+from text_analysis import NgramCounter, TextStats, WordCounter, WordIndex, analyze_text, count_words, normalize_text, text_stats, top_words, top_words_format
 
 class TestTextAnalysis(unittest.TestCase):
     def test_punctuation_split(self):
@@ -13,5 +16,104 @@ class TestTextAnalysis(unittest.TestCase):
         # "Olá" e "ola" devem contar como a mesma palavra ("ola")
         self.assertEqual(top_words("Olá ola OLÁ", 1), [("ola", 3)])
 
+    def test_analysis_result_reuses_counts(self):
+        text = "Olá ola mundo, mundo! ola"
+        result = analyze_text(text)
+        self.assertEqual(result.top(2), top_words(text, 2))
+        self.assertEqual(result.report(2), top_words_format(text, 2))
+        self.assertEqual(
+            result.rows(2),
+            [{"rank": 1, "word": "ola", "count": 3}, {"rank": 2, "word": "mundo", "count": 2}],
+        )
+
+    def test_count_words_matches_full_text_normalization(self):
+        # caracteres que testam a normalização por palavra: acentos, espaços Unicode que a
+        # normalização apaga (U+0085, U+2028), símbolos que se decompõem em espaço/pontuação, etc.
+        alphabet = list("aAbéÉçÇãÕ \t\n.,!-'¨…½ﬁİßΣσ\x85\xa0\u2028\u3000\u0301xyz日①K")
+        rng = random.Random(0)
+        for _ in range(2000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(count_words(text), Counter(normalize_text(text).split()), text)
+
+    def test_count_words_ascii_fast_path(self):
+        self.assertEqual(count_words("Ola, OLA mundo-novo"), Counter({"ola": 2, "mundo": 1, "novo": 1}))
+
+    def test_text_stats_matches_per_char_loops(self):
+        # referência: as contas originais de desafio1.text_stats, caractere a caractere
+        def reference(text):
+            spaces = sum(1 for c in text if c.isspace())
+            vowels = sum(1 for c in text.lower() if c in "aeiouyáàâãäæéèêëíìïóòôõöœøúùüý")
+            return {"char": len(text), "char_without_space": len(text) - spaces,
+                    "words": len(text.split()), "lines": len(text.splitlines()), "vowels": vowels}
+
+        alphabet = list("aEíÓyx \t\n\r\x0b\x0c\x1c\x85\xa0\u2028.,İÆ")
+        rng = random.Random(1)
+        for _ in range(2000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(text_stats(text), reference(text), text)
+
+            #em blocos (palavras e "\r\n" cortados entre blocos) o resultado é o mesmo
+            stats = TextStats()
+            for i in range(0, len(text), 3):
+                stats.feed(text[i:i + 3])
+            self.assertEqual(stats.as_dict(), reference(text), text)
+
+    def test_stats_in_same_pass_as_counts(self):
+        text = "Olá mundo!\nIsto é Python."
+        result = analyze_text(text, stats=True)
+        self.assertEqual(result.stats, {"char": 25, "char_without_space": 21, "words": 5, "lines": 2, "vowels": 9})
+        self.assertEqual(result.top(1), top_words(text, 1))
+        self.assertIsNone(analyze_text(text).stats)
+
+        counter = WordCounter(stats=True)
+        for part in ("Olá mun", "do!\nIs", "to é Python."):
+            counter.feed(part)
+        counter.close()
+        self.assertEqual(counter.result().stats, result.stats)
+
+    def test_ngrams_match_reference_for_any_split(self):
+        # referência: n-gramas das palavras do texto normalizado inteiro
+        alphabet = list("aAbéÉç \n.,!-¨½\x85\u2028xyz")
+        rng = random.Random(2)
+        for _ in range(500):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            n = rng.randint(1, 4)
+            words = normalize_text(text).split()
+            expected = Counter(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+
+            counter = NgramCounter(n)
+            pos = 0
+            while pos < len(text):
+                step = rng.randint(1, 5)
+                counter.feed(text[pos:pos + step])
+                pos += step
+            counter.close()
+            self.assertEqual(counter.counts, expected, (text, n))
+
+    def test_ngram_tie_break(self):
+        # empates ordenados alfabeticamente pela frase, como as palavras
+        self.assertEqual(
+            analyze_text("Olá mundo! Olá, mundo. Adeus mundo", ngram=2).top(3),
+            [("ola mundo", 2), ("adeus mundo", 1), ("mundo adeus", 1)],
+        )
+
+    def test_word_index(self):
+        result = analyze_text("Olá olá mundo mundo mundo maçã mar mares a b")
+        index = WordIndex(result)
+        self.assertEqual(len(index), 7)
+        # o top n é igual ao do resultado (mesma ordenação), para qualquer n
+        for n in (1, 3, 7, 20):
+            self.assertEqual(index.top(n), result.top(n))
+        self.assertEqual(index.top(None), result.sorted_items())
+        # a palavra procurada é normalizada como o texto
+        self.assertEqual(index.count("OLÁ"), 2)
+        self.assertEqual(index.count("nada"), 0)
+        self.assertEqual(index.prefix("Ma"), [("maca", 1), ("mar", 1), ("mares", 1)])
+        self.assertEqual(index.prefix("mar", limit=1), [("mar", 1)])
+        self.assertEqual(index.prefix("z"), [])
+        self.assertEqual(index.at_least(2), [("mundo", 3), ("ola", 2)])
+        self.assertEqual(index.at_least(4), [])
+        self.assertEqual(index.at_least(0), result.sorted_items())
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,5 +1,673 @@
+import codecs
+import heapq
+import re
 import unicodedata
 import string
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from itertools import chain, islice, repeat
+from operator import and_, lshift, or_, rshift
+
+from instrumentation import stage
+
+#Tabela de tradução partilhada que mapeia cada caractere de pontuação para um espaço (criada uma só vez, em vez de em cada chamada).
+PUNCT_TABLE = str.maketrans(string.punctuation, ' '*len(string.punctuation))
+
+def normalize_text(text: str) -> str:
+    """Normaliza um texto para contagem: minúsculas, sem acentos e com a pontuação substituída por espaços.
+
+    A normalização é feita caractere a caractere, por isso pode ser aplicada a blocos (chunks) de um texto
+    maior e o resultado concatenado é igual ao de normalizar o texto inteiro.
+
+    Args:
+        text: O texto a ser normalizado."""
+    return unicodedata.normalize('NFKD', text.lower()).encode('ascii', 'ignore').decode('utf8').translate(PUNCT_TABLE)
+
+#Tabela de bytes para separar as palavras "em bruto" (texto em minúsculas codificado em UTF-8, ainda com acentos):
+#pontuação ASCII e os separadores \x1c-\x1f (que str.split trata como espaço e bytes.split não) -> espaço.
+#Os bytes não-ASCII ficam dentro das palavras e são tratados por normalize_raw.
+_RAW_BYTES = bytearray(range(256))
+for _byte in (string.punctuation + "\x1c\x1d\x1e\x1f").encode('ascii'):
+    _RAW_BYTES[_byte] = ord(' ')
+RAW_BYTE_TABLE = bytes(_RAW_BYTES)
+del _RAW_BYTES, _byte
+
+#Caracteres onde raw_tokens separa as palavras (usado para ligar palavras cortadas entre blocos no WordCounter).
+_RAW_SEPARATORS = frozenset(string.whitespace + string.punctuation + "\x1c\x1d\x1e\x1f")
+
+def raw_tokens(text: str) -> list[bytes]:
+    """Separa um texto em palavras "em bruto": minúsculas, ainda com acentos, codificadas em UTF-8.
+
+    Só separa em espaços e pontuação ASCII, tudo com operações em C sobre bytes (str.translate com
+    caracteres não-ASCII é lento). Espaços/pontuação não-ASCII ficam dentro das palavras e são separados
+    depois por normalize_raw, uma vez por palavra distinta.
+
+    Args:
+        text: O texto a separar."""
+    return _split_lowered(text.lower())
+
+def _split_lowered(lowered: str) -> list[bytes]:
+    #Como raw_tokens, para texto já em minúsculas (evita repetir o lower() quando já foi feito).
+    return lowered.encode('utf-8', 'surrogatepass').translate(RAW_BYTE_TABLE).split()
+
+def _count_lowered(lowered: str) -> Counter[bytes]:
+    #Separa e conta as palavras em bruto de um texto já em minúsculas (etapas "tokenize" e "count").
+    with stage("tokenize") as s:
+        tokens = _split_lowered(lowered)
+        s.add(tokens=len(tokens))
+    with stage("count"):
+        return Counter(tokens)
+
+#Tabela de bytes para contar texto ASCII/latin-1 diretamente em bytes (sem descodificar): como RAW_BYTE_TABLE,
+#mas também passa as letras latin-1 para minúsculas (em latin-1 cada caractere é um byte, e a minúscula de
+#qualquer caractere latin-1 também é latin-1 com um só caractere).
+_LATIN1_BYTES = bytearray(RAW_BYTE_TABLE)
+for _byte in range(256):
+    if _LATIN1_BYTES[_byte] != ord(' '):
+        _LATIN1_BYTES[_byte] = ord(chr(_byte).lower())
+LATIN1_BYTE_TABLE = bytes(_LATIN1_BYTES)
+del _LATIN1_BYTES, _byte
+
+def latin1_tokens(data: bytes) -> list[bytes]:
+    """Separa bytes em ASCII ou latin-1 em palavras "em bruto" (minúsculas, ainda com acentos, em latin-1),
+    sem descodificar o texto. Para ASCII o resultado é igual ao de raw_tokens.
+
+    Args:
+        data: Os bytes a separar."""
+    return data.translate(LATIN1_BYTE_TABLE).split()
+
+#Bytes que str.strip() consideraria espaço em ASCII e em latin-1 (para saber se um texto é só espaços sem o descodificar).
+_BLANK_ASCII = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_BLANK_LATIN1 = _BLANK_ASCII + b"\x85\xa0"
+
+def count_bytes(data: bytes, encoding: str = 'utf-8') -> tuple[Counter[bytes], bool] | None:
+    """Conta as palavras em bruto de um bloco de bytes (o bloco não pode terminar a meio de uma palavra).
+
+    Texto ASCII (em qualquer dos encodings) e latin-1 é contado diretamente em bytes, sem descodificar.
+    Só blocos UTF-8 com caracteres não-ASCII são descodificados. Juntar os resultados com merge_raw(raw, encoding).
+
+    Args:
+        data: Os bytes a contar.
+        encoding: 'utf-8' ou 'latin-1'.
+
+    Returns:
+        (contagens em bruto, tem_texto), ou None se os bytes não forem UTF-8 válido."""
+    if encoding == 'latin-1' or data.isascii():
+        with stage("tokenize") as s:
+            tokens = latin1_tokens(data)
+            s.add(bytes=len(data), tokens=len(tokens))
+        with stage("count"):
+            raw = Counter(tokens)
+        #Equivalente a text.strip() não vazio, sem descodificar. Em latin-1, bytes.split() deixa \xa0 e \x85 dentro
+        #das palavras: uma palavra só conta se tiver algum byte que não seja espaço (normalmente logo a primeira).
+        #Sem palavras, pode haver texto só com pontuação.
+        blank = _BLANK_LATIN1 if encoding == 'latin-1' else _BLANK_ASCII
+        has_text = any(token.translate(None, blank) for token in raw) or bool(data.translate(None, blank))
+        return raw, has_text
+
+    try:
+        with stage("decode") as s:
+            s.add(bytes=len(data))
+            text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    with stage("normalize"):
+        lowered = text.lower()
+    return _count_lowered(lowered), bool(text.strip())
+
+@lru_cache(maxsize=1 << 16)
+def normalize_raw(token: bytes, encoding: str = 'utf-8') -> tuple[str, ...]:
+    """Normaliza uma palavra em bruto (de raw_tokens ou latin1_tokens) e retorna as palavras normalizadas resultantes.
+
+    Normalmente retorna uma só palavra (b"ol\\xc3\\xa1" -> ("ola",)), mas pode retornar nenhuma (só acentos
+    ou símbolos) ou várias (ex.: "x¨y" -> ("x", "y"), porque "¨" se decompõe num espaço). Memoizada: cada
+    palavra distinta só é normalizada uma vez.
+
+    Args:
+        token: A palavra em bruto a normalizar.
+        encoding: O encoding dos bytes da palavra ('utf-8' para raw_tokens, 'latin-1' para latin1_tokens)."""
+    return tuple(normalize_text(token.decode(encoding, 'surrogatepass')).split())
+
+def merge_raw(raw: dict[bytes, int], encoding: str = 'utf-8') -> Counter[str]:
+    """Normaliza cada palavra distinta de uma contagem em bruto e junta as contagens das que ficam iguais
+    (ex.: "olá" e "ola" -> "ola").
+
+    Args:
+        raw: Dicionário palavra em bruto -> contagem.
+        encoding: O encoding das palavras em bruto ('utf-8' ou 'latin-1')."""
+    counts: Counter[str] = Counter()
+    with stage("normalize") as s:
+        s.add(tokens=len(raw))
+        for token, count in raw.items():
+            #Palavras só com ASCII já estão normalizadas (minúsculas e sem pontuação).
+            if token.isascii():
+                counts[token.decode('ascii')] += count
+            else:
+                for word in normalize_raw(token, encoding):
+                    counts[word] += count
+    return counts
+
+#Vogais contadas pelas estatísticas (com e sem acentos), sobre o texto em minúsculas.
+VOWELS = "aeiouyáàâãäæéèêëíìïóòôõöœøúùüý"
+
+#Caracteres onde str.splitlines() separa linhas ("\r\n" conta como uma só quebra).
+LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+class TextStats:
+    """Estatísticas de um texto (caracteres, caracteres sem espaços, palavras, linhas e vogais), calculadas
+    por blocos e com operações em C (str.split, str.count) em vez de ciclos Python caractere a caractere.
+
+    Dá os mesmos valores que calcular sobre o texto inteiro: len(text), len(text) menos os espaços
+    (str.isspace), len(text.split()), len(text.splitlines()) e as vogais de text.lower()."""
+
+    def __init__(self) -> None:
+        self.chars = 0
+        self.spaces = 0
+        self.words = 0
+        self.vowels = 0
+        self._breaks = 0 #Quebras de linha vistas até agora.
+        self._last = "" #Último caractere do bloco anterior (para palavras e "\r\n" cortados entre blocos).
+
+    def feed(self, text: str, lowered: str | None = None) -> None:
+        """Acrescenta um bloco de texto às estatísticas.
+
+        Args:
+            text: O bloco de texto.
+            lowered: text.lower(), se já tiver sido calculado (evita repetir o lower())."""
+        if not text:
+            return
+        if lowered is None:
+            lowered = text.lower()
+
+        self.chars += len(text)
+
+        #Palavras e espaços a partir do mesmo split: os caracteres que não são espaço são os das palavras.
+        words = text.split()
+        self.spaces += len(text) - sum(map(len, words))
+        self.words += len(words)
+        #Palavra cortada entre o bloco anterior e este: foi contada duas vezes.
+        if words and self._last and not self._last.isspace() and not text[0].isspace():
+            self.words -= 1
+
+        #Quebras de linha ("\r\n" conta uma vez, também quando fica cortado entre blocos).
+        breaks = LINE_BREAKS if not text.isascii() else LINE_BREAKS[:7]
+        self._breaks += sum(text.count(c) for c in breaks) - text.count("\r\n")
+        if self._last == "\r" and text[0] == "\n":
+            self._breaks -= 1
+
+        #Vogais: em texto ASCII só as vogais sem acento podem aparecer.
+        vowels = VOWELS[:6] if lowered.isascii() else VOWELS
+        self.vowels += sum(lowered.count(c) for c in vowels)
+
+        self._last = text[-1]
+
+    @property
+    def lines(self) -> int:
+        """Número de linhas (igual a len(text.splitlines()))."""
+        if self.chars and self._last not in LINE_BREAKS:
+            return self._breaks + 1
+        return self._breaks
+
+    def as_dict(self) -> dict:
+        """As estatísticas no formato de desafio1.text_stats."""
+        return {
+            "char": self.chars,
+            "char_without_space": self.chars - self.spaces,
+            "words": self.words,
+            "lines": self.lines,
+            "vowels": self.vowels,
+        }
+
+def text_stats(text: str) -> dict:
+    """Retorna estatísticas sobre um texto: caracteres, caracteres sem espaços, palavras, linhas e vogais.
+
+    Args:
+        text: O texto a ser analisado."""
+    stats = TextStats()
+    stats.feed(text)
+    return stats.as_dict()
+
+class WordCounter:
+    """Contador incremental de palavras para texto recebido em blocos (modo streaming).
+
+    Cada bloco é separado em palavras e contado logo que chega, por isso a memória usada depende do vocabulário
+    e não do tamanho do texto. A palavra incompleta no fim de um bloco fica guardada até ao bloco seguinte,
+    para que palavras cortadas na fronteira entre blocos sejam contadas uma só vez. Tal como em count_words,
+    os acentos só são removidos no fim, uma vez por palavra distinta."""
+
+    def __init__(self, stats: bool = False) -> None:
+        self.stats = TextStats() if stats else None #Estatísticas do texto, calculadas nos mesmos blocos (opcional).
+        self._raw: Counter[bytes] = Counter() #Contagem acumulada de cada palavra em bruto (ver raw_tokens).
+        self.has_text = False #Fica True quando aparece algum caractere que não seja espaço (equivale a text.strip() não vazio).
+        self._carry = b"" #Palavra (em bruto) que ficou a meio no fim do último bloco.
+
+    @property
+    def counts(self) -> Counter[str]:
+        """Contagem de cada palavra normalizada (calculada a partir das contagens em bruto)."""
+        return merge_raw(self._raw)
+
+    def feed(self, chunk: str) -> None:
+        """Separa em palavras e conta um bloco de texto.
+
+        Args:
+            chunk: O bloco de texto (já descodificado) a contar."""
+        if not chunk:
+            return
+        if not self.has_text and chunk.strip():
+            self.has_text = True
+
+        with stage("normalize"):
+            lowered = chunk.lower()
+        if self.stats is not None:
+            with stage("stats"):
+                self.stats.feed(chunk, lowered)
+
+        with stage("tokenize") as s:
+            words = _split_lowered(lowered)
+            s.add(tokens=len(words))
+        #Junta a palavra pendente do bloco anterior à primeira palavra deste bloco, se não houver espaço entre elas.
+        if self._carry:
+            if words and chunk[0] not in _RAW_SEPARATORS:
+                words[0] = self._carry + words[0]
+            else:
+                words.insert(0, self._carry)
+        #Se o bloco não termina em espaço/pontuação, a última palavra pode continuar no bloco seguinte.
+        if words and chunk[-1] not in _RAW_SEPARATORS:
+            self._carry = words.pop()
+        else:
+            self._carry = b""
+        self._count(words)
+
+    def _count(self, words: list[bytes]) -> None:
+        #Conta as palavras em bruto completas de um bloco (pela ordem do texto).
+        with stage("count"):
+            self._raw.update(words)
+
+    def close(self) -> None:
+        """Conta a palavra pendente do último bloco. Deve ser chamado quando não há mais texto."""
+        if self._carry:
+            self._count([self._carry])
+            self._carry = b""
+
+    def top(self, n: int = 5) -> list[tuple[str, int]]:
+        """Retorna as n palavras mais comuns contadas até agora (mesma ordenação que top_words)."""
+        counts = self.counts
+        with stage("select"):
+            return select_top(counts, n)
+
+    def result(self) -> "AnalysisResult":
+        """Retorna um AnalysisResult com as contagens acumuladas (chamar depois de close())."""
+        return AnalysisResult(self.counts, self.stats.as_dict() if self.stats is not None else None)
+
+class DecodingWordCounter(WordCounter):
+    """WordCounter que recebe bytes: descodifica-os de forma incremental antes de contar.
+
+    O descodificador incremental guarda os bytes de um caractere multi-byte cortado entre blocos
+    até chegar o resto do caractere. Bytes inválidos no encoding dão UnicodeDecodeError, ou, com
+    fallback (ex.: "latin-1"), o resto do texto passa a ser descodificado nesse encoding: serve para
+    textos que não podem ser relidos desde o início (stdin, ficheiros acompanhados com --follow)."""
+
+    def __init__(self, encoding: str = "utf-8", stats: bool = False, fallback: str | None = None, **options) -> None:
+        super().__init__(stats=stats, **options)
+        self._decoder = codecs.getincrementaldecoder(encoding)() #LookupError se o encoding não existir.
+        self.encoding = encoding #Encoding em uso (muda para o fallback se aparecerem bytes inválidos).
+        self.fallback = fallback #Encoding a usar a partir do primeiro erro (None: dá UnicodeDecodeError).
+
+    def _decode(self, data: bytes, final: bool = False) -> str:
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            if self.fallback is None:
+                raise
+            #e.object são os bytes pendentes do bloco anterior mais este bloco: o que está antes do primeiro
+            #byte inválido (e.start) ainda é descodificado no encoding original e só o resto no fallback,
+            #para o resultado não depender do tamanho dos blocos.
+            valid = e.object[:e.start].decode(self.encoding)
+            self._decoder = codecs.getincrementaldecoder(self.fallback)()
+            self.encoding, self.fallback = self.fallback, None
+            return valid + self._decoder.decode(e.object[e.start:], final)
+
+    def feed_bytes(self, data: bytes) -> None:
+        """Descodifica e conta um bloco de bytes."""
+        with stage("decode") as s:
+            s.add(bytes=len(data))
+            chunk = self._decode(data)
+        self.feed(chunk)
+
+    def close(self) -> None:
+        """Descodifica os bytes pendentes (erro se o texto acabar a meio de um caractere) e conta a última palavra."""
+        self.feed(self._decode(b"", final=True))
+        super().close()
+
+#Bits de cada palavra na chave (int) de um n-grama: as palavras têm ids até 2**32 - 1.
+NGRAM_ID_BITS = 32
+
+class _WordIds(dict):
+    #Palavra normalizada -> id: cada palavra nova recebe o id seguinte (0, 1, 2, ...).
+    def __missing__(self, word: str) -> int:
+        value = self[word] = len(self)
+        return value
+
+class _TokenIds(dict):
+    #Palavra em bruto -> ids das palavras normalizadas (nenhuma, uma ou várias, ver normalize_raw).
+    #Cada palavra em bruto distinta só é normalizada uma vez.
+    def __init__(self, word_ids: _WordIds) -> None:
+        super().__init__()
+        self.word_ids = word_ids
+
+    def __missing__(self, token: bytes) -> tuple[int, ...]:
+        words = (token.decode('ascii'),) if token.isascii() else normalize_raw(token)
+        value = self[token] = tuple([self.word_ids[word] for word in words])
+        return value
+
+class NgramCounter(WordCounter):
+    """Contador incremental de n-gramas (sequências de n palavras seguidas, ex.: bigramas com n=2).
+
+    As palavras são normalizadas como em count_words e cada palavra distinta recebe um id inteiro.
+    Um n-grama é guardado como um só int com os ids das n palavras (NGRAM_ID_BITS bits cada), em vez
+    de um tuplo de strings, e as chaves de cada bloco são calculadas com map sobre a lista de ids
+    (janela deslizante, sem criar uma lista com todos os n-gramas). As últimas n - 1 palavras de um
+    bloco ficam guardadas para os n-gramas que atravessam a fronteira com o bloco seguinte.
+    As frases ("palavra1 palavra2 ...") só são construídas no fim, uma vez por n-grama distinto."""
+
+    def __init__(self, n: int = 2, stats: bool = False) -> None:
+        if n < 1:
+            raise ValueError("n deve ser maior que 0")
+        super().__init__(stats)
+        self.n = n
+        self._word_ids = _WordIds() #Palavra normalizada -> id.
+        self._token_ids = _TokenIds(self._word_ids) #Palavra em bruto -> ids das palavras normalizadas.
+        self._grams: Counter[int] = Counter() #Chave do n-grama -> contagem.
+        self._window: list[int] = [] #Ids das últimas n - 1 palavras já vistas.
+
+    def _count(self, words: list[bytes]) -> None:
+        with stage("normalize"):
+            ids = list(chain.from_iterable(map(self._token_ids.__getitem__, words)))
+        with stage("count") as s:
+            ids[:0] = self._window
+            #Chave do n-grama que começa na posição i: ids[i] << (bits * (n - 1)) | ... | ids[i + n - 1].
+            #Cada passo junta a palavra seguinte; map pára na lista mais curta (o último n-grama completo).
+            keys = ids
+            for j in range(1, self.n):
+                keys = map(or_, map(lshift, keys, repeat(NGRAM_ID_BITS)), islice(ids, j, None))
+            self._grams.update(keys)
+            self._window = ids[1 - self.n:] if self.n > 1 else []
+            if s:
+                s.add(tokens=max(len(ids) - self.n + 1, 0))
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Contagem de cada n-grama, como frase com as palavras separadas por um espaço."""
+        words = list(self._word_ids) #O id de cada palavra é a sua posição (ordem de inserção).
+        mask = (1 << NGRAM_ID_BITS) - 1
+        keys = list(self._grams)
+        with stage("normalize") as s:
+            s.add(tokens=len(keys))
+            #Uma coluna (iterador) por posição no n-grama: a palavra com os bits dessa posição da chave.
+            columns = [
+                map(words.__getitem__, map(and_, map(rshift, keys, repeat(NGRAM_ID_BITS * i)), repeat(mask)))
+                for i in range(self.n - 1, -1, -1)
+            ]
+            return dict(zip(map(" ".join, zip(*columns)), self._grams.values()))
+
+class DecodingNgramCounter(DecodingWordCounter, NgramCounter):
+    """NgramCounter que recebe bytes (ver DecodingWordCounter)."""
+
+    def __init__(self, n: int = 2, encoding: str = "utf-8", stats: bool = False, fallback: str | None = None) -> None:
+        super().__init__(encoding, stats, fallback, n=n)
+
+#Espaços em branco ASCII: em UTF-8 e em latin-1 estes bytes são sempre um caractere completo,
+#por isso cortar logo a seguir a um deles nunca parte uma palavra nem um caractere.
+_WHITESPACE_BYTES_RE = re.compile(rb"[ \t\n\r\x0b\x0c]")
+
+def split_ranges(data, parts: int) -> list[tuple[int, int]]:
+    """Divide bytes (ou um mmap) em até `parts` intervalos [início, fim) de tamanho parecido, sem partir palavras.
+
+    Cada corte é empurrado para a frente até logo a seguir ao próximo espaço em branco ASCII.
+
+    Args:
+        data: Os bytes (ou mmap) a dividir.
+        parts: O número de intervalos pretendido."""
+    size = len(data)
+    ranges = []
+    start = 0
+
+    for i in range(1, parts):
+        #Corte "ideal" (ainda sem olhar para as palavras).
+        target = size * i // parts
+        if target <= start:
+            continue
+
+        #Procura o próximo espaço a partir do corte ideal; se não houver, o resto fica todo no último intervalo.
+        match = _WHITESPACE_BYTES_RE.search(data, target)
+        if match is None:
+            break
+
+        ranges.append((start, match.end()))
+        start = match.end()
+
+    #Último intervalo até ao fim.
+    if start < size:
+        ranges.append((start, size))
+
+    return ranges
+
+def sort_counts(counts: dict[str, int], n: int) -> list[tuple[str, int]]:
+    """Ordena as contagens por contagem decrescente e, em caso de empate, alfabeticamente, e retorna as n primeiras.
+
+    Args:
+        counts: Dicionário palavra -> contagem.
+        n: O número de palavras a retornar."""
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+def select_top(counts: dict[str, int], n: int) -> list[tuple[str, int]]:
+    """Retorna as n palavras mais comuns com a mesma ordenação que sort_counts, sem ordenar o vocabulário inteiro.
+
+    Em vez de ordenar as V palavras (O(V log V), com uma chamada à lambda por palavra), descobre primeiro
+    a contagem mínima que entra no top n com heapq.nlargest sobre os inteiros (O(V log n), tudo em C).
+    Depois só ordena as palavras acima desse limiar (menos de n) e, entre as empatadas no limiar,
+    escolhe as primeiras por ordem alfabética com heapq.nsmallest.
+
+    Args:
+        counts: Dicionário palavra -> contagem.
+        n: O número de palavras a retornar."""
+    if n <= 0:
+        return []
+    #Se pedimos (quase) tudo, ordenar o vocabulário inteiro é o mais simples e rápido.
+    if n * 2 >= len(counts):
+        return sort_counts(counts, n)
+
+    #Contagem da n-ésima palavra mais comum: tudo o que está acima entra de certeza no top n.
+    threshold = heapq.nlargest(n, counts.values())[-1]
+
+    above = []
+    tied = []
+    for word, count in counts.items():
+        if count > threshold:
+            above.append((word, count))
+        elif count == threshold:
+            tied.append(word)
+
+    #Palavras acima do limiar (são sempre menos de n): ordena só estas.
+    above.sort(key=lambda item: (-item[1], item[0]))
+
+    #Os lugares que sobram vão para as palavras empatadas no limiar, por ordem alfabética.
+    missing = n - len(above)
+    above.extend((word, threshold) for word in heapq.nsmallest(missing, tied))
+    return above
+
+def format_top_words(items: list[tuple[str, int]], n: int) -> str:
+    """Formata uma lista de (palavra, contagem) no relatório de texto usado por top_words_format.
+
+    Args:
+        items: As palavras mais comuns e as suas contagens, já ordenadas.
+        n: O número de palavras pedido (usado no título)."""
+    topWordsFormat = f"Top {n} palavras mais comuns:\n"
+    for i, (word, count) in enumerate(items, start=1):
+        topWordsFormat += f"{i}. {word} -> {count}\n"
+    return topWordsFormat
+
+#Nomes das estatísticas no relatório (pela ordem de TextStats.as_dict).
+STATS_LABELS = {
+    "char": "Caracteres",
+    "char_without_space": "Caracteres sem espaços",
+    "words": "Palavras",
+    "lines": "Linhas",
+    "vowels": "Vogais",
+}
+
+def format_stats(stats: dict) -> str:
+    """Formata as estatísticas de um texto (ver text_stats) para mostrar no terminal.
+
+    Args:
+        stats: O dicionário retornado por text_stats/TextStats.as_dict."""
+    lines = ["Estatísticas do texto:"]
+    for key, label in STATS_LABELS.items():
+        lines.append(f"{label}: {stats[key]}")
+    return "\n".join(lines) + "\n"
+
+def count_words(text: str, stats: TextStats | None = None) -> Counter[str]:
+    """Conta quantas vezes aparece cada palavra (normalizada) num texto.
+
+    Args:
+        text: O texto a ser analisado.
+        stats: Se for dado, as estatísticas do texto são calculadas na mesma passagem."""
+    with stage("normalize"):
+        lowered = text.lower()
+    if stats is not None:
+        with stage("stats"):
+            stats.feed(text, lowered)
+
+    #Caminho rápido: texto só com ASCII não tem acentos, basta trocar a pontuação por espaços e separar.
+    #(str.isascii é O(1) em CPython.) Counter conta as palavras em C, mais rápido que um ciclo com dict.get.
+    if text.isascii():
+        with stage("tokenize") as s:
+            tokens = lowered.translate(PUNCT_TABLE).split()
+            s.add(tokens=len(tokens))
+        with stage("count"):
+            return Counter(tokens)
+
+    #Conta primeiro as palavras em bruto (ainda com acentos) e só depois normaliza cada palavra distinta uma vez:
+    #o vocabulário é muito menor que o número de palavras, por isso o NFKD corre muito menos vezes.
+    return merge_raw(_count_lowered(lowered))
+
+class AnalysisResult:
+    """Resultado de uma análise de texto: as contagens calculadas uma só vez e reutilizadas por todos os formatos.
+
+    O relatório de texto, a lista de (palavra, contagem), as linhas para CSV/JSON e a resposta da API
+    são gerados a partir das mesmas contagens, sem voltar a normalizar ou contar o texto."""
+
+    def __init__(
+        self,
+        counts: dict[str, int],
+        stats: dict | None = None,
+        errors: dict[str, int] | None = None,
+        approx: dict | None = None,
+    ) -> None:
+        self.counts = counts #Dicionário palavra -> contagem.
+        self.stats = stats #Estatísticas do texto (ver text_stats), se foram pedidas.
+        self.errors = errors #Modo aproximado (sketch.py): erro máximo de cada contagem. None se as contagens são exatas.
+        self.approx = approx #Modo aproximado: capacidade, total e erro máximo do sketch.
+        self._top: dict[int, list[tuple[str, int]]] = {} #Top n já calculados, para não voltar a ordenar.
+
+    def top(self, n: int | None = 5) -> list[tuple[str, int]]:
+        """Retorna as n palavras mais comuns como uma lista de tuplas (palavra, contagem).
+        Com n=None retorna o vocabulário inteiro ordenado."""
+        if n is None:
+            n = len(self.counts)
+        if n not in self._top:
+            with stage("select"):
+                self._top[n] = select_top(self.counts, n)
+        return self._top[n]
+
+    def top_with_errors(self, n: int | None = 5) -> list[tuple[str, int, int]]:
+        """Como top, mas com o erro máximo de cada contagem: (palavra, contagem, erro) (erro 0 se são exatas)."""
+        errors = self.errors or {}
+        return [(word, count, errors.get(word, 0)) for word, count in self.top(n)]
+
+    def report(self, n: int | None = 5) -> str:
+        """Retorna o relatório de texto com as n palavras mais comuns (mesmo formato que top_words_format).
+        Com n=None inclui o vocabulário inteiro."""
+        items = self.top(n)
+        return format_top_words(items, len(items) if n is None else n)
+
+    def rows(self, n: int | None = 5) -> list[dict]:
+        """Retorna as n palavras mais comuns como dicionários rank/word/count (usados no JSON e na API)."""
+        return item_rows(self.top(n))
+
+    def sorted_items(self) -> list[tuple[str, int]]:
+        """Retorna o vocabulário inteiro ordenado (qualquer top n é um prefixo desta lista)."""
+        with stage("select"):
+            return sort_counts(self.counts, len(self.counts))
+
+def item_rows(items: list[tuple[str, int]], start: int = 1) -> list[dict]:
+    """Converte uma lista de (palavra, contagem) em dicionários rank/word/count (rank começa em start)."""
+    return [{"rank": i, "word": word, "count": count} for i, (word, count) in enumerate(items, start)]
+
+class WordIndex:
+    """Índice de consulta sobre as contagens de um AnalysisResult, construído uma só vez.
+
+    Tem o vocabulário por ordem alfabética (procura por prefixo com bisect) e por contagem decrescente
+    (qualquer top n e qualquer filtro por contagem mínima são um prefixo dessa lista, também com bisect).
+    Mudar o N, procurar uma palavra ou exportar não voltam a contar nem a ordenar o texto."""
+
+    def __init__(self, result: AnalysisResult) -> None:
+        self.result = result
+        self.counts = result.counts
+        self.vocabulary = sorted(self.counts) #Palavras por ordem alfabética.
+        self.ranked = result.sorted_items() #(palavra, contagem) por contagem decrescente (e alfabética nos empates).
+        self._negated = [-count for _, count in self.ranked] #Contagens negadas (crescentes), para o bisect.
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def count(self, word: str) -> int:
+        """Retorna a contagem de uma palavra (normalizada como no texto: "Olá" -> "ola"); 0 se não aparece."""
+        return self.counts.get(" ".join(normalize_text(word).split()), 0)
+
+    def top(self, n: int | None = 5) -> list[tuple[str, int]]:
+        """Retorna as n palavras mais comuns (com n=None o vocabulário inteiro), sem voltar a ordenar."""
+        return self.ranked if n is None else self.ranked[:n]
+
+    def prefix(self, prefix: str, limit: int | None = None) -> list[tuple[str, int]]:
+        """Retorna as palavras (e contagens) que começam por prefix, por ordem alfabética.
+
+        Args:
+            prefix: O início das palavras (normalizado como no texto).
+            limit: Número máximo de palavras a retornar (None = todas)."""
+        prefix = normalize_text(prefix).strip()
+        vocabulary = self.vocabulary
+        items = []
+        #Todas as palavras com o prefixo estão seguidas no vocabulário ordenado, a partir da posição do bisect.
+        for i in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            word = vocabulary[i]
+            if not word.startswith(prefix) or len(items) == limit:
+                break
+            items.append((word, self.counts[word]))
+        return items
+
+    def at_least(self, min_count: int) -> list[tuple[str, int]]:
+        """Retorna as palavras com contagem >= min_count, por contagem decrescente."""
+        return self.ranked[:bisect_right(self._negated, -min_count)]
+
+def analyze_text(text: str, stats: bool = False, ngram: int = 1) -> AnalysisResult:
+    """Analisa um texto uma só vez e retorna um AnalysisResult reutilizável.
+
+    Args:
+        text: O texto a ser analisado.
+        stats: Se True, calcula também as estatísticas do texto (na mesma passagem que a contagem).
+        ngram: Contar sequências de ngram palavras (ex.: 2 = bigramas) em vez de palavras."""
+    if ngram > 1:
+        counter = NgramCounter(ngram, stats)
+        counter.feed(text)
+        counter.close()
+        return counter.result()
+    if not stats:
+        return AnalysisResult(count_words(text))
+    text_stats = TextStats()
+    counts = count_words(text, text_stats)
+    return AnalysisResult(counts, text_stats.as_dict())
 
 def top_words(text: str, n: int = 5) -> list[tuple[str, int]]:
     """Retorna as n palavras mais comuns em um texto, junto com suas contagens.
@@ -7,53 +675,7 @@ def top_words(text: str, n: int = 5) -> list[tuple[str, int]]:
     Args:
         text: O texto a ser analisado.
         n: O número de palavras mais comuns a retornar. Padrão é 5."""
-        
-    #Normaliza o texto para minúsculas e remove acentos para garantir que palavras como "Olá" e "olá" sejam tratadas como a mesma palavra.
-    textCaseSens = text.lower()
-    #normalizedText = text.lower()
-        
-    #Substitui as letras acentuadas por suas equivalentes sem acentos para garantir que palavras como "olá" e "ola" sejam tratadas como a mesma palavra.
-    normalizedText = unicodedata.normalize('NFKD', textCaseSens).encode('ascii', 'ignore').decode('utf8') #Remove os acentos do texto usando a normalização Unicode e a codificação ASCII, ignorando os caracteres que não podem ser convertidos para ASCII.
-    #for char in normalizedText:
-    #    if char in "áàâãäæ":
-    #        normalizedText = normalizedText.replace(char, "a")
-    #    elif char in "éèêë":
-    #        normalizedText = normalizedText.replace(char, "e")
-    #    elif char in "íìï":
-    #        normalizedText = normalizedText.replace(char, "i")
-    #    elif char in "óòôõöœø":
-    #        normalizedText = normalizedText.replace(char, "o")
-    #    elif char in "úùü":
-    #        normalizedText = normalizedText.replace(char, "u")
-    #    elif char in "ý":
-    #        normalizedText = normalizedText.replace(char, "y")
-        
-    #Separa o texto em palavras, removendo pontuação e contando a frequência de cada palavra, ignorando diferenças de maiúsculas e minúsculas e acentos.
-    table = str.maketrans(string.punctuation, ' '*len(string.punctuation)) #Cria uma tabela de tradução que mapeia cada caractere de pontuação para um espaço, usando a função maketrans do módulo string. Isso é necessário para garantir que as palavras sejam separadas corretamente, mesmo quando estão seguidas por pontuação. Por exemplo, "olá!" e "olá" serão tratadas como a mesma palavra "olá" após a tradução, permitindo uma contagem precisa das palavras.
-    cleanText = normalizedText.translate(table) #Remove a pontuação do texto usando a tabela de tradução criada anteriormente, substituindo cada caractere de pontuação por um espaço. Isso é necessário para garantir que as palavras sejam separadas corretamente, mesmo quando estão seguidas por pontuação. Por exemplo, "olá!" e "olá" serão tratadas como a mesma palavra "olá" após a tradução, permitindo uma contagem precisa das palavras.
-    words = cleanText.split()
-    #punct = ".,!?;:<>()[]{}\"'-@#$%^&*~`" #Lista de caracteres de pontuação a serem removidos das palavras
-    repeatedWords = {} 
-            
-    for wordCount in words:
-        #for char in punct:
-        #    wordCount = wordCount.replace(char, " ") #Remove a pontuação das palavras usando a função replace para substituir cada caractere de pontuação por uma string vazia.
-        #wordCount = wordCount.strip(punct) #Remove a pontuação das palavras usando a função strip para remover os caracteres de pontuação do início e do fim de cada palavra.
-        #if wordCount in repeatedWords:
-        #    repeatedWords[wordCount]  += 1 #Incrementa a contagem da palavra se ela já estiver no dicionário
-        #else:
-        #    repeatedWords[wordCount] = 1 #Adiciona a palavra ao dicionário com contagem 1 se ela não estiver presente
-        repeatedWords[wordCount] = repeatedWords.get(wordCount, 0) + 1 #Usa o método get do dicionário para obter a contagem atual da palavra, retornando 0 se a palavra não estiver presente, e incrementa essa contagem em 1. Isso é uma forma mais concisa de contar a frequência das palavras, evitando a necessidade de verificar explicitamente se a palavra já está no dicionário.
-        
-    #topWords = sorted(repeatedWords.items(), key=lambda item:item[1], reverse=True) #Ordena as palavras por contagem em ordem decrescente
-    topWords = sorted(repeatedWords.items(), key=lambda item: (-item[1], item[0])) #Ordena as palavras por contagem em ordem decrescente e, em caso de empate, ordena alfabeticamente
-    
-    #topWordsFormat = ""
-    #for i, (word, count) in enumerate(topWords[:n], start=1): #Itera sobre as n palavras mais comuns e suas contagens, usando a função enumerate para obter o índice de cada palavra (começando em 1) e formatando cada palavra e sua contagem em uma linha da string formatada. Isso é necessário para apresentar os resultados de forma clara e organizada, permitindo que o usuário veja facilmente quais são as palavras mais comuns e quantas vezes elas aparecem no texto.
-    #    topWordsFormat += f"{i}. {word} -> {count}\n" #Adiciona cada palavra e sua contagem à string formatada, numerando-as de 1 a n.
-    
-    #return topWordsFormat #Retorna a string formatada contendo as n palavras mais comuns e suas contagens, pronta para ser exibida ao usuário. A string inclui uma linha de título indicando o número de palavras listadas, seguida por cada palavra e sua contagem em linhas separadas, numeradas de 1 a n.
-    return topWords[:n] #Retorna as n palavras mais comuns como uma lista de tuplas (palavra, contagem)
+    return analyze_text(text).top(n) #Conta as palavras e retorna as n mais comuns (contagem decrescente e, em caso de empate, ordem alfabética)
 
 #text = "Olá, olá! Mundo, mundo... Código é divertido? Código é incrível!"
 #text = "b a b a c c c"
@@ -68,13 +690,7 @@ def top_words_format(text: str, n: int = 5) -> str:
         text: O texto a ser analisado.
         n: O número de palavras mais comuns a retornar. Padrão é 5."""
     
-    topWords = top_words(text, n) #Chama a função top_words para obter as n palavras mais comuns e suas contagens a partir do texto fornecido, e armazena o resultado na variável topWords.
-    
-    topWordsFormat = f"Top {n} palavras mais comuns:\n" #Inicializa uma string formatada com um título indicando o número de palavras listadas, para apresentar os resultados de forma clara e organizada.
-    for i, (word, count) in enumerate(topWords, start=1): #Itera sobre as n palavras mais comuns e suas contagens, usando a função enumerate para obter o índice de cada palavra (começando em 1) e formatando cada palavra e sua contagem em uma linha da string formatada. Isso é necessário para apresentar os resultados de forma clara e organizada, permitindo que o usuário veja facilmente quais são as palavras mais comuns e quantas vezes elas aparecem no texto.
-        topWordsFormat += f"{i}. {word} -> {count}\n" #Adiciona cada palavra e sua contagem à string formatada, numerando-as de 1 a n.
-    
-    return topWordsFormat #Retorna a string formatada contendo as n palavras mais comuns e suas contagens, pronta para ser exibida ao usuário. A string inclui uma linha de título indicando o número de palavras listadas, seguida por cada palavra e sua contagem em linhas separadas, numeradas de 1 a n.
+    return analyze_text(text).report(n) #Conta as palavras uma vez e formata as n mais comuns no relatório de texto (título + uma linha numerada por palavra), pronto para ser exibido ao usuário.
 
 if __name__ == "__main__": #Verifica se o script está sendo executado diretamente (em vez de importado como um módulo) e, se for o caso, executa o código dentro do bloco if. Isso é uma prática comum em Python para permitir que um arquivo seja usado tanto como um script executável quanto como um módulo importável.
     print("Introduza o texto (linha vazia para terminar):")
@@ -92,6 +708,6 @@ if __name__ == "__main__": #Verifica se o script está sendo executado diretamen
     
     #Verifica se o texto fornecido não está vazio (após remover espaços em branco) e, se não estiver, chama a função top_words_format para obter as 10 palavras mais comuns e suas contagens, imprimindo o resultado formatado. Caso contrário, imprime uma mensagem indicando que nenhum texto foi fornecido.
     if text.strip():
-        print(top_words_format(text, 10))
+        print(analyze_text(text).report(10))
     else:
         print("Nenhum texto fornecido.")
\ No newline at end of file